@@ -0,0 +1,280 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+from typing import Optional
+
+from metrics import PORTAL_REQUESTS, ASSET_BYTES_SAVED, ASSET_SECONDS_SAVED
+
+logger = logging.getLogger(__name__)
+
+# Static assets (scripts, stylesheets) shared by every context, worker and process
+ASSET_CACHE_DIR = os.getenv("ASSET_CACHE_DIR", "asset_cache")
+# Assets whose response sets no max-age / no-cache are served without revalidating for this long
+ASSET_CACHE_FRESH_SECONDS = float(os.getenv("ASSET_CACHE_FRESH_SECONDS", "600"))
+# Resource types the grievance flow never needs (the captcha is a data: URL, not fetched).
+# Blocking is checked first and wins over caching
+BLOCKED_RESOURCE_TYPES = frozenset(
+    t.strip() for t in os.getenv("BLOCKED_RESOURCE_TYPES", "image,media,font").split(",") if t.strip()
+)
+BLOCKED_HOSTS_RE = re.compile(
+    r"google-analytics\.com|googletagmanager\.com|doubleclick\.net|facebook\.(net|com)|hotjar\.com|clarity\.ms"
+)
+# Resource types served from the asset cache when not blocked: with the default
+# BLOCKED_RESOURCE_TYPES that is scripts and stylesheets only; fonts and images
+# are cached once they are taken off the block list (e.g. BLOCKED_RESOURCE_TYPES=media)
+CACHED_RESOURCE_TYPES = frozenset(("script", "stylesheet", "font", "image"))
+
+# Response headers replayed from the cache (the stored body is already decoded)
+_KEPT_HEADERS = ("content-type", "cache-control", "etag", "last-modified", "access-control-allow-origin")
+
+_shared_cache = None
+
+
+class NetworkStats:
+    """What the interception layer saved during one submission."""
+
+    def __init__(self):
+        self.requests = 0
+        self.blocked = 0
+        self.cache_hits = 0
+        self.bytes_saved = 0
+        self.seconds_saved = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "blocked": self.blocked,
+            "cache_hits": self.cache_hits,
+            "bytes_saved": self.bytes_saved,
+            "seconds_saved": round(self.seconds_saved, 3),
+        }
+
+    def _hit(self, size: int, seconds: float):
+        self.cache_hits += 1
+        self.bytes_saved += size
+        self.seconds_saved += seconds
+        ASSET_BYTES_SAVED.inc(size)
+        ASSET_SECONDS_SAVED.inc(seconds)
+
+
+class AssetCache:
+    """
+    On-disk cache of static portal assets keyed by URL, revalidated with the
+    stored ETag / Last-Modified. Files are replaced atomically, so any number
+    of threads and processes can share one directory.
+    """
+
+    def __init__(self, directory: str = ASSET_CACHE_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, url: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(url.encode("utf-8")).hexdigest())
+
+    def load(self, url: str):
+        """(meta, body) for a cached URL, or None."""
+        path = self._path(url)
+        try:
+            with open(path + ".json", "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(path + ".body", "rb") as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+        if meta.get("url") != url or len(body) != meta.get("size"):
+            return None
+        return meta, body
+
+    def _write(self, path: str, data: bytes):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except Exception:
+            os.unlink(tmp)
+            raise
+
+    def store(self, url: str, headers: dict, body: bytes, fetch_seconds: float):
+        validators = {k: headers[k] for k in ("etag", "last-modified") if k in headers}
+        if not validators or "no-store" in headers.get("cache-control", ""):
+            return
+        meta = {
+            "url": url,
+            "headers": {k: headers[k] for k in _KEPT_HEADERS if k in headers},
+            "size": len(body),
+            "fetch_seconds": fetch_seconds,
+            "validated_at": time.time(),
+            **validators,
+        }
+        path = self._path(url)
+        # Body first: a reader only trusts meta whose size matches the body on disk
+        self._write(path + ".body", body)
+        self._write(path + ".json", json.dumps(meta).encode("utf-8"))
+
+    def mark_validated(self, url: str, meta: dict, headers: Optional[dict] = None):
+        """Record a 304; its Cache-Control (if any) replaces the stored one."""
+        meta["validated_at"] = time.time()
+        if headers and "cache-control" in headers:
+            meta["headers"]["cache-control"] = headers["cache-control"]
+        self._write(self._path(url) + ".json", json.dumps(meta).encode("utf-8"))
+
+
+def shared_cache() -> Optional[AssetCache]:
+    """Process-wide cache instance (None when ASSET_CACHE_DIR is empty)."""
+    global _shared_cache
+    if _shared_cache is None and ASSET_CACHE_DIR:
+        _shared_cache = AssetCache(ASSET_CACHE_DIR)
+    return _shared_cache
+
+
+def fresh_seconds(headers: dict) -> float:
+    """How long a stored response may be served without revalidation (no-cache / max-age honoured)."""
+    directives = {}
+    for directive in headers.get("cache-control", "").lower().split(","):
+        name, _, value = directive.strip().partition("=")
+        directives[name] = value.strip('" ')
+    if "no-cache" in directives or "no-store" in directives:
+        return 0.0
+    if "max-age" in directives:
+        try:
+            return max(0.0, float(directives["max-age"]))
+        except ValueError:
+            return 0.0
+    return ASSET_CACHE_FRESH_SECONDS
+
+
+def _is_fresh(meta: dict) -> bool:
+    return time.time() - meta["validated_at"] < fresh_seconds(meta["headers"])
+
+
+def _conditional_headers(request_headers: dict, meta: dict) -> dict:
+    headers = dict(request_headers)
+    if meta.get("etag"):
+        headers["if-none-match"] = meta["etag"]
+    if meta.get("last-modified"):
+        headers["if-modified-since"] = meta["last-modified"]
+    return headers
+
+
+def _classify(request) -> str:
+    """'block', 'cache' or 'pass' for one intercepted request; blocking takes precedence."""
+    if request.resource_type in BLOCKED_RESOURCE_TYPES or BLOCKED_HOSTS_RE.search(request.url):
+        return "block"
+    if request.method == "GET" and request.resource_type in CACHED_RESOURCE_TYPES:
+        return "cache"
+    return "pass"
+
+
+def install_routes(context, cache: Optional[AssetCache]) -> NetworkStats:
+    """Intercept every request of a sync-API context; returns its live stats."""
+    stats = NetworkStats()
+
+    def serve(route):
+        request = route.request
+        stats.requests += 1
+        action = _classify(request)
+        if action == "block":
+            stats.blocked += 1
+            PORTAL_REQUESTS.labels(outcome="blocked").inc()
+            return route.abort()
+        if action == "pass" or cache is None:
+            PORTAL_REQUESTS.labels(outcome="network").inc()
+            return route.continue_()
+
+        cached = cache.load(request.url)
+        if cached and _is_fresh(cached[0]):
+            meta, body = cached
+            stats._hit(meta["size"], meta["fetch_seconds"])
+            PORTAL_REQUESTS.labels(outcome="cache_fresh").inc()
+            return route.fulfill(status=200, headers=meta["headers"], body=body)
+
+        start = time.perf_counter()
+        headers = _conditional_headers(request.headers, cached[0]) if cached else None
+        response = route.fetch(headers=headers)
+        elapsed = time.perf_counter() - start
+        if cached and response.status == 304:
+            meta, body = cached
+            cache.mark_validated(request.url, meta, response.headers)
+            stats._hit(meta["size"], max(0.0, meta["fetch_seconds"] - elapsed))
+            PORTAL_REQUESTS.labels(outcome="cache_revalidated").inc()
+            return route.fulfill(status=200, headers=meta["headers"], body=body)
+
+        body = response.body()
+        if response.status == 200:
+            cache.store(request.url, response.headers, body, elapsed)
+        PORTAL_REQUESTS.labels(outcome="network").inc()
+        route.fulfill(response=response, body=body)
+
+    def handle(route):
+        try:
+            serve(route)
+        except Exception:
+            # Never leave a request hanging because of the cache
+            logger.warning(f"⚠️ Asset interception failed for {route.request.url}", exc_info=True)
+            try:
+                route.continue_()
+            except Exception:
+                pass
+
+    context.route("**/*", handle)
+    return stats
+
+
+async def async_install_routes(context, cache: Optional[AssetCache]) -> NetworkStats:
+    """Async twin of install_routes; disk I/O runs in a thread."""
+    stats = NetworkStats()
+
+    async def serve(route):
+        request = route.request
+        stats.requests += 1
+        action = _classify(request)
+        if action == "block":
+            stats.blocked += 1
+            PORTAL_REQUESTS.labels(outcome="blocked").inc()
+            return await route.abort()
+        if action == "pass" or cache is None:
+            PORTAL_REQUESTS.labels(outcome="network").inc()
+            return await route.continue_()
+
+        cached = await asyncio.to_thread(cache.load, request.url)
+        if cached and _is_fresh(cached[0]):
+            meta, body = cached
+            stats._hit(meta["size"], meta["fetch_seconds"])
+            PORTAL_REQUESTS.labels(outcome="cache_fresh").inc()
+            return await route.fulfill(status=200, headers=meta["headers"], body=body)
+
+        start = time.perf_counter()
+        headers = _conditional_headers(request.headers, cached[0]) if cached else None
+        response = await route.fetch(headers=headers)
+        elapsed = time.perf_counter() - start
+        if cached and response.status == 304:
+            meta, body = cached
+            await asyncio.to_thread(cache.mark_validated, request.url, meta, response.headers)
+            stats._hit(meta["size"], max(0.0, meta["fetch_seconds"] - elapsed))
+            PORTAL_REQUESTS.labels(outcome="cache_revalidated").inc()
+            return await route.fulfill(status=200, headers=meta["headers"], body=body)
+
+        body = await response.body()
+        if response.status == 200:
+            await asyncio.to_thread(cache.store, request.url, response.headers, body, elapsed)
+        PORTAL_REQUESTS.labels(outcome="network").inc()
+        await route.fulfill(response=response, body=body)
+
+    async def handle(route):
+        try:
+            await serve(route)
+        except Exception:
+            logger.warning(f"⚠️ Asset interception failed for {route.request.url}", exc_info=True)
+            try:
+                await route.continue_()
+            except Exception:
+                pass
+
+    await context.route("**/*", handle)
+    return stats
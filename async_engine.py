@@ -0,0 +1,221 @@
+import asyncio
+import logging
+import os
+from typing import Optional
+
+from playwright.async_api import async_playwright
+
+from portal_waits import (
+    CaptchaVerdictTimeout, async_submit_and_wait_for_verdict, async_wait_for_captcha_reload, async_wait_for_idle,
+)
+from metrics import observe_step, CAPTCHA_ATTEMPTS, CAPTCHA_SOLVES, ACTIVE_BROWSERS
+from captcha import decode_captcha_src, record_captcha_result, fallback_captcha
+from ocr_pool import ocr_pool
+from warm_pool import AsyncWarmPool, async_open_form_entry
+
+logger = logging.getLogger(__name__)
+
+# Max browser contexts (grievances) driven at once by the single Chromium process
+ASYNC_MAX_CONTEXTS = max(1, int(os.getenv("ASYNC_MAX_CONTEXTS", "8")))
+
+
+async def solve_captcha(page, max_retries: int = 10):
+    """
+    Async twin of main.solve_captcha: OCR runs in the OCR process pool so the
+    event loop keeps driving the other contexts while tesseract works.
+    """
+    for attempt in range(1, max_retries + 1):
+        try:
+            logger.info(f"🔄 Captcha attempt {attempt}/{max_retries}")
+
+            captcha_src = await page.locator("img[alt='captcha']").get_attribute("src")
+            captcha_bytes = decode_captcha_src(captcha_src)
+            if not captcha_bytes:
+                logger.error("❌ Captcha image not found")
+                return None
+
+            captcha_text, candidates = await ocr_pool.read_async(captcha_bytes)
+
+            guesses = [(c.text, round(c.score)) for c in candidates]
+            logger.info(f"🔍 Captcha guesses: {guesses} | Picked: '{captcha_text}'")
+
+            if captcha_text:
+                await page.fill("input[name='captchaName']", captcha_text)
+
+                # Click submit to check if captcha passes
+                with observe_step("submit"):
+                    await async_submit_and_wait_for_verdict(page, page.get_by_role("button", name="Submit"))
+
+                # Detect if captcha was accepted or rejected
+                if not await page.locator("img[alt='captcha']").is_visible():
+                    await asyncio.to_thread(record_captcha_result, captcha_bytes, captcha_text, True, candidates)
+                    CAPTCHA_ATTEMPTS.labels(outcome="accepted").inc()
+                    CAPTCHA_SOLVES.labels(result="solved").inc()
+                    logger.info("✅ Captcha solved successfully")
+                    logger.info("Grievance submitted successfully ✅")
+                    return captcha_text
+                else:
+                    await asyncio.to_thread(record_captcha_result, captcha_bytes, captcha_text, False, candidates)
+                    CAPTCHA_ATTEMPTS.labels(outcome="rejected").inc()
+                    logger.warning("⚠️ Captcha rejected, retrying...")
+
+                    # Reload captcha for retry
+                    await page.click("img[alt='captcha']")
+                    await async_wait_for_captcha_reload(page, captcha_src)
+
+            else:
+                CAPTCHA_ATTEMPTS.labels(outcome="empty").inc()
+                logger.warning("⚠️ Empty captcha guess, retrying...")
+
+        except CaptchaVerdictTimeout:
+            # Submitted, outcome unknown: another attempt could file the grievance twice
+            CAPTCHA_ATTEMPTS.labels(outcome="timeout").inc()
+            raise
+        except Exception:
+            CAPTCHA_ATTEMPTS.labels(outcome="error").inc()
+            logger.exception(f"Error during captcha attempt {attempt}")
+
+    # If all retries fail, return a fallback
+    fallback = fallback_captcha()
+    CAPTCHA_SOLVES.labels(result="fallback").inc()
+    logger.error(f"❌ All captcha attempts failed, using fallback: {fallback}")
+    await page.fill("input[name='captchaName']", fallback)
+    return fallback
+
+
+class AsyncGrievanceEngine:
+    """
+    Native playwright.async_api engine: one Chromium process, many concurrent
+    browser contexts, bounded by a semaphore. Runs inside the FastAPI loop.
+    """
+
+    def __init__(self, max_contexts: int = ASYNC_MAX_CONTEXTS):
+        self.max_contexts = max_contexts
+        self._semaphore = asyncio.Semaphore(max_contexts)
+        self._start_lock = asyncio.Lock()
+        self._playwright = None
+        self._browser = None
+        self.active_contexts = 0
+        # Contexts already parked at the ULB selector, refilled in the background
+        self.warm = AsyncWarmPool(self._open_form_entry)
+
+    async def _open_form_entry(self):
+        return await async_open_form_entry(await self.start())
+
+    async def start(self):
+        async with self._start_lock:
+            if self._browser:
+                return self._browser
+            self._playwright = await async_playwright().start()
+            self._browser = await self._playwright.chromium.launch(
+                headless=True,
+                args=["--no-sandbox", "--disable-dev-shm-usage"]
+            )
+            ACTIVE_BROWSERS.inc()
+            logger.info(f"✅ Async browser launched (max {self.max_contexts} contexts)")
+            return self._browser
+
+    async def stop(self):
+        try:
+            await self.warm.stop()
+            if self._browser:
+                await self._browser.close()
+                ACTIVE_BROWSERS.dec()
+                logger.info("Async browser closed")
+            if self._playwright:
+                await self._playwright.stop()
+                logger.info("Async Playwright stopped")
+        finally:
+            self._browser = None
+            self._playwright = None
+
+    async def automate_grievance(
+        self,
+        issue_text: str,
+        extra_info: bool,
+        grievance_location: Optional[str],
+        grievance_type: Optional[str],
+        ulb: str,
+        user_name: str,
+        user_mobile: str,
+        user_email: str
+    ):
+        async with self._semaphore:
+            self.active_contexts += 1
+            try:
+                return await self._run(
+                    issue_text, extra_info, grievance_location, grievance_type,
+                    ulb, user_name, user_mobile, user_email,
+                )
+            finally:
+                self.active_contexts -= 1
+
+    async def _run(
+        self,
+        issue_text: str,
+        extra_info: bool,
+        grievance_location: Optional[str],
+        grievance_type: Optional[str],
+        ulb: str,
+        user_name: str,
+        user_mobile: str,
+        user_email: str
+    ):
+        context = None
+        try:
+            session = await self.warm.take()
+            if session:
+                logger.info("♨️ Starting from a pre-warmed context")
+            else:
+                with observe_step("navigate"):
+                    session = await self._open_form_entry()
+            context, page = session.context, session.page
+
+            with observe_step("ulb_select"):
+                logger.info(f"Selecting ULB: {ulb}")
+                await page.select_option("select[name='ulb']", label=ulb)
+                await page.get_by_role("button", name="Next").click()
+
+            with observe_step("form_fill"):
+                logger.info("Filling grievance description")
+                await page.fill("textarea[name='complaintDescription']", issue_text)
+                await page.get_by_role("checkbox").click()
+
+                if extra_info:
+                    logger.info("Adding extra info")
+                    await page.get_by_text("Give More Information").click()
+                    if grievance_location:
+                        await page.fill("input[name='grievanceLocation']", grievance_location)
+                    if grievance_type:
+                        await page.select_option("select[name='problemTypeId']", label=grievance_type)
+
+                await page.get_by_role("button", name="Next").click()
+
+                logger.info("Filling user details")
+                await page.fill("input[name='name']", user_name)
+                await page.fill("input[name='mobileNo']", user_mobile)
+                await page.get_by_role("checkbox").click()
+                await page.fill("input[name='email']", user_email)
+
+                await page.get_by_role("button", name="Next").click()
+
+            with observe_step("captcha"):
+                logger.info("Handling captcha with auto-retry OCR")
+                await solve_captcha(page, max_retries=10)
+
+            await async_wait_for_idle(page)
+            await page.close()
+            await context.close()
+
+            logger.info(f"🌐 Network savings: {session.network.as_dict()}")
+            return {
+                "status": "success",
+                "message": "Grievance submitted & forwarded to department",
+                "network": session.network.as_dict(),
+            }
+
+        except Exception as e:
+            logger.exception("Error during grievance automation")
+            if context:
+                await context.close()
+            return {"status": "error", "message": str(e)}
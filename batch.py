@@ -0,0 +1,226 @@
+import asyncio
+import codecs
+import csv
+import io
+import json
+import logging
+import os
+from typing import Iterator, Tuple, Union
+
+from python_multipart.multipart import MultipartParser, parse_options_header
+from starlette.requests import Request
+from starlette.responses import StreamingResponse
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on rows accepted from one upload
+BATCH_MAX_ROWS = int(os.getenv("BATCH_MAX_ROWS", "5000"))
+# Upload chunks read ahead of the row parser; beyond that the client is slowed down
+BATCH_READ_AHEAD_CHUNKS = max(1, int(os.getenv("BATCH_READ_AHEAD_CHUNKS", "4")))
+
+REQUIRED_FIELDS = ("issue_text", "ulb", "department", "user_name", "user_mobile", "user_email")
+OPTIONAL_FIELDS = ("extra_info", "grievance_location", "grievance_type")
+
+_TRUE = {"1", "true", "yes", "y", "on"}
+
+
+def _detect_format(fileobj, filename: str, content_type: str) -> str:
+    name = (filename or "").lower()
+    ctype = (content_type or "").lower()
+    if name.endswith((".jsonl", ".ndjson")) or "ndjson" in ctype or "jsonl" in ctype:
+        return "jsonl"
+    if name.endswith(".csv") or "csv" in ctype:
+        return "csv"
+    # Unknown: sniff the first non-blank byte without consuming the stream
+    if hasattr(fileobj, "peek"):
+        head = fileobj.peek(512)[:512]
+    else:
+        head = fileobj.read(512)
+        fileobj.seek(0)
+    return "jsonl" if head.lstrip(codecs.BOM_UTF8 + b" \t\r\n")[:1] == b"{" else "csv"
+
+
+def to_payload(raw: dict) -> dict:
+    """Validate one uploaded row and shape it like a /submit-grievance/ form."""
+    if not isinstance(raw, dict):
+        raise ValueError("row is not an object")
+    row = {k.strip(): v.strip() if isinstance(v, str) else v for k, v in raw.items() if k}
+    missing = [f for f in REQUIRED_FIELDS if not row.get(f)]
+    if missing:
+        raise ValueError(f"missing field(s): {', '.join(missing)}")
+
+    extra_info = row.get("extra_info")
+    if isinstance(extra_info, str):
+        extra_info = extra_info.lower() in _TRUE
+    payload = {f: str(row[f]) for f in REQUIRED_FIELDS}
+    payload["extra_info"] = bool(extra_info)
+    payload["grievance_location"] = row.get("grievance_location") or None
+    payload["grievance_type"] = row.get("grievance_type") or None
+    return payload
+
+
+def iter_rows(fileobj, filename: str = "", content_type: str = "") -> Iterator[Tuple[int, Union[dict, str]]]:
+    """
+    Lazily parse a CSV (with header) or JSONL upload from a binary file object.
+    Yields (row number, payload) or (row number, error message); only one row
+    is held in memory at a time, so uploads of any size stream through.
+    """
+    fmt = _detect_format(fileobj, filename, content_type)
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    try:
+        if fmt == "csv":
+            records = ((i, r) for i, r in enumerate(csv.DictReader(text), 1))
+        else:
+            records = ((i, line) for i, line in enumerate((l for l in text if l.strip()), 1))
+
+        for number, record in records:
+            if number > BATCH_MAX_ROWS:
+                logger.warning(f"⚠️ Batch upload truncated at {BATCH_MAX_ROWS} rows")
+                yield number, f"batch limit of {BATCH_MAX_ROWS} rows reached, remaining rows ignored"
+                return
+            try:
+                if fmt == "jsonl":
+                    record = json.loads(record)
+                yield number, to_payload(record)
+            except (ValueError, TypeError) as e:
+                yield number, str(e)
+    finally:
+        # The upload owns the underlying file; don't let the wrapper close it
+        text.detach()
+
+
+class UploadStream(io.RawIOBase):
+    """
+    The body of an upload request as a blocking binary file, read while it
+    arrives. feed() runs on the event loop and reads request.stream() (the
+    "file" part of a multipart form, or the raw body); read() runs in a worker
+    thread and waits for the next chunk. At most BATCH_READ_AHEAD_CHUNKS are
+    buffered, so a slow batch also slows the upload instead of filling memory.
+    """
+
+    def __init__(self, request: Request):
+        self.request = request
+        self.filename = ""
+        self.content_type = request.headers.get("content-type", "")
+        self.started = asyncio.Event()  # filename / content_type are known
+        self.finished = asyncio.Event()  # the request body has been read
+        self._loop = asyncio.get_running_loop()
+        self._chunks = asyncio.Queue(BATCH_READ_AHEAD_CHUNKS)
+        self._pending = b""
+        self._eof = False
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._pending and not self._eof:
+            chunk = asyncio.run_coroutine_threadsafe(self._chunks.get(), self._loop).result()
+            if isinstance(chunk, Exception):
+                self._eof = True
+                raise chunk
+            self._eof = not chunk
+            self._pending = chunk
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+    async def feed(self):
+        """Read the request body into the stream; ends it with EOF (b"") or the error."""
+        try:
+            mime, options = parse_options_header(self.content_type)
+            if mime == b"multipart/form-data" and options.get(b"boundary"):
+                await self._feed_multipart(options[b"boundary"])
+            else:
+                self.started.set()
+                async for chunk in self.request.stream():
+                    if chunk:
+                        await self._chunks.put(chunk)
+            if not self.started.is_set():
+                raise ValueError("no 'file' field in the upload")
+            await self._chunks.put(b"")
+        except asyncio.CancelledError:
+            self.abort()
+            raise
+        except Exception as e:
+            self.started.set()
+            await self._chunks.put(e)
+        finally:
+            self.finished.set()
+
+    async def _feed_multipart(self, boundary: bytes):
+        part = {"headers": {}, "field": b"", "value": b""}
+        data = []
+
+        def on_header_field(buf, start, end):
+            part["field"] += buf[start:end]
+
+        def on_header_value(buf, start, end):
+            part["value"] += buf[start:end]
+
+        def on_header_end():
+            part["headers"][part["field"].lower()] = part["value"]
+            part["field"] = part["value"] = b""
+
+        def on_headers_finished():
+            _, options = parse_options_header(part["headers"].get(b"content-disposition", b""))
+            part["is_file"] = options.get(b"name") == b"file" and not self.started.is_set()
+            if part["is_file"]:
+                self.filename = options.get(b"filename", b"").decode("utf-8", "replace")
+                self.content_type = part["headers"].get(b"content-type", b"").decode("latin-1")
+                self.started.set()
+
+        def on_part_data(buf, start, end):
+            if part.get("is_file"):
+                data.append(bytes(buf[start:end]))
+
+        def on_part_end():
+            part.update(headers={}, is_file=False)
+
+        parser = MultipartParser(boundary, {
+            "on_header_field": on_header_field,
+            "on_header_value": on_header_value,
+            "on_header_end": on_header_end,
+            "on_headers_finished": on_headers_finished,
+            "on_part_data": on_part_data,
+            "on_part_end": on_part_end,
+        })
+        async for chunk in self.request.stream():
+            parser.write(chunk)
+            if data:
+                await self._chunks.put(b"".join(data))
+                data.clear()
+
+    def abort(self):
+        """Wake a reader waiting for a chunk that will never come."""
+        while self._chunks.full():
+            self._chunks.get_nowait()
+        self._chunks.put_nowait(ConnectionError("upload was not read to the end"))
+
+
+class UploadStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse sent while the request body is still being read.
+    Starlette's disconnect listener would consume the body's messages, so it
+    only starts once the upload has been read (or abandoned).
+    """
+
+    def __init__(self, content, upload: UploadStream, **kwargs):
+        super().__init__(content, **kwargs)
+        self.upload = upload
+
+    async def __call__(self, scope, receive, send):
+        async def listen():
+            await self.upload.finished.wait()
+            await self.listen_for_disconnect(receive)
+
+        streamer = asyncio.create_task(self.stream_response(send))
+        listener = asyncio.create_task(listen())
+        await asyncio.wait((streamer, listener), return_when=asyncio.FIRST_COMPLETED)
+        for task in (streamer, listener):
+            task.cancel()
+        await asyncio.gather(streamer, listener, return_exceptions=True)
+        if not streamer.cancelled() and streamer.exception():
+            raise streamer.exception()
+        if self.background is not None:
+            await self.background()
@@ -0,0 +1,113 @@
+"""
+Accuracy vs latency of the captcha pipeline on a recorded corpus.
+
+Replays every captcha with a known answer (accepted by the portal, or
+hand-labelled with a "label" field in index.jsonl) through preprocessing
+variants x OCR configs and reports, per combination, exact-match accuracy,
+the attempts that implies per captcha, and preprocessing + OCR latency.
+
+    CAPTCHA_CORPUS_DIR=captcha_corpus python main.py   # record while serving
+    python bench_captcha.py captcha_corpus
+    python bench_captcha.py --synthetic 40             # no corpus yet
+"""
+import argparse
+import random
+import statistics
+import time
+
+from PIL import Image
+
+from bench_ocr import synthetic_captcha
+from captcha import (
+    CAPTCHA_CHARSET, OCR_CONFIGS, binarize_captcha, get_ocr_backend, get_template_recognizer,
+    read_captcha, score_candidate,
+)
+from captcha_corpus import CaptchaCorpus, truth
+
+# Preprocessing chains to compare (keyword arguments for binarize_captcha)
+PREPROCESS_VARIANTS = {
+    "autocontrast+otsu+open2": {},
+    "otsu+open2": {"autocontrast": False},
+    "autocontrast+t128+open2": {"threshold": 128},
+    "autocontrast+otsu": {"open_kernel": 0},
+    "autocontrast+otsu+open3": {"open_kernel": 3},
+}
+
+
+def load_labelled(directory):
+    """[(png bytes, true text)], one per distinct image."""
+    samples = {}
+    for entry in CaptchaCorpus(directory).entries():
+        text = truth(entry)
+        if text:
+            samples[entry["file"]] = (entry["png"], text)
+    return list(samples.values())
+
+
+def report(label, results):
+    """results: [(correct, seconds)]"""
+    timings = sorted(seconds * 1000 for _, seconds in results)
+    accuracy = sum(correct for correct, _ in results) / len(results)
+    attempts = f"{1 / accuracy:6.2f}" if accuracy else "     -"
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    print(
+        f"{label:<48} acc {accuracy * 100:5.1f}%   attempts {attempts}   "
+        f"mean {statistics.mean(timings):7.1f} ms   p95 {p95:7.1f} ms"
+    )
+
+
+def run_variant(samples, preprocess, recognize):
+    results = []
+    for png, text in samples:
+        start = time.perf_counter()
+        guess = recognize(binarize_captcha(png, **preprocess))
+        results.append((guess == text, time.perf_counter() - start))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Captcha OCR accuracy vs latency per pipeline variant")
+    parser.add_argument("corpus", nargs="?", help="captcha corpus directory (CAPTCHA_CORPUS_DIR)")
+    parser.add_argument("--synthetic", type=int, default=0, help="use N synthetic captchas instead")
+    parser.add_argument("--backend", default=None, help="tesserocr or pytesseract (default: OCR_BACKEND)")
+    parser.add_argument("-n", "--limit", type=int, default=0, help="use at most N captchas")
+    args = parser.parse_args()
+
+    if args.synthetic or not args.corpus:
+        texts = ["".join(random.choices(CAPTCHA_CHARSET, k=5)) for _ in range(args.synthetic or 30)]
+        samples = [(synthetic_captcha(t), t) for t in texts]
+    else:
+        samples = load_labelled(args.corpus)
+    if args.limit:
+        samples = samples[:args.limit]
+    if not samples:
+        raise SystemExit("No captchas with a known answer in the corpus yet")
+
+    backend = get_ocr_backend(args.backend) if args.backend else get_ocr_backend()
+    template = get_template_recognizer()
+    print(f"📊 {len(samples)} labelled captcha(s), OCR backend {backend.name}\n")
+
+    def tesseract(cfg):
+        def recognize(binary):
+            candidate = score_candidate(backend.recognize(Image.fromarray(binary), cfg), cfg.args)
+            return candidate.text if candidate else ""
+        return recognize
+
+    def glyphs(binary):
+        candidate = score_candidate(template.recognize(binary), "template")
+        return candidate.text if candidate else ""
+
+    for name, preprocess in PREPROCESS_VARIANTS.items():
+        for cfg in OCR_CONFIGS:
+            report(f"{name} | {cfg.args.split(' -c')[0]}{' +whitelist' if cfg.whitelist else ''}",
+                   run_variant(samples, preprocess, tesseract(cfg)))
+        if len(template.bank):
+            report(f"{name} | template", run_variant(samples, preprocess, glyphs))
+        print()
+
+    deployed = []
+    for png, text in samples:
+        start = time.perf_counter()
+        guess, _ = read_captcha(png, backend=backend)
+        deployed.append((guess == text, time.perf_counter() - start))
+    report("read_captcha (as deployed)", deployed)
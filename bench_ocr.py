@@ -0,0 +1,91 @@
+"""
+Per-attempt OCR latency benchmark for solve_captcha.
+
+Compares the old path (three pytesseract subprocesses, one after another)
+with pytesseract run in parallel, the pooled in-process tesserocr engines and
+the glyph-bank template recognizer (once the bank has learned some glyphs).
+
+    python bench_ocr.py                  # synthetic captchas
+    python bench_ocr.py captchas/ -n 50  # directory of saved captcha PNGs
+"""
+import argparse
+import random
+import statistics
+import time
+from io import BytesIO
+from pathlib import Path
+
+from PIL import Image, ImageDraw, ImageFont
+
+from captcha import (
+    CAPTCHA_CHARSET, binarize_captcha, get_ocr_backend, get_template_recognizer, read_captcha, tesserocr,
+)
+
+
+def synthetic_captcha(text: str) -> bytes:
+    """Rough stand-in for the portal captcha: noisy text on a light background."""
+    img = Image.new("L", (130, 40), color=random.randint(200, 255))
+    draw = ImageDraw.Draw(img)
+    try:
+        font = ImageFont.load_default(size=22)
+    except TypeError:  # Pillow < 10.1 has a single small bitmap font
+        font = ImageFont.load_default()
+    for i, ch in enumerate(text):
+        draw.text((6 + i * 24, 6 + random.randint(-3, 3)), ch, fill=random.randint(0, 60), font=font)
+    for _ in range(4):
+        draw.line(
+            [(random.randint(0, 130), random.randint(0, 40)), (random.randint(0, 130), random.randint(0, 40))],
+            fill=random.randint(150, 190),
+        )
+    buf = BytesIO()
+    img.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def load_samples(directory, count):
+    if directory:
+        files = sorted(Path(directory).glob("*.png"))[:count]
+        return [f.read_bytes() for f in files]
+    return [synthetic_captcha("".join(random.choices(CAPTCHA_CHARSET, k=5))) for _ in range(count)]
+
+
+def bench(label, samples, fn):
+    fn(samples[0])  # warm-up
+    timings = []
+    for sample in samples:
+        start = time.perf_counter()
+        fn(sample)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    print(
+        f"{label:<28} mean {statistics.mean(timings):8.1f} ms   "
+        f"p50 {statistics.median(timings):8.1f} ms   p95 {p95:8.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-attempt captcha OCR latency")
+    parser.add_argument("directory", nargs="?", help="directory of captcha PNGs (default: synthetic)")
+    parser.add_argument("-n", "--count", type=int, default=30, help="number of captchas")
+    args = parser.parse_args()
+
+    samples = load_samples(args.directory, args.count)
+    print(f"📊 {len(samples)} captcha(s), per-attempt OCR latency\n")
+
+    def tesseract(name, parallel):
+        backend = get_ocr_backend(name)
+        return lambda sample: read_captcha(sample, backend=backend, parallel=parallel, recognizer="tesseract")
+
+    bench("pytesseract (serial, old)", samples, tesseract("pytesseract", parallel=False))
+    bench("pytesseract (parallel)", samples, tesseract("pytesseract", parallel=True))
+    if tesserocr is not None:
+        bench("tesserocr pool (parallel)", samples, tesseract("tesserocr", parallel=True))
+    else:
+        print("tesserocr not installed, skipping in-process backend")
+
+    template = get_template_recognizer()
+    if len(template.bank):
+        bench("template (glyph bank)", samples, lambda sample: template.recognize(binarize_captcha(sample)))
+    else:
+        print("glyph bank is empty, skipping template recognizer")
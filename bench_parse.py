@@ -0,0 +1,116 @@
+"""
+Parse time and memory per department page for each HTML parser backend.
+
+Each backend runs in its own fresh process over the same pages: time per
+page (extract_contact, as dept_scrape calls it), peak Python allocations per
+page (tracemalloc) and growth of the process' peak RSS, which also counts the
+C parsers' own buffers. Results are checked against the bs4 baseline.
+
+    SCRAPE_SAVE_DIR=pages python dept_scrape.py   # save department pages
+    python bench_parse.py pages
+    python bench_parse.py --synthetic 20          # no saved pages yet
+"""
+import argparse
+import glob
+import multiprocessing
+import os
+import random
+import resource
+import statistics
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+from contact_parser import available_parsers, extract_contact, get_parser
+
+
+def synthetic_page(filler_kb: int = 400) -> str:
+    """A large government-style page with one contact block near the end."""
+    rows = []
+    while sum(map(len, rows)) < filler_kb * 1024:
+        n = len(rows)
+        rows.append(
+            f"<tr><td>{n}</td><td><a href='/Home/Scheme/{n}'>Scheme {n}</a></td>"
+            f"<td>Notification regarding tender no. {n}/2024 dated {n % 28 + 1}.03.2024</td></tr>"
+        )
+    phone = f"0651-{random.randint(2200000, 2499999)}"
+    return (
+        "<html><head><title>Department</title><script>var Email = 'x';</script>"
+        "<style>td{padding:2px}</style></head><body><nav>" + "<a href='/Home/Department'>Departments</a>" * 50
+        + "</nav><table>" + "".join(rows) + "</table>"
+        f"<div class='contact-details'><h3>Contact Us</h3><p>Phone No: {phone}, \n 0651-2400000</p>"
+        "<p>Email: secy-dept[at]jharkhand.gov.in</p></div>"
+        "<footer>Website content managed by the department</footer></body></html>"
+    )
+
+
+def run_backend(name: str, pages: list) -> dict:
+    """Runs in a fresh process: time, then memory, for every page."""
+    parser = get_parser(name)
+    extract_contact(pages[0], parser)  # warm-up (imports, first allocation)
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    results, timings = [], []
+    for html in pages:
+        start = time.perf_counter()
+        results.append(extract_contact(html, parser))
+        timings.append(time.perf_counter() - start)
+    rss_growth = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before
+
+    peaks = []
+    tracemalloc.start()
+    for html in pages:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        extract_contact(html, parser)
+        peaks.append(tracemalloc.get_traced_memory()[1] - base)
+    tracemalloc.stop()
+    return {"timings": timings, "peaks": peaks, "rss_growth_kb": rss_growth, "results": results}
+
+
+def load_pages(directory):
+    pages = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.html"))):
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            pages.append(f.read())
+    return pages
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Department page parse time / memory per HTML parser backend")
+    parser.add_argument("pages", nargs="?", help="directory of saved pages (SCRAPE_SAVE_DIR)")
+    parser.add_argument("--synthetic", type=int, default=0, help="use N synthetic pages instead")
+    parser.add_argument("--size-kb", type=int, default=400, help="filler per synthetic page")
+    parser.add_argument("--parsers", default=",".join(available_parsers()), help="comma-separated backends")
+    args = parser.parse_args()
+
+    if args.synthetic or not args.pages:
+        pages = [synthetic_page(args.size_kb) for _ in range(args.synthetic or 10)]
+    else:
+        pages = load_pages(args.pages)
+    if not pages:
+        raise SystemExit("No .html pages to parse")
+    names = [n for n in args.parsers.split(",") if n]
+
+    total_mb = sum(len(p.encode("utf-8")) for p in pages) / 1e6
+    print(f"📊 {len(pages)} page(s), {total_mb / len(pages) * 1000:.0f} KB mean\n")
+    print(f"{'parser':<12} {'mean ms':>9} {'p95 ms':>9} {'MB/s':>8} {'traced KB':>11} {'RSS +MB':>8} {'agree':>7}")
+
+    spawn = multiprocessing.get_context("spawn")
+    outcomes = {}
+    for name in names:
+        with ProcessPoolExecutor(max_workers=1, mp_context=spawn) as pool:
+            outcomes[name] = pool.submit(run_backend, name, pages).result()
+
+    baseline = outcomes.get("bs4")
+    for name, out in outcomes.items():
+        timings = sorted(t * 1000 for t in out["timings"])
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        agree = "-"
+        if baseline:
+            same = sum(a == b for a, b in zip(out["results"], baseline["results"]))
+            agree = f"{same / len(pages) * 100:.0f}%"
+        print(
+            f"{name:<12} {statistics.mean(timings):>9.2f} {p95:>9.2f} {total_mb / (sum(timings) / 1000):>8.1f} "
+            f"{statistics.mean(out['peaks']) / 1024:>11.0f} {out['rss_growth_kb'] / 1024:>8.1f} {agree:>7}"
+        )
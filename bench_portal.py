@@ -0,0 +1,138 @@
+"""
+End-to-end automation benchmark against the mock portal.
+
+Starts mock_portal.py in-process (or uses --url), points the automation at it
+through PORTAL_URL and runs N grievances through run_automation. Reports
+grievances per minute and p50/p95/p99 latency for every pipeline stage.
+
+    python bench_portal.py -n 40 -c 4 --engine async --latency-ms 150 --reject-rate 0.3
+    python bench_portal.py --url http://staging-mock:8100/grievance/main
+"""
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def start_mock(port, latency_ms, reject_rate, check_captcha):
+    import uvicorn
+    import mock_portal
+
+    mock_portal.MOCK_LATENCY_MS, mock_portal.MOCK_REJECT_RATE = latency_ms, reject_rate
+    mock_portal.MOCK_CHECK_CAPTCHA = check_captcha
+    server = uvicorn.Server(uvicorn.Config(mock_portal.app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, name="mock-portal", daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+async def run(count, concurrency):
+    import main
+    from metrics import add_step_listener
+    from portal_data import ULB_OPTIONS
+
+    timings = defaultdict(list)
+    add_step_listener(lambda step, seconds: timings[step].append(seconds))
+    ulbs = list(ULB_OPTIONS.values())
+    slots = asyncio.Semaphore(concurrency)
+    results = defaultdict(int)
+
+    async def one(i):
+        async with slots:
+            start = time.perf_counter()
+            result = await main.run_automation(
+                f"Benchmark grievance {i}: streetlight not working", True, "Main Road", None,
+                random.choice(ulbs), "Bench User", "9999999999", "bench@example.com",
+            )
+            timings["total"].append(time.perf_counter() - start)
+            results[result.get("status", "error")] += 1
+
+    wall = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(count)))
+    wall = time.perf_counter() - wall
+
+    if main.AUTOMATION_ENGINE == "async":
+        await main.async_engine.stop()
+    elif main.AUTOMATION_ENGINE == "http":
+        await main.http_engine.stop()
+    else:
+        main.browser_pool.shutdown(wait=True)
+    return timings, dict(results), wall
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Grievances/min and per-stage latency against the mock portal")
+    parser.add_argument("-n", "--count", type=int, default=20, help="grievances to submit")
+    parser.add_argument("-c", "--concurrency", type=int, default=2, help="grievances in flight")
+    parser.add_argument("--engine", choices=("sync", "async", "http"), default="sync")
+    parser.add_argument("--url", help="portal entry URL (default: start the mock in-process)")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency-ms", type=float, default=100)
+    parser.add_argument("--reject-rate", type=float, default=0.2)
+    parser.add_argument("--check-captcha", action="store_true",
+                        help="mock rejects wrong captcha answers (default: accepts any)")
+    parser.add_argument("--warm", type=int, default=0, help="WARM_CONTEXTS per pool")
+    return parser.parse_args(argv)
+
+
+def prepare(args):
+    """
+    Point the automation at the portal and everything a run learns at scratch,
+    then start the mock. The environment must be set first: captcha, glyph_ocr,
+    captcha_corpus and main read it when imported, and the mock imports captcha.
+    """
+    scratch = tempfile.mkdtemp(prefix="bench_portal_")
+    os.environ["PORTAL_URL"] = args.url or f"http://127.0.0.1:{args.port}/grievance/main"
+    os.environ["AUTOMATION_ENGINE"] = args.engine
+    os.environ["WARM_CONTEXTS"] = str(args.warm)
+    os.environ.setdefault("BROWSER_WORKERS", str(args.concurrency))
+    os.environ.setdefault("ASYNC_MAX_CONTEXTS", str(args.concurrency))
+    os.environ.setdefault("HTTP_MAX_CONNECTIONS", str(args.concurrency))
+    if not args.url:
+        # The http engine only runs with its endpoints set; these are the mock's
+        os.environ.setdefault("PORTAL_CAPTCHA_PATH", "/grievance/api/captcha")
+        os.environ.setdefault("PORTAL_SUBMIT_PATH", "/grievance/api/grievances")
+    os.environ.setdefault("JOB_DB_PATH", os.path.join(scratch, "jobs.db"))
+    os.environ.setdefault("OUTBOX_DB_PATH", os.path.join(scratch, "outbox.db"))
+    # The mock accepts wrong answers, so anything learned from it stays in scratch:
+    # the glyph bank starts as a copy of the real one, the asset cache and corpus empty
+    glyph_bank = os.getenv("GLYPH_BANK_PATH", "glyph_bank.npz")
+    os.environ["GLYPH_BANK_PATH"] = os.path.join(scratch, "glyph_bank.npz")
+    if os.path.exists(glyph_bank):
+        shutil.copyfile(glyph_bank, os.environ["GLYPH_BANK_PATH"])
+    os.environ["ASSET_CACHE_DIR"] = os.path.join(scratch, "asset_cache")
+    if os.getenv("CAPTCHA_CORPUS_DIR"):
+        os.environ["CAPTCHA_CORPUS_DIR"] = os.path.join(scratch, "captcha_corpus")
+
+    if not args.url:
+        start_mock(args.port, args.latency_ms, args.reject_rate, args.check_captcha)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    prepare(args)
+
+    timings, results, wall = asyncio.run(run(args.count, args.concurrency))
+
+    print(f"\n📊 {args.count} grievance(s), engine={args.engine}, concurrency={args.concurrency}, "
+          f"portal={os.environ['PORTAL_URL']}")
+    print(f"   results: {results}")
+    print(f"   throughput: {args.count / wall * 60:.1f} grievances/min ({wall:.1f} s wall)\n")
+    print(f"{'stage':<12} {'n':>5} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}")
+    for stage in ("navigate", "ulb_select", "form_fill", "captcha", "submit", "total"):
+        values = timings.get(stage)
+        if not values:
+            continue
+        p50, p95, p99 = (percentile(values, p) * 1000 for p in (50, 95, 99))
+        print(f"{stage:<12} {len(values):>5} {p50:>10.1f} {p95:>10.1f} {p99:>10.1f}")
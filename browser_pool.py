@@ -0,0 +1,160 @@
+import asyncio
+import logging
+import os
+import queue
+import threading
+from concurrent.futures import Future
+
+from playwright.sync_api import sync_playwright
+
+from metrics import ACTIVE_BROWSERS
+
+logger = logging.getLogger(__name__)
+
+# Number of browser workers; each one owns its own Playwright instance + Chromium
+BROWSER_WORKERS = max(1, int(os.getenv("BROWSER_WORKERS", "1")))
+
+# Playwright/Browser (managed per worker thread, sync_api objects are thread-bound)
+thread_local = threading.local()
+
+# to run on localhost
+# def get_browser():
+#     if not hasattr(thread_local, "playwright"):
+#         thread_local.playwright = sync_playwright().start()
+#         thread_local.browser = thread_local.playwright.chromium.launch(
+#             headless=False,
+#             slow_mo=500
+#         )
+#         logger.info("✅ Browser launched successfully in thread")
+#     return thread_local.browser
+
+#for deployment
+def get_browser():
+    if not hasattr(thread_local, "playwright"):
+        thread_local.playwright = sync_playwright().start()
+        thread_local.browser = thread_local.playwright.chromium.launch(
+            headless=True,
+            args=["--no-sandbox", "--disable-dev-shm-usage"]
+        )
+        ACTIVE_BROWSERS.inc()
+        logger.info(f"✅ Browser launched successfully in {threading.current_thread().name}")
+    return thread_local.browser
+
+
+def close_browser():
+    """Close the browser owned by the calling worker thread (if any)."""
+    try:
+        if getattr(thread_local, "browser", None):
+            thread_local.browser.close()
+            ACTIVE_BROWSERS.dec()
+            logger.info(f"Browser closed in {threading.current_thread().name}")
+        if getattr(thread_local, "playwright", None):
+            thread_local.playwright.stop()
+            logger.info(f"Playwright stopped in {threading.current_thread().name}")
+    except Exception:
+        logger.exception("Error while closing browser")
+    finally:
+        thread_local.__dict__.clear()
+
+
+class BrowserWorkerPool:
+    """
+    Pool of N browser worker threads pulling jobs from one shared FIFO queue.
+
+    Every worker lazily launches its own Playwright + Chromium on first use, so
+    jobs never share a browser, and an idle worker always takes the oldest
+    waiting job (no job gets stuck behind a slow one on a busy worker).
+    """
+
+    def __init__(self, size: int = BROWSER_WORKERS, on_idle=None, idle_seconds: float = 15):
+        self.size = size
+        # Called on a worker thread with nothing queued; returns True if it did
+        # some work (and should be called again before the worker blocks)
+        self.on_idle = on_idle
+        self.idle_seconds = idle_seconds
+        self._jobs = queue.Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+        self._busy = 0
+
+    def start(self):
+        """Launch the worker threads now instead of on the first submit."""
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.size):
+                t = threading.Thread(
+                    target=self._worker_loop, name=f"browser-worker-{i}", daemon=True
+                )
+                t.start()
+                self._threads.append(t)
+        logger.info(f"🧵 Started {self.size} browser worker(s)")
+
+    def _next_item(self):
+        if self.on_idle is None:
+            return self._jobs.get()
+        while True:
+            try:
+                return self._jobs.get_nowait()
+            except queue.Empty:
+                pass
+            try:
+                if self.on_idle():
+                    continue
+            except Exception:
+                logger.exception(f"Idle hook failed in {threading.current_thread().name}")
+            try:
+                return self._jobs.get(timeout=self.idle_seconds)
+            except queue.Empty:
+                continue
+
+    def _worker_loop(self):
+        while True:
+            item = self._next_item()
+            if item is None:
+                break
+            future, fn, args, kwargs = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            with self._lock:
+                self._busy += 1
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+            finally:
+                with self._lock:
+                    self._busy -= 1
+        close_browser()
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        """Queue fn(*args, **kwargs) on the next free browser worker."""
+        self.start()
+        future = Future()
+        self._jobs.put((future, fn, args, kwargs))
+        return future
+
+    async def run(self, fn, *args, **kwargs):
+        """Awaitable wrapper around submit() for use inside the event loop."""
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    @property
+    def queue_depth(self) -> int:
+        return self._jobs.qsize()
+
+    @property
+    def busy_workers(self) -> int:
+        return self._busy
+
+    def shutdown(self, wait: bool = True):
+        """Stop all workers; each one closes its own browser on the way out."""
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            self._jobs.put(None)
+        if wait:
+            for t in threads:
+                t.join()
+        logger.info("Browser worker pool shutdown")
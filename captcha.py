@@ -0,0 +1,341 @@
+import base64
+import logging
+import os
+import queue
+import random
+import string
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from io import BytesIO
+from typing import NamedTuple, Optional
+
+import cv2
+import numpy as np
+import pytesseract
+from PIL import Image, ImageOps
+
+from captcha_corpus import get_corpus
+from glyph_ocr import TemplateRecognizer
+from metrics import OCR_SECONDS
+
+try:
+    import tesserocr
+except ImportError:  # optional in-process engine (requirements-tesserocr.txt, OCR_BACKEND=tesserocr)
+    tesserocr = None
+
+logger = logging.getLogger(__name__)
+
+CAPTCHA_PREFIX = "data:image/png;base64,"
+CAPTCHA_CHARSET = string.ascii_uppercase + string.ascii_lowercase + string.digits
+
+
+class OcrConfig(NamedTuple):
+    psm: int
+    whitelist: Optional[str] = None
+
+    @property
+    def args(self) -> str:
+        """Equivalent tesseract command-line config (used by pytesseract)."""
+        args = f"--psm {self.psm}"
+        if self.whitelist:
+            args += f" -c tessedit_char_whitelist={self.whitelist}"
+        return args
+
+
+# OCR configs tried on every captcha attempt
+OCR_CONFIGS = [
+    OcrConfig(psm=8, whitelist=CAPTCHA_CHARSET),
+    OcrConfig(psm=7),
+    OcrConfig(psm=6),
+]
+
+# Recognizer tried first: "template" (glyph bank, Tesseract as fallback) or "tesseract"
+CAPTCHA_RECOGNIZER = os.getenv("CAPTCHA_RECOGNIZER", "template").lower()
+# "pytesseract" forks tesseract per call; "tesserocr" (requirements-tesserocr.txt) keeps loaded engines in memory
+OCR_BACKEND = os.getenv("OCR_BACKEND", "pytesseract").lower()
+# Engines / threads available for running configs side by side
+OCR_POOL_SIZE = max(1, int(os.getenv("OCR_POOL_SIZE", str(len(OCR_CONFIGS)))))
+
+# What the portal's captchas look like (CAPTCHA_LENGTH=0 means unknown)
+CAPTCHA_LENGTH = int(os.getenv("CAPTCHA_LENGTH", "5"))
+# Mean per-character confidence (0-100) at which a right-length guess is taken
+# immediately and the remaining configs are not waited for
+CAPTCHA_CONFIDENCE_THRESHOLD = float(os.getenv("CAPTCHA_CONFIDENCE_THRESHOLD", "85"))
+# The glyph bank scores in cosine similarity * 100, not Tesseract confidence:
+# lowest per-character similarity at which Tesseract is skipped...
+TEMPLATE_CONFIDENCE_THRESHOLD = float(os.getenv("TEMPLATE_CONFIDENCE_THRESHOLD", "92"))
+# ...and how far every character's match must lead the next-best character
+TEMPLATE_MIN_MARGIN = float(os.getenv("TEMPLATE_MIN_MARGIN", "5"))
+
+
+class CaptchaCandidate(NamedTuple):
+    text: str
+    confidence: float  # mean per-character OCR confidence, 0-100
+    score: float       # confidence adjusted for length / charset fit
+    source: str        # "template" or the tesseract config that produced it
+    # Template matches only: lowest per-character similarity and lead over the next-best character
+    min_confidence: Optional[float] = None
+    margin: Optional[float] = None
+
+
+def score_candidate(symbols, source: str) -> Optional[CaptchaCandidate]:
+    """
+    Turn per-character OCR output [(char, conf), ...] into a ranked candidate.
+    Characters outside the captcha charset are dropped and penalised, and so
+    is every character of difference from the known captcha length. Template
+    matches come as (char, conf, margin) and keep their weakest character.
+    """
+    kept = [symbol for symbol in symbols if symbol[0] in CAPTCHA_CHARSET]
+    if not kept:
+        return None
+
+    text = "".join(symbol[0] for symbol in kept)
+    confidence = sum(symbol[1] for symbol in kept) / len(kept)
+
+    score = confidence * (len(kept) / len(symbols))
+    if CAPTCHA_LENGTH:
+        score *= max(0.0, 1 - 0.25 * abs(len(text) - CAPTCHA_LENGTH))
+    if source == "template":
+        return CaptchaCandidate(text, confidence, score, source,
+                                min(symbol[1] for symbol in kept), min(symbol[2] for symbol in kept))
+    return CaptchaCandidate(text, confidence, score, source)
+
+
+def is_confident(candidate: CaptchaCandidate) -> bool:
+    """
+    Good enough to stop running the other configs. A template match must
+    also be unambiguous: every character close to a learned glyph and
+    clearly ahead of the next-best character.
+    """
+    length_ok = not CAPTCHA_LENGTH or len(candidate.text) == CAPTCHA_LENGTH
+    if candidate.source == "template":
+        return (length_ok and candidate.min_confidence >= TEMPLATE_CONFIDENCE_THRESHOLD
+                and candidate.margin >= TEMPLATE_MIN_MARGIN)
+    return length_ok and candidate.confidence >= CAPTCHA_CONFIDENCE_THRESHOLD
+
+
+class PytesseractBackend:
+    """One tesseract subprocess (plus temp files) per call."""
+
+    name = "pytesseract"
+
+    def recognize(self, img: Image.Image, cfg: OcrConfig):
+        """Return [(char, conf), ...]; tesseract's CLI only scores whole words."""
+        data = pytesseract.image_to_data(img, config=cfg.args, output_type=pytesseract.Output.DICT)
+        symbols = []
+        for word, conf in zip(data["text"], data["conf"]):
+            word, conf = word.strip(), float(conf)
+            if word and conf >= 0:
+                symbols.extend((ch, conf) for ch in word)
+        return symbols
+
+
+class TesserocrBackend:
+    """
+    Pool of loaded tesserocr engines. Each engine is initialised once (model
+    load is the expensive part) and reused; tesserocr releases the GIL while
+    recognising, so pooled engines run configs truly in parallel.
+    """
+
+    name = "tesserocr"
+
+    def __init__(self, size: int = OCR_POOL_SIZE):
+        if tesserocr is None:
+            raise RuntimeError("tesserocr is not installed")
+        self._engines = queue.Queue()
+        for _ in range(size):
+            self._engines.put(tesserocr.PyTessBaseAPI(lang="eng"))
+        logger.info(f"🧠 Loaded {size} in-process Tesseract engine(s)")
+
+    @contextmanager
+    def _engine(self):
+        api = self._engines.get()
+        try:
+            yield api
+        finally:
+            self._engines.put(api)
+
+    def recognize(self, img: Image.Image, cfg: OcrConfig):
+        """Return [(char, conf), ...] with per-symbol confidences."""
+        with self._engine() as api:
+            api.SetPageSegMode(cfg.psm)
+            api.SetVariable("tessedit_char_whitelist", cfg.whitelist or "")
+            api.SetImage(img)
+            api.Recognize()
+            level = tesserocr.RIL.SYMBOL
+            symbols = []
+            for r in tesserocr.iterate_level(api.GetIterator(), level):
+                ch = (r.GetUTF8Text(level) or "").strip()
+                if ch:
+                    symbols.append((ch, r.Confidence(level)))
+            return symbols
+
+
+_backends = {}
+_backends_lock = threading.Lock()
+_template_recognizer = None
+_ocr_threads = ThreadPoolExecutor(max_workers=OCR_POOL_SIZE, thread_name_prefix="ocr")
+
+
+def get_ocr_backend(name: str = OCR_BACKEND):
+    """Return the (lazily created, process-wide) OCR backend by name."""
+    with _backends_lock:
+        if name not in _backends:
+            if name == "tesserocr":
+                _backends[name] = TesserocrBackend()
+            elif name == "pytesseract":
+                _backends[name] = PytesseractBackend()
+            else:
+                raise ValueError(f"Unknown OCR backend: {name}")
+        return _backends[name]
+
+
+def get_template_recognizer() -> TemplateRecognizer:
+    """Return the process-wide glyph-bank recognizer."""
+    global _template_recognizer
+    with _backends_lock:
+        if _template_recognizer is None:
+            _template_recognizer = TemplateRecognizer()
+        return _template_recognizer
+
+
+@contextmanager
+def _ocr_timer(config: str, timings: Optional[list]):
+    """Observe OCR_SECONDS here, or append (config, seconds) to `timings` for another process to observe."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        if timings is None:
+            OCR_SECONDS.labels(config=config).observe(seconds)
+        else:
+            timings.append((config, seconds))
+
+
+def observe_ocr_timings(timings):
+    for config, seconds in timings:
+        OCR_SECONDS.labels(config=config).observe(seconds)
+
+
+def _recognize(backend, img, cfg: OcrConfig, timings: Optional[list] = None):
+    with _ocr_timer(f"psm{cfg.psm}", timings):
+        return backend.recognize(img, cfg)
+
+
+def decode_captcha_src(captcha_src: Optional[str]) -> Optional[bytes]:
+    """Return the PNG bytes of a base64 captcha <img> src, or None."""
+    if not captcha_src or not captcha_src.startswith(CAPTCHA_PREFIX):
+        return None
+    return base64.b64decode(captcha_src.split(",")[1])
+
+
+def binarize_captcha(
+    captcha_bytes: bytes, autocontrast: bool = True, threshold: Optional[int] = None, open_kernel: int = 2
+) -> np.ndarray:
+    """
+    Grayscale + autocontrast + Otsu threshold + morphological opening.
+    The keyword arguments only exist so bench_captcha.py can try variants:
+    a fixed threshold instead of Otsu, another (or no, 0) opening kernel.
+    """
+    captcha_img = Image.open(BytesIO(captcha_bytes)).convert("L")
+    if autocontrast:
+        captcha_img = ImageOps.autocontrast(captcha_img)
+
+    img_cv = np.array(captcha_img)
+    if threshold is None:
+        _, img_cv = cv2.threshold(img_cv, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    else:
+        _, img_cv = cv2.threshold(img_cv, threshold, 255, cv2.THRESH_BINARY)
+    if not open_kernel:
+        return img_cv
+    kernel = np.ones((open_kernel, open_kernel), np.uint8)
+    return cv2.morphologyEx(img_cv, cv2.MORPH_OPEN, kernel)
+
+
+def preprocess_captcha(captcha_bytes: bytes) -> Image.Image:
+    """binarize_captcha as a PIL image, ready for Tesseract."""
+    return Image.fromarray(binarize_captcha(captcha_bytes))
+
+
+def read_captcha(captcha_bytes: bytes, backend=None, parallel: bool = True, recognizer: str = None,
+                 timings: Optional[list] = None):
+    """
+    Run OCR over a captcha image. Returns (picked_text, candidates), candidates
+    ranked best first. With CAPTCHA_RECOGNIZER=template the glyph bank is tried
+    first and Tesseract only runs when it is not confident; an unconfident
+    template guess then ranks after every Tesseract guess, since its score is
+    a similarity, not a confidence, and the two don't compare.
+
+    Tesseract configs run at the same time on the OCR thread pool (one after
+    another if parallel=False); as soon as one yields a confident guess of the
+    right length the rest are cancelled / no longer waited for.
+    CPU-bound: callers inside the event loop should run it in a thread.
+
+    Per-config times go to OCR_SECONDS, or into `timings` if a list is given
+    (OCR processes hand them back to the process whose metrics are scraped).
+    """
+    binary = binarize_captcha(captcha_bytes)
+
+    template_guess = None
+    if (recognizer or CAPTCHA_RECOGNIZER) == "template":
+        with _ocr_timer("template", timings):
+            symbols = get_template_recognizer().recognize(binary)
+        template_guess = score_candidate(symbols, "template")
+        if template_guess and is_confident(template_guess):
+            return template_guess.text, [template_guess]
+
+    candidates = []
+    backend = backend or get_ocr_backend()
+    processed_img = Image.fromarray(binary)
+
+    if parallel:
+        futures = {_ocr_threads.submit(_recognize, backend, processed_img, cfg, timings): cfg for cfg in OCR_CONFIGS}
+        for future in as_completed(futures):
+            candidate = score_candidate(future.result(), futures[future].args)
+            if candidate:
+                candidates.append(candidate)
+                if is_confident(candidate):
+                    for other in futures:
+                        other.cancel()
+                    break
+    else:
+        for cfg in OCR_CONFIGS:
+            candidate = score_candidate(_recognize(backend, processed_img, cfg, timings), cfg.args)
+            if candidate:
+                candidates.append(candidate)
+                if is_confident(candidate):
+                    break
+
+    candidates.sort(key=lambda c: c.score, reverse=True)
+    if template_guess:
+        candidates.append(template_guess)
+    captcha_text = candidates[0].text if candidates else ""
+    return captcha_text, candidates
+
+
+def record_captcha_result(captcha_bytes: bytes, answer: str, accepted: bool, candidates=()):
+    """
+    Feed the portal's verdict back: every attempt goes to the captcha corpus
+    (if CAPTCHA_CORPUS_DIR is set), accepted captchas grow the glyph bank.
+    """
+    corpus = get_corpus()
+    if corpus is not None:
+        try:
+            corpus.record(captcha_bytes, candidates, answer, accepted)
+        except Exception:
+            logger.exception("Failed to record captcha to corpus")
+    if not accepted or not answer:
+        return
+    try:
+        if get_template_recognizer().learn(binarize_captcha(captcha_bytes), answer):
+            logger.info(f"🔤 Learned glyphs from accepted captcha '{answer}'")
+    except Exception:
+        logger.exception("Failed to update glyph bank")
+
+
+def fallback_captcha() -> str:
+    """Random guess used once every OCR attempt has failed."""
+    return "".join(random.choices(CAPTCHA_CHARSET, k=CAPTCHA_LENGTH or 5))
@@ -0,0 +1,79 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Opt-in: directory collecting every captcha seen (unset = don't record)
+CAPTCHA_CORPUS_DIR = os.getenv("CAPTCHA_CORPUS_DIR", "")
+
+INDEX_FILE = "index.jsonl"
+
+
+class CaptchaCorpus:
+    """
+    Captcha dataset on disk: one PNG per distinct image (named by content
+    hash) plus an append-only index.jsonl with one line per attempt:
+    {"file", "ts", "guesses": [[text, score, source], ...], "answer", "accepted"}.
+    An entry may also carry a hand-written "label" with the true text.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def record(self, captcha_bytes: bytes, candidates, answer: str, accepted: bool):
+        name = hashlib.sha1(captcha_bytes).hexdigest()[:20] + ".png"
+        path = self.directory / name
+        entry = {
+            "file": name,
+            "ts": round(time.time(), 3),
+            "guesses": [[c.text, round(c.score, 1), c.source] for c in candidates],
+            "answer": answer,
+            "accepted": accepted,
+        }
+        with self._lock:
+            if not path.exists():
+                path.write_bytes(captcha_bytes)
+            with open(self.directory / INDEX_FILE, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+
+    def entries(self):
+        """Yield index entries (newest attempt per image last) with their PNG bytes."""
+        index = self.directory / INDEX_FILE
+        if not index.exists():
+            return
+        with open(index, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                png = self.directory / entry["file"]
+                if png.exists():
+                    entry["png"] = png.read_bytes()
+                    yield entry
+
+
+def truth(entry: dict) -> Optional[str]:
+    """Known text of a recorded captcha: a manual label or an accepted answer."""
+    if entry.get("label"):
+        return entry["label"]
+    return entry["answer"] if entry.get("accepted") else None
+
+
+_corpus = None
+
+
+def get_corpus() -> Optional[CaptchaCorpus]:
+    """Process-wide recorder, or None when CAPTCHA_CORPUS_DIR is not set."""
+    global _corpus
+    if _corpus is None and CAPTCHA_CORPUS_DIR:
+        _corpus = CaptchaCorpus(CAPTCHA_CORPUS_DIR)
+        logger.info(f"🗂️ Recording captchas to {CAPTCHA_CORPUS_DIR}")
+    return _corpus
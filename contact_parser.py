@@ -0,0 +1,224 @@
+"""
+Contact extraction from department pages with a pluggable HTML parser.
+
+The contact blocks (address / anything with "contact" in its id or class)
+are searched first; the whole page's text is only built when the
+blocks leave the phone or the email unmatched. Footers are not contact
+blocks: a site-wide "Email: webmaster@..." must not beat the department's
+own. Pages without either label are not parsed at all.
+"""
+import os
+import re
+from html.parser import HTMLParser
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as SelectolaxTree
+except ImportError:  # optional, C (lexbor) parser
+    SelectolaxTree = None
+
+try:
+    import lxml.html
+except ImportError:  # optional, C (libxml2) parser
+    lxml = None
+
+try:
+    from bs4 import BeautifulSoup
+except ImportError:  # optional, the original full-tree parser (benchmark baseline)
+    BeautifulSoup = None
+
+# "selectolax" or "lxml" (C parsers), "html.parser" (stdlib streaming) or "bs4"
+HTML_PARSER = os.getenv(
+    "HTML_PARSER", "selectolax" if SelectolaxTree else "lxml" if lxml else "html.parser"
+).lower()
+
+LABEL_RE = re.compile(r"Phone|Email", re.I)
+PHONE_RE = re.compile(r"Phone(?: No)?:\s*([\d,\s-]+)", re.I)
+EMAIL_RE = re.compile(r"Email:\s*([\w\.-]+(?:\[at\]|\@)[\w\.-]+)", re.I)
+SPACES_RE = re.compile(r"[\s\n]+")
+COMMAS_RE = re.compile(r",+")
+
+CONTACT_TAGS = frozenset(("address",))
+CONTACT_CSS = "address, [id*='contact' i], [class*='contact' i]"
+CONTACT_XPATH = (
+    "//address"
+    " | //*[contains(translate(@id, 'CONTACT', 'contact'), 'contact')]"
+    " | //*[contains(translate(@class, 'CONTACT', 'contact'), 'contact')]"
+)
+SKIPPED_TAGS = frozenset(("script", "style", "noscript", "template"))
+VOID_TAGS = frozenset(("area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"))
+
+
+class SelectolaxParser:
+    name = "selectolax"
+
+    def __init__(self):
+        if SelectolaxTree is None:
+            raise RuntimeError("selectolax is not installed")
+
+    def contact_texts(self, html: str):
+        """Contact-block text, then (if still needed) the whole page's."""
+        tree = SelectolaxTree(html)
+        for node in tree.css("script, style, noscript, template"):
+            node.decompose()
+        yield " ".join(node.text(separator=" ") for node in tree.css(CONTACT_CSS))
+        yield (tree.body or tree.root).text(separator=" ")
+
+    def links(self, html: str):
+        """[(link text, href)] for relative links; text stripped and joined like bs4's get_text(strip=True)."""
+        tree = SelectolaxTree(html)
+        return [(a.text(strip=True), a.attributes["href"]) for a in tree.css("a[href^='/']")]
+
+
+class LxmlParser:
+    name = "lxml"
+
+    def __init__(self):
+        if lxml is None:
+            raise RuntimeError("lxml is not installed")
+
+    def contact_texts(self, html: str):
+        doc = lxml.html.document_fromstring(html)
+        for el in doc.xpath("//script | //style | //noscript | //template"):
+            el.drop_tree()
+        yield " ".join(" ".join(el.itertext()) for el in doc.xpath(CONTACT_XPATH))
+        yield " ".join(doc.itertext())
+
+    def links(self, html: str):
+        doc = lxml.html.document_fromstring(html)
+        return [
+            ("".join(t.strip() for t in a.itertext()), a.get("href"))
+            for a in doc.xpath("//a[starts-with(@href, '/')]")
+        ]
+
+
+class _ContactScanner(HTMLParser):
+    """One streaming pass: page text, contact-block text and relative links, no tree."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.stack = []  # (tag, is_contact_block, is_skipped)
+        self.in_block = self.in_skipped = 0
+        self.text, self.block_text, self.links = [], [], []
+        self._link = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "a":
+            href = dict(attrs).get("href") or ""
+            self._link = [href, []] if href.startswith("/") else None
+        if tag in VOID_TAGS:
+            return
+        attrs = dict(attrs)
+        block = tag in CONTACT_TAGS or "contact" in f"{attrs.get('id') or ''} {attrs.get('class') or ''}".lower()
+        skipped = tag in SKIPPED_TAGS
+        self.stack.append((tag, block, skipped))
+        self.in_block += block
+        self.in_skipped += skipped
+
+    def handle_endtag(self, tag):
+        if tag == "a" and self._link:
+            self.links.append(("".join(t.strip() for t in self._link[1]), self._link[0]))
+            self._link = None
+        if not any(open_tag == tag for open_tag, _, _ in self.stack):
+            return
+        while self.stack:  # also closes tags left open inside this one
+            open_tag, block, skipped = self.stack.pop()
+            self.in_block -= block
+            self.in_skipped -= skipped
+            if open_tag == tag:
+                break
+
+    def handle_data(self, data):
+        if self.in_skipped:
+            return
+        self.text.append(data)
+        if self.in_block:
+            self.block_text.append(data)
+        if self._link:
+            self._link[1].append(data)
+
+
+class StdlibParser:
+    name = "html.parser"
+
+    @staticmethod
+    def _scan(html: str) -> _ContactScanner:
+        scanner = _ContactScanner()
+        scanner.feed(html)
+        scanner.close()
+        return scanner
+
+    def contact_texts(self, html: str):
+        scanner = self._scan(html)
+        yield " ".join(scanner.block_text)
+        yield " ".join(scanner.text)
+
+    def links(self, html: str):
+        return self._scan(html).links
+
+
+class SoupParser:
+    """The original approach: full BeautifulSoup tree, whole-page get_text."""
+
+    name = "bs4"
+
+    def __init__(self):
+        if BeautifulSoup is None:
+            raise RuntimeError("beautifulsoup4 is not installed")
+
+    def contact_texts(self, html: str):
+        yield BeautifulSoup(html, "html.parser").get_text(separator=" ")
+
+    def links(self, html: str):
+        soup = BeautifulSoup(html, "html.parser")
+        return [(a.get_text(strip=True), a["href"]) for a in soup.select("a[href^='/']")]
+
+
+PARSERS = {p.name: p for p in (SelectolaxParser, LxmlParser, StdlibParser, SoupParser)}
+_parsers = {}
+
+
+def get_parser(name: str = HTML_PARSER):
+    """Return the (process-wide) parser backend by name."""
+    if name not in _parsers:
+        if name not in PARSERS:
+            raise ValueError(f"Unknown HTML parser: {name}")
+        _parsers[name] = PARSERS[name]()
+    return _parsers[name]
+
+
+def available_parsers():
+    names = []
+    for name in PARSERS:
+        try:
+            get_parser(name)
+        except RuntimeError:
+            continue
+        names.append(name)
+    return names
+
+
+def extract_contact(html: str, parser=None) -> dict:
+    """Contact info (phone, email) from a department page."""
+    phone = email = None
+    if not LABEL_RE.search(html):
+        return {"phone": phone, "email": email}
+
+    # Each pattern falls through to the whole page unless a contact block matched it
+    phone_match = email_match = None
+    for text in (parser or get_parser()).contact_texts(html):
+        phone_match = phone_match or PHONE_RE.search(text)
+        email_match = email_match or EMAIL_RE.search(text)
+        if phone_match and email_match:
+            break
+
+    if phone_match:
+        # Clean: remove newlines/spaces, collapse multiple commas
+        raw_phone = SPACES_RE.sub("", phone_match.group(1))
+        raw_phone = COMMAS_RE.sub(",", raw_phone).strip(",")
+        # Normalize into list
+        phone = [p for p in raw_phone.split(",") if p]
+
+    if email_match:
+        email = email_match.group(1).replace("[at]", "@").replace(" ", "")
+
+    return {"phone": phone, "email": email}
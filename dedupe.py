@@ -0,0 +1,70 @@
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+# How long a submission is remembered for duplicate suppression
+DEDUPE_TTL_SECONDS = float(os.getenv("DEDUPE_TTL_SECONDS", "900"))
+# Oldest entries are evicted beyond this many keys
+DEDUPE_MAX_ENTRIES = int(os.getenv("DEDUPE_MAX_ENTRIES", "10000"))
+
+_SPACE_RE = re.compile(r"\s+")
+
+
+def fingerprint(issue_text: str, ulb: str, user_mobile: str, grievance_type: Optional[str]) -> str:
+    """Stable hash of the fields that make two submissions the same grievance."""
+    digits = re.sub(r"\D", "", user_mobile or "")[-10:]
+    parts = (
+        _SPACE_RE.sub(" ", issue_text or "").strip().lower(),
+        (ulb or "").strip().lower(),
+        digits,
+        (grievance_type or "").strip().lower(),
+    )
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+class TTLCache:
+    """
+    Small thread-safe map whose entries expire ttl seconds after they were
+    put. Kept in put order, which with one ttl is also expiry order, so put
+    sweeps expired entries (and the oldest, over max_entries) from the front.
+    """
+
+    def __init__(self, ttl: float = DEDUPE_TTL_SECONDS, max_entries: int = DEDUPE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: str):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= now:
+                del self._entries[key]
+                return None
+            return entry[1]
+
+    def put(self, key: str, value):
+        now = time.monotonic()
+        with self._lock:
+            self._entries[key] = (now + self.ttl, value)
+            self._entries.move_to_end(key)
+            # Drop expired entries from the old end, then enforce the size cap
+            while self._entries:
+                oldest_key, (expires_at, _) = next(iter(self._entries.items()))
+                if expires_at > now and len(self._entries) <= self.max_entries:
+                    break
+                del self._entries[oldest_key]
+
+    def discard(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
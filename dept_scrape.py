@@ -1,63 +1,213 @@
-import requests
-from bs4 import BeautifulSoup
-import re
+"""
+Department directory crawler: the directory page, then every department page
+concurrently over one keep-alive client. Each page's ETag / Last-Modified is
+kept with its parsed result, so an unchanged page costs a 304 and no parsing.
+
+    python dept_scrape.py            # refresh departments.json
+"""
+import asyncio
+import hashlib
 import json
+import logging
+import os
+import time
+from urllib.parse import urlsplit
+
+import httpx
+
+from contact_parser import extract_contact, get_parser
+from directory import write_json_atomic
+
+logger = logging.getLogger(__name__)
 
 BASE_URL = "https://www.jharkhand.gov.in"
 DIR_URL = f"{BASE_URL}/Home/Department"
 
-def fetch_department_links():
-    """Scrape the Department Directory page to get names and URLs."""
-    resp = requests.get(DIR_URL, timeout=15)
-    resp.raise_for_status()
-    soup = BeautifulSoup(resp.text, "html.parser")
-    links = soup.select("a[href^='/']")  # matches relative paths
+# Department pages fetched at once
+SCRAPE_CONCURRENCY = max(1, int(os.getenv("SCRAPE_CONCURRENCY", "8")))
+# Requests per second to any one host
+SCRAPE_RATE_PER_HOST = float(os.getenv("SCRAPE_RATE_PER_HOST", "4"))
+SCRAPE_TIMEOUT_SECONDS = float(os.getenv("SCRAPE_TIMEOUT_SECONDS", "15"))
+# Validators + parsed result per URL, reused across runs
+SCRAPE_CACHE_PATH = os.getenv("SCRAPE_CACHE_PATH", "scrape_cache.json")
+DEPARTMENTS_OUT = os.getenv("DEPARTMENTS_PATH", "departments.json")
+# Also keep every fetched page here (input for bench_parse.py); empty = don't
+SCRAPE_SAVE_DIR = os.getenv("SCRAPE_SAVE_DIR", "")
+
+RETRY_STATUSES = (429, 502, 503, 504)
+# Bump when what parse_department_links / parse_contact extract changes:
+# cached results from an older version are re-fetched and re-parsed
+PARSE_VERSION = 1
+
+class HostRateLimiter:
+    """Spaces requests to the same host at least 1/rate seconds apart."""
+
+    def __init__(self, rate: float = SCRAPE_RATE_PER_HOST):
+        self.interval = 1 / rate if rate > 0 else 0
+        self._next = {}
+        self._locks = {}
+
+    async def wait(self, url: str):
+        if not self.interval:
+            return
+        host = urlsplit(url).netloc
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            now = time.monotonic()
+            slot = max(now, self._next.get(host, now))
+            self._next[host] = slot + self.interval
+        await asyncio.sleep(slot - now)
+
+
+class ConditionalFetcher:
+    """
+    GETs with If-None-Match / If-Modified-Since from a persistent cache.
+    fetch(url, parse) returns parse(html) for a changed page, or the result
+    stored with the validators on a 304. A result stored by another parse
+    function, HTML parser backend or PARSE_VERSION is not reused: the page is
+    fetched unconditionally and parsed again.
+    """
+
+    def __init__(self, client: httpx.AsyncClient, cache_path: str = SCRAPE_CACHE_PATH,
+                 limiter: HostRateLimiter = None):
+        self.client = client
+        self.cache_path = cache_path
+        self.limiter = limiter or HostRateLimiter()
+        self.stats = {"fetched": 0, "not_modified": 0, "failed": 0, "bytes": 0}
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                self.cache = json.load(f)
+        except (OSError, ValueError):
+            self.cache = {}
+
+    async def _get(self, url: str, headers: dict) -> httpx.Response:
+        for attempt in range(3):
+            await self.limiter.wait(url)
+            response = await self.client.get(url, headers=headers)
+            if response.status_code not in RETRY_STATUSES or attempt == 2:
+                return response
+            retry_after = response.headers.get("retry-after", "")
+            await asyncio.sleep(float(retry_after) if retry_after.isdigit() else 2 ** attempt)
+
+    @staticmethod
+    def parser_tag(parse) -> str:
+        """What produced a cached result: parse function, HTML parser backend, PARSE_VERSION."""
+        return f"{parse.__module__}.{parse.__qualname__}/{get_parser().name}/v{PARSE_VERSION}"
+
+    async def fetch(self, url: str, parse):
+        tag = self.parser_tag(parse)
+        entry = self.cache.get(url)
+        if entry and entry.get("parser") != tag:
+            entry = None  # parsed by other logic: a 304 would hand back a stale result
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = await self._get(url, headers)
+        self.stats["bytes"] += len(response.content)
+        if response.status_code == 304 and entry:
+            self.stats["not_modified"] += 1
+            return entry["result"]
+        response.raise_for_status()
+        self.stats["fetched"] += 1
+        if SCRAPE_SAVE_DIR:
+            os.makedirs(SCRAPE_SAVE_DIR, exist_ok=True)
+            name = hashlib.sha1(url.encode("utf-8")).hexdigest()[:16] + ".html"
+            with open(os.path.join(SCRAPE_SAVE_DIR, name), "w", encoding="utf-8") as f:
+                f.write(response.text)
+        # Off the event loop: the crawl also runs inside the API (directory_refresh)
+        result = await asyncio.to_thread(parse, response.text)
+        if response.headers.get("etag") or response.headers.get("last-modified"):
+            self.cache[url] = {
+                "etag": response.headers.get("etag"),
+                "last_modified": response.headers.get("last-modified"),
+                "parser": tag,
+                "result": result,
+            }
+        else:
+            self.cache.pop(url, None)
+        return result
+
+    def save(self, urls=None):
+        """Persist the cache, keeping only `urls` (the pages still linked) if given."""
+        if urls is not None:
+            self.cache = {url: entry for url, entry in self.cache.items() if url in urls}
+        write_json_atomic(self.cache_path, self.cache)
+
+
+def parse_department_links(html):
+    """Department names -> absolute URLs from the Department Directory page."""
     departments = {}
-    for a in links:
-        name = a.get_text(strip=True)
-        url = a["href"]
+    for name, url in get_parser().links(html):  # matches relative paths
         if "Department of" in name:
             departments[name] = BASE_URL + url
     return departments
 
-def scrape_contact(url):
+
+def parse_contact(html):
+    """Contact info (phone, email) from a department page."""
+    return extract_contact(html)
+
+
+async def fetch_department_links(fetcher: ConditionalFetcher):
+    """Scrape the Department Directory page to get names and URLs."""
+    return await fetcher.fetch(DIR_URL, parse_department_links)
+
+
+async def scrape_contact(fetcher: ConditionalFetcher, url):
     """Scrape contact info (phone, email) from department page."""
-    resp = requests.get(url, timeout=15)
-    resp.raise_for_status()
-    soup = BeautifulSoup(resp.text, "html.parser")
-    phone = email = None
+    return await fetcher.fetch(url, parse_contact)
 
-    text = soup.get_text(separator=" ").strip()
-    phone_match = re.search(r"Phone(?: No)?:\s*([\d,\s-]+)", text, re.I)
-    email_match = re.search(r"Email:\s*([\w\.-]+(?:\[at\]|\@)[\w\.-]+)", text, re.I)
 
-    if phone_match:
-        raw_phone = phone_match.group(1)
-        # Clean: remove newlines/spaces, collapse multiple commas
-        raw_phone = re.sub(r"[\s\n]+", "", raw_phone)
-        raw_phone = re.sub(r",+", ",", raw_phone).strip(",")
-        # Normalize into list
-        phone = [p for p in raw_phone.split(",") if p]
+async def crawl_departments(cache_path: str = SCRAPE_CACHE_PATH, concurrency: int = SCRAPE_CONCURRENCY,
+                            transport: httpx.AsyncBaseTransport = None):
+    """
+    Department name -> {"phone", "email"} for every department with contact
+    details, plus the fetch stats. Pages that fail keep their cached result.
+    Nothing is written except the HTTP cache.
+    """
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(timeout=SCRAPE_TIMEOUT_SECONDS, limits=limits, transport=transport,
+                                 follow_redirects=True) as client:
+        fetcher = ConditionalFetcher(client, cache_path)
+        dept_links = await fetch_department_links(fetcher)
+        slots = asyncio.Semaphore(concurrency)
 
-    if email_match:
-        email = email_match.group(1).replace("[at]", "@").replace(" ", "")
+        async def one(name, url):
+            async with slots:
+                try:
+                    return name, await scrape_contact(fetcher, url)
+                except Exception as e:
+                    # Any one page (network, HTTP status or a parser crash) must not sink the crawl
+                    fetcher.stats["failed"] += 1
+                    if isinstance(e, (httpx.HTTPError, ValueError)):
+                        logger.warning(f"⚠️ Failed scraping {name}: {e}")
+                    else:
+                        logger.exception(f"❌ Unexpected error scraping {name}")
+                    # Last good result for the page, so one flaky page doesn't drop a department
+                    return name, fetcher.cache.get(url, {}).get("result")
 
-    return {"phone": phone, "email": email}
+        results = await asyncio.gather(*(one(name, url) for name, url in dept_links.items()))
+        fetcher.save(urls={DIR_URL, *dept_links.values()})
 
-if __name__ == "__main__":
-    dept_links = fetch_department_links()
-    department_contacts = {}
+    department_contacts = {
+        name: info for name, info in results
+        if info and (info["phone"] or info["email"])
+    }
+    return department_contacts, fetcher.stats
 
-    for name, url in dept_links.items():
-        try:
-            info = scrape_contact(url)
-            if info["phone"] or info["email"]:
-                department_contacts[name] = info
-        except Exception as e:
-            print(f"⚠️ Failed scraping {name}: {e}")
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    start = time.perf_counter()
+    department_contacts, stats = asyncio.run(crawl_departments())
 
     # ✅ Save to file
-    with open("departments.json", "w", encoding="utf-8") as f:
-        json.dump(department_contacts, f, indent=4, ensure_ascii=False)
+    write_json_atomic(DEPARTMENTS_OUT, department_contacts)
 
-    print("✅ Department contact info saved to departments.json")
+    print(f"✅ Department contact info saved to {DEPARTMENTS_OUT} "
+          f"({len(department_contacts)} departments, {stats['fetched']} fetched, "
+          f"{stats['not_modified']} unchanged, {stats['failed']} failed, "
+          f"{stats['bytes'] / 1024:.0f} KB in {time.perf_counter() - start:.1f} s)")
@@ -0,0 +1,188 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Optional
+
+from fuzzy_index import TrigramIndex
+
+logger = logging.getLogger(__name__)
+
+DEPARTMENTS_PATH = os.getenv("DEPARTMENTS_PATH", "departments.json")
+ULB_INFO_PATH = os.getenv("ULB_INFO_PATH", "ulb_info.json")
+# How often (seconds) the request path may stat the files for changes
+DIRECTORY_CHECK_SECONDS = float(os.getenv("DIRECTORY_CHECK_SECONDS", "5"))
+# Minimum trigram similarity (0..1) of the distinctive words for a fuzzy name match to be used
+FUZZY_MIN_SCORE = float(os.getenv("FUZZY_MIN_SCORE", "0.6"))
+# ... and how far it must lead the next best name (otherwise the input is ambiguous)
+FUZZY_MIN_MARGIN = float(os.getenv("FUZZY_MIN_MARGIN", "0.1"))
+
+# Other names people use for a ULB -> ULB_OPTIONS label
+ULB_ALIASES = {
+    "Ranchi Nagar Nigam": "Ranchi Municipal Corporation",
+    "Dhanbad Nagar Nigam": "Dhanbad Municipal Corporation",
+    "Deoghar Nagar Nigam": "Deoghar Municipal Corporation",
+    "Daltonganj": "Medininagar Municipal Corporation",
+    "Jamshedpur Notified Area Committee": "Jamshedpur NAC",
+    "Mango Nagar Nigam": "Mango Municipal Corporation",
+    "UDHD": "Urban Development & Housing Dept.",
+    "Urban Development and Housing Department": "Urban Development & Housing Dept.",
+}
+
+
+def write_json_atomic(path: str, data, indent: int = 4):
+    """Write via a temp file + rename, so readers never see half a file."""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=indent, ensure_ascii=False)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+class DirectorySnapshot:
+    """
+    Immutable view of the contact data with every lookup map precomputed.
+    Replaced as a whole on reload, never mutated in place.
+    """
+
+    def __init__(self, departments: dict, ulbs: list, department_names: dict, ulb_options: dict):
+        self.departments = departments
+        self.ulbs = ulbs
+
+        # code -> display name, lowercased display name -> display name
+        self.dept_names = dict(department_names)
+        self.dept_names_lower = {v.lower(): v for v in department_names.values()}
+        self.ulb_names = dict(ulb_options)
+        self.ulb_names_lower = {v.lower(): v for v in ulb_options.values()}
+
+        # lowercased display name -> contact record
+        self.dept_contacts = {name.lower(): info for name, info in departments.items()}
+        self.ulb_contacts = {}
+        for u in ulbs:
+            self.ulb_contacts.setdefault(u["ulb_name"].lower(), u)
+
+        # Fuzzy fallbacks: free text -> display name, display name -> contact key
+        self.dept_name_index = TrigramIndex(
+            [(code, name) for code, name in department_names.items()]
+            + [(name, name) for name in department_names.values()]
+            + [(name.replace("Department of ", ""), name) for name in department_names.values()]
+        )
+        self.ulb_name_index = TrigramIndex(
+            [(code, name) for code, name in ulb_options.items()]
+            + [(name, name) for name in ulb_options.values()]
+            + list(ULB_ALIASES.items())
+        )
+        self.dept_contact_index = TrigramIndex((name, name) for name in departments)
+        self.ulb_contact_index = TrigramIndex((u["ulb_name"], u["ulb_name"]) for u in ulbs)
+
+
+class ContactDirectory:
+    """
+    Department + ULB contacts loaded once and served from memory. The JSON
+    files are re-read only when their mtime changes (checked at most every
+    DIRECTORY_CHECK_SECONDS) and the new snapshot is swapped in atomically.
+    """
+
+    def __init__(
+        self,
+        department_names: dict,
+        ulb_options: dict,
+        departments_path: str = DEPARTMENTS_PATH,
+        ulbs_path: str = ULB_INFO_PATH,
+    ):
+        self.department_names = department_names
+        self.ulb_options = ulb_options
+        self.departments_path = departments_path
+        self.ulbs_path = ulbs_path
+        self._reload_lock = threading.Lock()
+        self._mtimes = None
+        self._next_check = 0.0
+        self._snapshot = None
+        self.reload()
+
+    def _stat(self):
+        return (os.stat(self.departments_path).st_mtime_ns, os.stat(self.ulbs_path).st_mtime_ns)
+
+    def reload(self):
+        """Read both files and swap in a new snapshot (keeps the old one on error)."""
+        with self._reload_lock:
+            try:
+                mtimes = self._stat()
+                with open(self.departments_path, "r", encoding="utf-8") as f:
+                    departments = json.load(f)
+                with open(self.ulbs_path, "r", encoding="utf-8") as f:
+                    ulbs = json.load(f)
+                snapshot = DirectorySnapshot(departments, ulbs, self.department_names, self.ulb_options)
+            except Exception:
+                if self._snapshot is None:
+                    raise
+                logger.exception("❌ Failed to reload contact directory, keeping previous data")
+                return
+            self._snapshot, self._mtimes = snapshot, mtimes
+        logger.info(f"📒 Contact directory loaded: {len(departments)} departments, {len(ulbs)} ULBs")
+
+    def publish(self, departments: dict, ulbs: list):
+        """
+        Serve new contact data now: index it, write both files atomically and
+        swap the snapshot. Raises (and changes nothing) if the data can't be indexed.
+        """
+        snapshot = DirectorySnapshot(departments, ulbs, self.department_names, self.ulb_options)
+        with self._reload_lock:
+            write_json_atomic(self.departments_path, departments)
+            write_json_atomic(self.ulbs_path, ulbs, indent=2)
+            self._snapshot, self._mtimes = snapshot, self._stat()
+        logger.info(f"📒 Contact directory published: {len(departments)} departments, {len(ulbs)} ULBs")
+
+    @property
+    def snapshot(self) -> DirectorySnapshot:
+        now = time.monotonic()
+        if now >= self._next_check:
+            self._next_check = now + DIRECTORY_CHECK_SECONDS
+            try:
+                if self._stat() != self._mtimes:
+                    self.reload()
+            except OSError:
+                logger.exception("❌ Could not stat contact directory files")
+        return self._snapshot
+
+    @staticmethod
+    def _fuzzy(index: TrigramIndex, query: str, kind: str) -> Optional[str]:
+        match, score = index.best(query, FUZZY_MIN_SCORE, min_margin=FUZZY_MIN_MARGIN)
+        if match:
+            logger.info(f"🔎 Fuzzy-matched {kind} '{query}' -> '{match}' ({score:.2f})")
+        return match
+
+    def _resolve(self, value, names, names_lower, name_index, contacts, contact_index, kind):
+        value = value.strip()
+        display = names.get(value) or names_lower.get(value.lower())
+        if display is None:
+            display = self._fuzzy(name_index, value, kind) or value
+        contact = contacts.get(display.lower())
+        if contact is None:
+            match = self._fuzzy(contact_index, display, f"{kind} contact")
+            contact = contacts.get(match.lower()) if match else None
+        return display, contact
+
+    def resolve_department(self, department: str):
+        """Code or display name (any case, misspelt) -> (display name, contact or None)."""
+        snap = self.snapshot
+        return self._resolve(
+            department, snap.dept_names, snap.dept_names_lower, snap.dept_name_index,
+            snap.dept_contacts, snap.dept_contact_index, "department",
+        )
+
+    def resolve_ulb(self, ulb: str):
+        """Code or display name (any case, misspelt) -> (display name, contact or None)."""
+        snap = self.snapshot
+        return self._resolve(
+            ulb, snap.ulb_names, snap.ulb_names_lower, snap.ulb_name_index,
+            snap.ulb_contacts, snap.ulb_contact_index, "ULB",
+        )
+
+    def department_contact(self, name: str) -> Optional[dict]:
+        return self.snapshot.dept_contacts.get(name.strip().lower())
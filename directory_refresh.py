@@ -0,0 +1,155 @@
+"""
+Scheduled refresh of the contact directory inside the API process.
+
+Every DIRECTORY_REFRESH_SECONDS the department pages are crawled
+(dept_scrape) and the UDHD ULB table is scraped (ulb_scrape, in a thread),
+off the request path. The result is validated against the data being served
+and published only if it passes; otherwise the current directory is kept.
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Optional
+
+from dept_scrape import crawl_departments
+from directory import ContactDirectory
+from metrics import DIRECTORY_REFRESHES
+from ulb_scrape import FIELDS as ULB_FIELDS, fetch_ulb_entries, merge_entries
+
+logger = logging.getLogger(__name__)
+
+# Seconds between refreshes (0 = never refresh in-process)
+DIRECTORY_REFRESH_SECONDS = float(os.getenv("DIRECTORY_REFRESH_SECONDS", "86400"))
+# A refresh may shrink a dataset to no less than this fraction of the served one
+DIRECTORY_MIN_RETAINED = float(os.getenv("DIRECTORY_MIN_RETAINED", "0.8"))
+# Reject the department crawl if more than this fraction of pages failed
+DIRECTORY_MAX_FAILED_PAGES = float(os.getenv("DIRECTORY_MAX_FAILED_PAGES", "0.1"))
+
+
+class RefreshRejected(Exception):
+    """The scraped data doesn't look complete enough to replace what is served."""
+
+
+def diff_departments(old: dict, new: dict) -> dict:
+    return {
+        "added": sorted(new.keys() - old.keys()),
+        "changed": sorted(name for name in new.keys() & old.keys() if new[name] != old[name]),
+        "removed": sorted(old.keys() - new.keys()),
+    }
+
+
+def _check_size(kind: str, new: int, old: int):
+    if not new:
+        raise RefreshRejected(f"{kind}: scrape returned no entries")
+    if new < old * DIRECTORY_MIN_RETAINED:
+        raise RefreshRejected(f"{kind}: only {new} entries scraped, {old} currently served")
+
+
+def validate_departments(departments: dict, stats: dict, current: dict):
+    pages = stats["fetched"] + stats["not_modified"] + stats["failed"]
+    if pages and stats["failed"] > pages * DIRECTORY_MAX_FAILED_PAGES:
+        raise RefreshRejected(f"departments: {stats['failed']} of {pages} pages failed")
+    _check_size("departments", len(departments), len(current))
+    for name, info in departments.items():
+        if not isinstance(info, dict) or not (info.get("phone") or info.get("email")):
+            raise RefreshRejected(f"departments: no contact details for {name}")
+
+
+def validate_ulbs(ulbs: list, current: list):
+    _check_size("ulbs", len(ulbs), len(current))
+    for entry in ulbs:
+        if set(entry) != set(ULB_FIELDS) or not all(isinstance(entry[f], str) for f in ULB_FIELDS):
+            raise RefreshRejected(f"ulbs: malformed entry {entry!r}")
+        if not entry["ulb_name"]:
+            raise RefreshRejected("ulbs: entry without a ulb_name")
+
+
+class DirectoryRefresher:
+    """Runs the refresh loop as an asyncio task and keeps the last outcome for /directory/status."""
+
+    def __init__(self, directory: ContactDirectory, interval: float = DIRECTORY_REFRESH_SECONDS):
+        self.directory = directory
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self.status = {
+            "enabled": interval > 0,
+            "interval_seconds": interval,
+            "running": False,
+            "last_started_at": None,
+            "last_finished_at": None,
+            "last_success_at": None,
+            "duration_seconds": None,
+            "result": None,
+            "message": None,
+            "diff": None,
+            "diff_size": None,
+            "next_run_at": None,
+        }
+
+    async def refresh(self) -> dict:
+        """One refresh: scrape, validate, publish. Returns the updated status."""
+        async with self._lock:
+            started = time.monotonic()
+            self.status.update(running=True, last_started_at=time.time())
+            logger.info("🔄 Refreshing contact directory")
+            try:
+                result, message, diff, size = await self._refresh()
+            except RefreshRejected as e:
+                result, message, diff, size = "rejected", str(e), None, None
+                logger.error(f"❌ Directory refresh rejected, keeping current data: {e}")
+            except Exception as e:
+                result, message, diff, size = "failed", f"{type(e).__name__}: {e}", None, None
+                logger.exception("❌ Directory refresh failed, keeping current data")
+            self.status.update(
+                running=False,
+                last_finished_at=time.time(),
+                duration_seconds=round(time.monotonic() - started, 3),
+                result=result,
+                message=message,
+                diff=diff,
+                diff_size=size,
+            )
+            if result in ("updated", "unchanged"):
+                self.status["last_success_at"] = self.status["last_finished_at"]
+            DIRECTORY_REFRESHES.labels(result=result).inc()
+            return self.status
+
+    async def _refresh(self):
+        # Both scrapes run concurrently; Playwright's sync API needs its own thread
+        (departments, stats), scraped_ulbs = await asyncio.gather(
+            crawl_departments(), asyncio.to_thread(fetch_ulb_entries)
+        )
+        current = self.directory.snapshot
+        validate_departments(departments, stats, current.departments)
+        validate_ulbs(scraped_ulbs, current.ulbs)
+
+        ulbs, ulb_diff = merge_entries(current.ulbs, scraped_ulbs)
+        ulb_diff = {k: v for k, v in ulb_diff.items() if k != "unchanged"}
+        ulb_diff["changed"] = [c["ulb_name"] for c in ulb_diff["changed"]]
+        diff = {"departments": diff_departments(current.departments, departments), "ulbs": ulb_diff}
+        size = sum(len(names) for part in diff.values() for names in part.values())
+        if not size:
+            return "unchanged", "No contact changes", diff, 0
+
+        await asyncio.to_thread(self.directory.publish, departments, ulbs)
+        logger.info(f"✅ Contact directory refreshed: {size} change(s)")
+        return "updated", f"{size} change(s) published", diff, size
+
+    async def _run(self):
+        while True:
+            self.status["next_run_at"] = time.time() + self.interval
+            await asyncio.sleep(self.interval)
+            await self.refresh()
+
+    def start(self):
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"🗓️ Directory refresh every {self.interval:.0f}s")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
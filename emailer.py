@@ -0,0 +1,114 @@
+import asyncio
+import logging
+import os
+import time
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+import aiosmtplib
+from dotenv import load_dotenv
+
+from metrics import SMTP_SEND_SECONDS
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+SMTP_SERVER = "smtp.gmail.com"
+SMTP_PORT = 587
+SMTP_USER = os.getenv("SMTP_USER")  # set in env
+SMTP_PASS = os.getenv("SMTP_PASS")  # app password / key
+
+# Authenticated SMTP sessions kept open and reused across messages
+SMTP_POOL_SIZE = max(1, int(os.getenv("SMTP_POOL_SIZE", "3")))
+# Sessions idle longer than this are dropped (Gmail closes idle connections)
+SMTP_IDLE_SECONDS = float(os.getenv("SMTP_IDLE_SECONDS", "120"))
+SMTP_TIMEOUT_SECONDS = float(os.getenv("SMTP_TIMEOUT_SECONDS", "30"))
+
+
+class SmtpPool:
+    """
+    Pool of logged-in aiosmtplib sessions. At most SMTP_POOL_SIZE messages are
+    in flight; a broken or stale session is replaced and the send retried once.
+    """
+
+    def __init__(self, size: int = SMTP_POOL_SIZE):
+        self.size = size
+        self._semaphore = asyncio.Semaphore(size)
+        self._idle = []  # [(client, last_used)]
+
+    async def _connect(self):
+        client = aiosmtplib.SMTP(
+            hostname=SMTP_SERVER, port=SMTP_PORT, start_tls=True, timeout=SMTP_TIMEOUT_SECONDS
+        )
+        await client.connect()
+        await client.login(SMTP_USER, SMTP_PASS)
+        logger.info("📨 Opened SMTP session")
+        return client
+
+    @staticmethod
+    async def _discard(client):
+        try:
+            if client.is_connected:
+                await client.quit()
+        except Exception:
+            client.close()
+
+    async def _acquire(self):
+        while self._idle:
+            client, last_used = self._idle.pop()
+            if client.is_connected and time.monotonic() - last_used < SMTP_IDLE_SECONDS:
+                return client
+            await self._discard(client)
+        return await self._connect()
+
+    async def send(self, msg):
+        async with self._semaphore:
+            for attempt in (1, 2):
+                client = await self._acquire()
+                try:
+                    await client.send_message(msg)
+                except (aiosmtplib.SMTPServerDisconnected, aiosmtplib.SMTPConnectError, ConnectionError):
+                    await self._discard(client)
+                    if attempt == 2:
+                        raise
+                    logger.warning("♻️ SMTP session dropped, reconnecting...")
+                    continue
+                except Exception:
+                    await self._discard(client)
+                    raise
+                self._idle.append((client, time.monotonic()))
+                return
+
+    async def close(self):
+        idle, self._idle = self._idle, []
+        for client, _ in idle:
+            await self._discard(client)
+        logger.info("SMTP pool closed")
+
+
+smtp_pool = SmtpPool()
+
+
+def build_message(to_email: str, subject: str, body: str, message_id: str = None):
+    msg = MIMEMultipart()
+    msg["From"] = SMTP_USER
+    msg["To"] = to_email
+    msg["Subject"] = subject
+    if message_id:
+        domain = (SMTP_USER or "localhost").split("@")[-1]
+        msg["Message-ID"] = f"<{message_id}@{domain}>"
+    msg.attach(MIMEText(body, "plain"))
+    return msg
+
+
+async def deliver_email(to_email: str, subject: str, body: str, message_id: str = None):
+    """Send one message over the pool; raises on failure (used by the outbox)."""
+    start = time.perf_counter()
+    try:
+        await smtp_pool.send(build_message(to_email, subject, body, message_id))
+    except Exception:
+        SMTP_SEND_SECONDS.labels(result="failed").observe(time.perf_counter() - start)
+        raise
+    SMTP_SEND_SECONDS.labels(result="sent").observe(time.perf_counter() - start)
+
@@ -0,0 +1,115 @@
+import re
+from collections import defaultdict
+from typing import Iterable, Optional, Tuple
+
+# Spelling variants seen in the scraped data / client input, applied before indexing
+SPELLING_FIXES = {
+    "muncipal": "municipal",
+    "municiple": "municipal",
+    "nigam": "corporation",
+    "dept": "department",
+    "deptt": "department",
+    "&": "and",
+}
+
+# Words shared by many names ("X Nagar Parishad", "Department of X"): never what tells two apart
+GENERIC_WORDS = frozenset((
+    "nagar", "parishad", "panchayat", "municipal", "corporation", "council", "notified", "area",
+    "committee", "nac", "limited", "department", "directorate", "of", "and", "the",
+))
+
+_WORD_RE = re.compile(r"[a-z0-9&]+")
+
+
+def normalize(name: str) -> str:
+    """Lowercase, split codes like 'urban_dev', drop punctuation, fix known misspellings."""
+    words = _WORD_RE.findall(name.lower().replace("_", " "))
+    return " ".join(SPELLING_FIXES.get(w, w) for w in words)
+
+
+def distinctive_words(name: str) -> list:
+    """Normalized words minus the generic ones (all of them if nothing else is left)."""
+    words = normalize(name).split()
+    return [w for w in words if w not in GENERIC_WORDS and w != "&"] or words
+
+
+def trigrams(text: str) -> frozenset:
+    padded = f"  {text} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def dice(a: frozenset, b: frozenset) -> float:
+    return 2 * len(a & b) / (len(a) + len(b)) if a and b else 0.0
+
+
+class TrigramIndex:
+    """
+    Inverted index from character trigrams to aliases. A query only scores the
+    aliases it shares a trigram with (Dice coefficient), so matching costs
+    microseconds instead of a pairwise comparison against every name.
+
+    Only the distinctive words are indexed and scored, so "Giridih Nagar
+    Parishad" is compared as "giridih", not by its suffix. A match also needs
+    one of its words to match a query word (the place / subject name) and a
+    clear lead over the best other target; anything else is no match.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, str]] = ()):
+        self._targets = []  # alias id -> target value
+        self._sizes = []    # alias id -> number of trigrams
+        self._words = []    # alias id -> [trigrams of each distinctive word]
+        self._postings = defaultdict(list)  # trigram -> [alias id]
+        for alias, target in entries:
+            self.add(alias, target)
+
+    def __len__(self):
+        return len(self._targets)
+
+    def add(self, alias: str, target: str):
+        words = distinctive_words(alias)
+        grams = trigrams(" ".join(words))
+        if not words:
+            return
+        alias_id = len(self._targets)
+        self._targets.append(target)
+        self._sizes.append(len(grams))
+        self._words.append([trigrams(w) for w in words])
+        for gram in grams:
+            self._postings[gram].append(alias_id)
+
+    def best(self, query: str, min_score: float = 0.0, min_word_score: float = 0.7,
+             min_margin: float = 0.1) -> Tuple[Optional[str], float]:
+        """
+        Return (target, score in 0..1) of the closest alias, or (None, score)
+        when it scores below min_score, no word pair reaches min_word_score,
+        or another target scores within min_margin of it.
+        """
+        words = distinctive_words(query)
+        grams = trigrams(" ".join(words))
+        if not words:
+            return None, 0.0
+
+        shared = defaultdict(int)
+        for gram in grams:
+            for alias_id in self._postings.get(gram, ()):
+                shared[alias_id] += 1
+        if not shared:
+            return None, 0.0
+
+        # Best score per target (several aliases can point at one target)
+        scores = {}
+        for alias_id, count in shared.items():
+            score = 2 * count / (len(grams) + self._sizes[alias_id])
+            target = self._targets[alias_id]
+            if score > scores.get(target, (0.0, None))[0]:
+                scores[target] = (score, alias_id)
+        ranked = sorted(scores.items(), key=lambda item: item[1][0], reverse=True)
+        target, (best_score, alias_id) = ranked[0]
+        runner_up = ranked[1][1][0] if len(ranked) > 1 else 0.0
+
+        if best_score < min_score or best_score - runner_up < min_margin:
+            return None, best_score
+        query_words = [trigrams(w) for w in words]
+        if max(dice(q, a) for q in query_words for a in self._words[alias_id]) < min_word_score:
+            return None, best_score
+        return target, best_score
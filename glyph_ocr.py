@@ -0,0 +1,194 @@
+import logging
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+
+import cv2
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads of one process are serialised
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Glyph bank learned from captchas the portal accepted
+GLYPH_BANK_PATH = os.getenv("GLYPH_BANK_PATH", "glyph_bank.npz")
+# Side of the square each segmented glyph is normalised to
+GLYPH_SIZE = 16
+# Components smaller than this (pixels) are treated as noise
+MIN_GLYPH_AREA = int(os.getenv("MIN_GLYPH_AREA", "12"))
+# Cap per character so the bank (and matching cost) stays small
+MAX_SAMPLES_PER_CHAR = int(os.getenv("MAX_SAMPLES_PER_CHAR", "40"))
+
+
+def segment_glyphs(binary: np.ndarray) -> np.ndarray:
+    """
+    Split a thresholded captcha (dark text on white) into characters using
+    connected components, left to right. Components whose columns mostly
+    overlap (e.g. the dot of an 'i') are merged. Returns an (n, GLYPH_SIZE**2)
+    array of L2-normalised glyph vectors.
+    """
+    fg = (binary < 128).astype(np.uint8)
+    n, labels, stats, _ = cv2.connectedComponentsWithStats(fg, connectivity=8)
+
+    boxes = []  # [x0, x1, component ids]
+    for i in range(1, n):
+        x, _, w, _, area = stats[i]
+        if area < MIN_GLYPH_AREA:
+            continue
+        boxes.append([x, x + w, [i]])
+    boxes.sort(key=lambda b: b[0])
+
+    merged = []
+    for box in boxes:
+        if merged:
+            prev = merged[-1]
+            overlap = min(prev[1], box[1]) - max(prev[0], box[0])
+            if overlap > 0.5 * min(prev[1] - prev[0], box[1] - box[0]):
+                prev[0], prev[1] = min(prev[0], box[0]), max(prev[1], box[1])
+                prev[2].extend(box[2])
+                continue
+        merged.append(box)
+
+    glyphs = []
+    for _, _, ids in merged:
+        mask = np.isin(labels, ids)
+        ys, xs = np.nonzero(mask)
+        crop = mask[ys.min():ys.max() + 1, xs.min():xs.max() + 1].astype(np.float32)
+        glyphs.append(cv2.resize(crop, (GLYPH_SIZE, GLYPH_SIZE), interpolation=cv2.INTER_AREA).ravel())
+
+    if not glyphs:
+        return np.empty((0, GLYPH_SIZE * GLYPH_SIZE), np.float32)
+    vectors = np.stack(glyphs)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-6)
+
+
+class GlyphBank:
+    """Labelled glyph vectors persisted as .npz, reloaded when the file changes."""
+
+    def __init__(self, path: str = GLYPH_BANK_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._mtime = None
+        # (vectors, labels) swapped as one tuple so readers never see a mix
+        self._data = (np.empty((0, GLYPH_SIZE * GLYPH_SIZE), np.float32), np.empty((0,), "<U1"))
+        self.reload_if_changed()
+
+    def __len__(self):
+        return len(self._data[1])
+
+    def _read(self):
+        """(vectors, labels, mtime) as saved on disk, or None if there is no bank yet."""
+        try:
+            mtime = os.stat(self.path).st_mtime
+            with np.load(self.path) as data:
+                return data["vectors"].astype(np.float32), data["labels"], mtime
+        except FileNotFoundError:
+            return None
+
+    def reload_if_changed(self):
+        try:
+            if os.stat(self.path).st_mtime == self._mtime:
+                return
+        except FileNotFoundError:
+            return
+        saved = self._read()
+        if saved is None:
+            return
+        vectors, labels, mtime = saved
+        with self._lock:
+            self._data, self._mtime = (vectors, labels), mtime
+        logger.info(f"🔤 Loaded glyph bank with {len(labels)} glyph(s)")
+
+    def classify(self, vectors: np.ndarray):
+        """
+        Nearest neighbour by cosine similarity; returns (labels, similarities,
+        margins), the margin being how far the best match is ahead of the
+        closest sample of any other character (its full similarity if the
+        bank knows a single character).
+        """
+        bank_vectors, bank_labels = self._data
+        sims = vectors @ bank_vectors.T
+        rows = np.arange(len(vectors))
+        best = sims.argmax(axis=1)
+        labels, best_sims = bank_labels[best], sims[rows, best]
+        others = np.where(bank_labels[None, :] == labels[:, None], -np.inf, sims)
+        runner_up = np.maximum(others.max(axis=1), 0.0)
+        return labels, best_sims, best_sims - runner_up
+
+    @contextmanager
+    def _file_lock(self):
+        """Serialise read-merge-save across processes sharing the bank file."""
+        if fcntl is None:
+            yield
+            return
+        with open(f"{self.path}.lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def add(self, vectors: np.ndarray, labels: str):
+        with self._lock, self._file_lock():
+            # Merge into what is on disk now: another process may have saved since we loaded
+            saved = self._read()
+            bank_vectors, bank_labels = saved[:2] if saved else self._data
+            all_vectors = np.concatenate([bank_vectors, vectors])
+            all_labels = np.concatenate([bank_labels, np.array(list(labels), "<U1")])
+            # Keep only the newest MAX_SAMPLES_PER_CHAR samples of each character
+            keep = np.zeros(len(all_labels), bool)
+            for ch in np.unique(all_labels):
+                keep[np.flatnonzero(all_labels == ch)[-MAX_SAMPLES_PER_CHAR:]] = True
+            self._data = (all_vectors[keep], all_labels[keep])
+            self._save()
+
+    def _save(self):
+        vectors, labels = self._data
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.path)), suffix=".tmp.npz")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez_compressed(f, vectors=vectors, labels=labels)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        self._mtime = os.stat(self.path).st_mtime
+
+
+class TemplateRecognizer:
+    """
+    Captcha recognizer matching segmented glyphs against the glyph bank.
+    Pure NumPy/cv2, no subprocesses: well under a millisecond per captcha.
+    """
+
+    def __init__(self, bank: GlyphBank = None):
+        self.bank = bank or GlyphBank()
+
+    def recognize(self, binary: np.ndarray):
+        """
+        Return [(char, conf, margin), ...] with conf = cosine similarity * 100
+        and margin = lead over the next-best character, on the same scale.
+        These are not Tesseract confidences: captcha.is_confident judges them
+        against their own thresholds.
+        """
+        self.bank.reload_if_changed()
+        if not len(self.bank):
+            return []
+        vectors = segment_glyphs(binary)
+        if not len(vectors):
+            return []
+        labels, sims, margins = self.bank.classify(vectors)
+        return [(str(ch), float(sim) * 100, float(margin) * 100) for ch, sim, margin in zip(labels, sims, margins)]
+
+    def learn(self, binary: np.ndarray, answer: str) -> bool:
+        """Add the glyphs of an accepted captcha; skipped if segmentation disagrees."""
+        vectors = segment_glyphs(binary)
+        if len(vectors) != len(answer):
+            return False
+        self.bank.add(vectors, answer)
+        return True
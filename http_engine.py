@@ -0,0 +1,202 @@
+"""
+Browserless submission engine: replays the portal's form API over HTTP.
+
+The request shapes follow mock_portal.py (GET captcha as a base64 PNG data
+URL, POST the form fields as JSON, 2xx = accepted, 400 = wrong captcha).
+The live portal's API has not been mapped yet, so the paths are settings
+(their defaults are the mock's) that must be set explicitly before
+AUTOMATION_ENGINE=http is accepted, and anything unexpected is reported as a
+fallback so the Playwright engine can take the grievance instead.
+"""
+import asyncio
+import logging
+import os
+from typing import Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from captcha import decode_captcha_src, record_captcha_result, fallback_captcha
+from metrics import observe_step, CAPTCHA_ATTEMPTS, CAPTCHA_SOLVES
+from ocr_pool import ocr_pool
+from portal_data import ULB_OPTIONS, ISSUE_TYPES
+from warm_pool import PORTAL_URL, PORTAL_SUBMIT_PATH
+
+logger = logging.getLogger(__name__)
+
+_portal = urlsplit(PORTAL_URL)
+PORTAL_API_BASE = os.getenv("PORTAL_API_BASE", f"{_portal.scheme}://{_portal.netloc}")
+PORTAL_CAPTCHA_PATH = os.getenv("PORTAL_CAPTCHA_PATH", "/grievance/api/captcha")
+# Off until both endpoints are set for the portal in use: the defaults only fit mock_portal.py
+HTTP_ENGINE_CONFIGURED = all(os.getenv(name) for name in ("PORTAL_CAPTCHA_PATH", "PORTAL_SUBMIT_PATH"))
+# Grievances submitted at once / pooled keep-alive connections to the portal
+HTTP_MAX_CONNECTIONS = max(1, int(os.getenv("HTTP_MAX_CONNECTIONS", "16")))
+HTTP_TIMEOUT_SECONDS = float(os.getenv("HTTP_TIMEOUT_SECONDS", "30"))
+
+# Portal <select> labels -> option values posted by the form
+ULB_CODES = {label: code for code, label in ULB_OPTIONS.items()}
+ISSUE_TYPE_CODES = {label: code for code, label in ISSUE_TYPES.items()}
+
+
+class PortalProtocolError(Exception):
+    """The portal answered in a way this engine doesn't understand."""
+
+
+class SubmissionUncertain(Exception):
+    """The form POST failed in flight or got an unexpected answer: the portal may or may not have the grievance."""
+
+
+def _accepted_body(response: httpx.Response) -> dict:
+    # Accepted is accepted, even if the confirmation body is not JSON
+    try:
+        return response.json()
+    except ValueError:
+        return {}
+
+
+class HttpGrievanceEngine:
+    """
+    One pooled connection set shared by every submission; each grievance gets
+    its own cookie jar (a client over the shared transport), so sessions
+    never mix. Memory per grievance is a few KB instead of a browser context.
+    """
+
+    def __init__(self, max_connections: int = HTTP_MAX_CONNECTIONS, transport: httpx.AsyncBaseTransport = None):
+        self.max_connections = max_connections
+        self._transport = transport or httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            retries=1,
+        )
+        self.active_submissions = 0
+
+    def _client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            transport=self._transport,
+            base_url=PORTAL_API_BASE,
+            timeout=HTTP_TIMEOUT_SECONDS,
+            headers={"Accept": "application/json", "Referer": PORTAL_URL},
+        )
+
+    async def _new_captcha(self, client: httpx.AsyncClient):
+        response = await client.get(PORTAL_CAPTCHA_PATH)
+        if response.status_code != 200:
+            raise PortalProtocolError(f"captcha endpoint returned HTTP {response.status_code}")
+        try:
+            data = response.json()
+        except ValueError as e:
+            raise PortalProtocolError(f"captcha endpoint returned non-JSON: {e}") from e
+        if not isinstance(data, dict):
+            raise PortalProtocolError(f"captcha endpoint returned JSON {type(data).__name__}, not an object")
+        captcha_bytes = decode_captcha_src(data.get("image"))
+        if not captcha_bytes or not data.get("id"):
+            raise PortalProtocolError("captcha response has no id / PNG data URL")
+        return data["id"], captcha_bytes
+
+    @staticmethod
+    async def _post(client: httpx.AsyncClient, payload: dict) -> httpx.Response:
+        try:
+            response = await client.post(PORTAL_SUBMIT_PATH, json=payload)
+        except httpx.HTTPError as e:
+            raise SubmissionUncertain(f"{type(e).__name__}: {e}") from e
+        if response.status_code in (404, 405):
+            # No such endpoint / method: nothing was filed, the configured path is wrong
+            raise PortalProtocolError(f"submit endpoint returned HTTP {response.status_code}, check PORTAL_SUBMIT_PATH")
+        return response
+
+    async def _submit(self, client, form: dict, max_retries: int):
+        """Captcha + POST loop; returns the portal's JSON for the accepted submission."""
+        for attempt in range(1, max_retries + 1):
+            logger.info(f"🔄 Captcha attempt {attempt}/{max_retries} (http)")
+            captcha_id, captcha_bytes = await self._new_captcha(client)
+            captcha_text, candidates = await ocr_pool.read_async(captcha_bytes)
+            logger.info(f"🔍 Captcha guesses: {[(c.text, round(c.score)) for c in candidates]} | Picked: '{captcha_text}'")
+            if not captcha_text:
+                CAPTCHA_ATTEMPTS.labels(outcome="empty").inc()
+                continue
+
+            with observe_step("submit"):
+                response = await self._post(client, {**form, "captchaId": captcha_id, "captchaName": captcha_text})
+            if response.is_success:
+                await asyncio.to_thread(record_captcha_result, captcha_bytes, captcha_text, True, candidates)
+                CAPTCHA_ATTEMPTS.labels(outcome="accepted").inc()
+                CAPTCHA_SOLVES.labels(result="solved").inc()
+                return _accepted_body(response)
+            if response.status_code != 400:
+                # Only a 400 says "not accepted"; after any other answer the portal may have it
+                raise SubmissionUncertain(f"submit endpoint returned HTTP {response.status_code}")
+            await asyncio.to_thread(record_captcha_result, captcha_bytes, captcha_text, False, candidates)
+            CAPTCHA_ATTEMPTS.labels(outcome="rejected").inc()
+            logger.warning("⚠️ Captcha rejected, retrying...")
+
+        # Same last resort as the browser flow
+        CAPTCHA_SOLVES.labels(result="fallback").inc()
+        captcha_id, _ = await self._new_captcha(client)
+        guess = fallback_captcha()
+        logger.error(f"❌ All captcha attempts failed, using fallback: {guess}")
+        response = await self._post(client, {**form, "captchaId": captcha_id, "captchaName": guess})
+        if response.is_success:
+            return _accepted_body(response)
+        if response.status_code != 400:
+            raise SubmissionUncertain(f"submit endpoint returned HTTP {response.status_code}")
+        return None
+
+    async def automate_grievance(
+        self,
+        issue_text: str,
+        extra_info: bool,
+        grievance_location: Optional[str],
+        grievance_type: Optional[str],
+        ulb: str,
+        user_name: str,
+        user_mobile: str,
+        user_email: str
+    ):
+        ulb_code = ULB_CODES.get(ulb)
+        if ulb_code is None:
+            return {"status": "error", "message": f"Unknown ULB for the portal form: {ulb}"}
+        form = {
+            "ulb": ulb_code,
+            "complaintDescription": issue_text,
+            "grievanceLocation": (grievance_location or "") if extra_info else "",
+            "problemTypeId": ISSUE_TYPE_CODES.get(grievance_type, "") if extra_info and grievance_type else "",
+            "name": user_name,
+            "mobileNo": user_mobile,
+            "email": user_email,
+        }
+
+        self.active_submissions += 1
+        client = self._client()
+        try:
+            with observe_step("navigate"):
+                # Same cookies a browser would get from loading the form page
+                await client.get(PORTAL_URL, headers={"Accept": "text/html"})
+            with observe_step("captcha"):
+                accepted = await self._submit(client, form, max_retries=10)
+        except SubmissionUncertain as e:
+            # Never resubmit in a browser: the portal may already have it
+            logger.exception("HTTP grievance submission interrupted")
+            return {"status": "error", "message": str(e)}
+        except (httpx.HTTPError, PortalProtocolError, ValueError) as e:
+            # Nothing was accepted by the portal: safe to retry the grievance in a browser
+            logger.exception("Error during HTTP grievance submission")
+            return {"status": "error", "message": str(e), "fallback": True}
+        except Exception as e:
+            # OCR backend missing or an OCR process failed: a browser engine would fail the same way
+            logger.exception("Error reading the captcha during HTTP grievance submission")
+            return {"status": "error", "message": f"{type(e).__name__}: {e}"}
+        finally:
+            self.active_submissions -= 1
+
+        if accepted is None:
+            return {"status": "error", "message": "Portal rejected every captcha attempt"}
+        return {
+            "status": "success",
+            "message": "Grievance submitted & forwarded to department",
+            "portal_reference": accepted.get("grievanceId"),
+        }
+
+    async def stop(self):
+        await self._transport.aclose()
+        logger.info("HTTP engine closed")
+
+
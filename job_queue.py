@@ -0,0 +1,205 @@
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Local durable job store (survives process restarts)
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", "jobs.db")
+# A claimed job belongs to its worker this long; heartbeats extend it, an expired one is reclaimed
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "120"))
+# Claims of one job before it is failed instead of reclaimed (its worker keeps dying)
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id          TEXT PRIMARY KEY,
+    kind        TEXT NOT NULL,
+    status      TEXT NOT NULL,
+    payload     TEXT NOT NULL,
+    result      TEXT,
+    error       TEXT,
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    created_at  REAL NOT NULL,
+    updated_at  REAL NOT NULL,
+    lease_owner       TEXT,
+    lease_expires_at  REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status_created ON jobs (status, created_at);
+"""
+
+# Columns added after the first release (jobs.db files created before them)
+MIGRATIONS = {
+    "lease_owner": "ALTER TABLE jobs ADD COLUMN lease_owner TEXT",
+    "lease_expires_at": "ALTER TABLE jobs ADD COLUMN lease_expires_at REAL",
+}
+
+# Job lifecycle: queued -> running -> succeeded | failed
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+
+
+def default_owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+class JobStore:
+    """
+    SQLite-backed FIFO job queue shared by the API and any number of worker
+    processes on the same host (local disk only; WAL is unsafe on network
+    volumes). A worker claims a job with a lease and keeps it with
+    heartbeats; a job whose lease ran out (crashed or hung worker) goes to
+    the next claimer.
+    """
+
+    def __init__(self, path: str = JOB_DB_PATH, owner: Optional[str] = None,
+                 lease_seconds: float = JOB_LEASE_SECONDS, busy_timeout: float = 5.0):
+        self.path = path
+        self.owner = owner or default_owner()
+        self.lease_seconds = lease_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=busy_timeout, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        for column, ddl in MIGRATIONS.items():
+            if column not in columns:
+                self._conn.execute(ddl)
+
+    @staticmethod
+    def _to_dict(row) -> Optional[dict]:
+        if row is None:
+            return None
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def enqueue(self, kind: str, payload: dict) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, kind, status, payload, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, kind, QUEUED, json.dumps(payload), now, now),
+            )
+        logger.info(f"📥 Queued {kind} job {job_id}")
+        return job_id
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row)
+
+    def get_many(self, job_ids) -> list:
+        """Jobs by id (unknown ids are skipped), looked up in chunks under SQLite's variable limit."""
+        job_ids, jobs = list(job_ids), []
+        for i in range(0, len(job_ids), 500):
+            chunk = job_ids[i:i + 500]
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT * FROM jobs WHERE id IN ({', '.join('?' * len(chunk))})", chunk
+                ).fetchall()
+            jobs.extend(self._to_dict(row) for row in rows)
+        return jobs
+
+    def count(self, status: str) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (status,)).fetchone()[0]
+
+    def claim_next(self, kind: str) -> Optional[dict]:
+        """
+        Atomically lease the oldest claimable job of this kind to this store's
+        owner: queued, or running with an expired lease. Expired jobs out of
+        attempts are failed on the way.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, error = ?, lease_owner = NULL, lease_expires_at = NULL, "
+                    "updated_at = ? WHERE kind = ? AND status = ? AND attempts >= ? "
+                    "AND (lease_expires_at IS NULL OR lease_expires_at < ?)",
+                    (FAILED, "Worker lease expired on every attempt", now, kind, RUNNING, JOB_MAX_ATTEMPTS, now),
+                )
+                row = self._conn.execute(
+                    "SELECT * FROM jobs WHERE kind = ? AND (status = ? OR (status = ? AND "
+                    "(lease_expires_at IS NULL OR lease_expires_at < ?))) ORDER BY created_at LIMIT 1",
+                    (kind, QUEUED, RUNNING, now),
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = ?, attempts = attempts + 1, lease_owner = ?, "
+                        "lease_expires_at = ?, updated_at = ? WHERE id = ?",
+                        (RUNNING, self.owner, now + self.lease_seconds, now, row["id"]),
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        job = self._to_dict(row)
+        if job:
+            if job["status"] == RUNNING:
+                logger.warning(f"♻️ Reclaimed job {job['id']} from {job['lease_owner']} (lease expired)")
+            job["status"] = RUNNING
+            job["attempts"] += 1
+            job["lease_owner"] = self.owner
+            job["lease_expires_at"] = now + self.lease_seconds
+        return job
+
+    def heartbeat(self, job_id: str) -> bool:
+        """Extend this owner's lease on a running job; False if it was lost to another worker."""
+        now = time.time()
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE jobs SET lease_expires_at = ?, updated_at = ? "
+                "WHERE id = ? AND status = ? AND lease_owner = ?",
+                (now + self.lease_seconds, now, job_id, RUNNING, self.owner),
+            )
+        return cur.rowcount == 1
+
+    def finish(self, job_id: str, status: str, result: Optional[dict] = None, error: Optional[str] = None) -> bool:
+        """Record the outcome, unless the lease has since gone to another worker."""
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, lease_owner = NULL, lease_expires_at = NULL, "
+                "updated_at = ? WHERE id = ? AND status = ? AND lease_owner = ?",
+                (status, json.dumps(result) if result is not None else None, error, time.time(),
+                 job_id, RUNNING, self.owner),
+            )
+        if not cur.rowcount:
+            logger.warning(f"⚠️ Job {job_id} is no longer leased to {self.owner}, result not recorded")
+        return cur.rowcount == 1
+
+    def release(self, keep=()) -> int:
+        """
+        Put this owner's running jobs back on the queue, except `keep` (jobs
+        already started: re-running those could file the grievance twice).
+        """
+        keep = set(keep)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id FROM jobs WHERE status = ? AND lease_owner = ?", (RUNNING, self.owner)
+            ).fetchall()
+            ids = [(QUEUED, time.time(), row["id"], RUNNING, self.owner) for row in rows if row["id"] not in keep]
+            self._conn.executemany(
+                "UPDATE jobs SET status = ?, lease_owner = NULL, lease_expires_at = NULL, updated_at = ? "
+                "WHERE id = ? AND status = ? AND lease_owner = ?",
+                ids,
+            )
+        if ids:
+            logger.warning(f"♻️ Released {len(ids)} claimed but unstarted job(s)")
+        return len(ids)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -3,22 +3,36 @@ if sys.platform.startswith("win"):
     asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
 
 import logging
-from fastapi import FastAPI, Form, File, UploadFile
+from fastapi import FastAPI, Form, Header, Request
+from fastapi.responses import JSONResponse, Response
 from typing import Optional
-from playwright.sync_api import sync_playwright, Browser
-import base64
-from io import BytesIO
-from PIL import Image, ImageFilter, ImageOps
-import pytesseract
 import uvicorn
+import io
 import os
-from concurrent.futures import ThreadPoolExecutor
-import threading
-from fastapi.middleware.cors import CORSMiddleware
-import cv2
-import numpy as np
-import random, string
 import json
+import uuid
+from fastapi.middleware.cors import CORSMiddleware
+from browser_pool import BrowserWorkerPool, BROWSER_WORKERS, get_browser
+from warm_pool import WarmPagePool, WARM_CONTEXTS, WARM_CHECK_SECONDS, open_form_entry
+from async_engine import AsyncGrievanceEngine
+from http_engine import HttpGrievanceEngine, HTTP_ENGINE_CONFIGURED
+from captcha import decode_captcha_src, record_captcha_result, fallback_captcha
+from ocr_pool import ocr_pool
+from portal_waits import CaptchaVerdictTimeout, submit_and_wait_for_verdict, wait_for_captcha_reload, wait_for_idle
+from job_queue import JobStore, QUEUED, SUCCEEDED, FAILED
+from sqlite_retry import retry_db
+from metrics import (
+    observe_step, CAPTCHA_ATTEMPTS, CAPTCHA_SOLVES, GRIEVANCE_RUNS,
+    EXECUTOR_QUEUE_DEPTH, JOB_QUEUE_DEPTH, ACTIVE_CONTEXTS, DUPLICATE_SUBMISSIONS,
+)
+from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
+from emailer import smtp_pool
+from outbox import EmailOutbox
+from batch import UploadStream, UploadStreamingResponse, iter_rows
+from directory import ContactDirectory
+from directory_refresh import DirectoryRefresher
+from portal_data import ULB_OPTIONS, department_names
+from dedupe import TTLCache, fingerprint
 
 
 # Logging setup
@@ -38,165 +52,278 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Thread pool for running synchronous Playwright code
-executor = ThreadPoolExecutor(max_workers=1)  # Single worker to avoid browser conflicts
-
-# Global Playwright/Browser (managed per thread)
-thread_local = threading.local()
-
-# to run on localhost
-# def get_browser():
-#     if not hasattr(thread_local, "playwright"):
-#         thread_local.playwright = sync_playwright().start()
-#         thread_local.browser = thread_local.playwright.chromium.launch(
-#             headless=False, 
-#             slow_mo=500     
-#         )
-#         logger.info("✅ Browser launched successfully in thread")
-#     return thread_local.browser
-
-#for deployment
-def get_browser():
-    if not hasattr(thread_local, "playwright"):
-        thread_local.playwright = sync_playwright().start()
-        thread_local.browser = thread_local.playwright.chromium.launch(
-            headless=True,  
-            args=["--no-sandbox", "--disable-dev-shm-usage"]  
-        )
-        logger.info("✅ Browser launched successfully in thread")
-    return thread_local.browser
+# Automation engine: "sync" (browser worker threads), "async" (playwright.async_api,
+# many contexts on one browser inside the event loop) or "http" (browserless form API)
+AUTOMATION_ENGINE = os.getenv("AUTOMATION_ENGINE", "sync").lower()
+# Browser engine that takes over when the http engine can't talk to the portal ("none" to disable)
+HTTP_FALLBACK_ENGINE = os.getenv("HTTP_FALLBACK_ENGINE", "sync").lower()
+# Fail at startup, not on the first grievance
+if AUTOMATION_ENGINE not in ("sync", "async", "http"):
+    raise ValueError(f"Unknown AUTOMATION_ENGINE: {AUTOMATION_ENGINE!r} (expected sync, async or http)")
+if HTTP_FALLBACK_ENGINE not in ("sync", "async", "none"):
+    raise ValueError(f"Unknown HTTP_FALLBACK_ENGINE: {HTTP_FALLBACK_ENGINE!r} (expected sync, async or none)")
+if AUTOMATION_ENGINE == "http" and not HTTP_ENGINE_CONFIGURED:
+    raise ValueError("AUTOMATION_ENGINE=http needs PORTAL_CAPTCHA_PATH and PORTAL_SUBMIT_PATH set to the portal's form API")
+
+# Pool of browser workers for running synchronous Playwright code
+# (size configured with the BROWSER_WORKERS env var); idle workers keep
+# WARM_CONTEXTS pages parked at the ULB selector
+warm_pages = WarmPagePool()
+browser_pool = BrowserWorkerPool(
+    BROWSER_WORKERS,
+    on_idle=warm_pages.top_up if WARM_CONTEXTS else None,
+    idle_seconds=WARM_CHECK_SECONDS,
+)
+async_engine = AsyncGrievanceEngine()
+http_engine = HttpGrievanceEngine()
+
+# Durable grievance queue drained by background workers: in this process
+# (GRIEVANCE_QUEUE_WORKERS, 0 = API only) and/or by worker.py processes
+GRIEVANCE_JOB = "grievance"
+GRIEVANCE_QUEUE_WORKERS = int(os.getenv(
+    "GRIEVANCE_QUEUE_WORKERS",
+    {"async": async_engine.max_contexts, "http": http_engine.max_connections}.get(AUTOMATION_ENGINE, browser_pool.size)
+))
+QUEUE_POLL_SECONDS = float(os.getenv("QUEUE_POLL_SECONDS", "1"))
+# How often the queue-depth gauge is re-read from the store; scrapes only read the cached value
+QUEUE_DEPTH_SECONDS = float(os.getenv("QUEUE_DEPTH_SECONDS", "5"))
+job_store = JobStore()
+# On shutdown, running jobs get this long to finish (kept well inside the lease)
+JOB_DRAIN_SECONDS = min(float(os.getenv("JOB_DRAIN_SECONDS", "60")), job_store.lease_seconds / 2)
+job_wakeup = asyncio.Event()
+workers_stopping = asyncio.Event()
+grievance_tasks = []  # queue workers
+worker_tasks = []     # other background tasks (outbox sender)
+started_jobs = set()  # ids of jobs this process has begun running
+
+# Idempotency-Key header / content fingerprint -> job id of the original submission
+recent_submissions = TTLCache()
+
+# Every outgoing email goes through the persistent outbox
+outbox = EmailOutbox()
+
+# Bulk uploads being enqueued / followed; they outlive a client that disconnects
+batch_tasks = set()
+
+# Held across the duplicate check and the insert, which no longer run atomically on the loop
+enqueue_lock = asyncio.Lock()
+
+EXECUTOR_QUEUE_DEPTH.set_function(lambda: browser_pool.queue_depth)
+ACTIVE_CONTEXTS.set_function(lambda: browser_pool.busy_workers + async_engine.active_contexts)
+
+def start_grievance_workers(count: int):
+    """Start `count` queue workers (used by the API and by worker.py)."""
+    logger.info(f"Automation engine: {AUTOMATION_ENGINE}")
+    # Launch Chromium and park warm contexts before the first job arrives
+    if WARM_CONTEXTS and count:
+        if AUTOMATION_ENGINE == "async":
+            async_engine.warm.start()
+        elif AUTOMATION_ENGINE == "sync":
+            browser_pool.start()
+    for i in range(count):
+        grievance_tasks.append(asyncio.create_task(grievance_worker(i)))
+    worker_tasks.append(asyncio.create_task(track_queue_depth()))
+    logger.info(f"Started {count} grievance queue worker(s) as {job_store.owner}")
+
+
+async def stop_grievance_workers(grace: float = JOB_DRAIN_SECONDS):
+    """
+    Stop claiming, let running jobs finish for up to `grace` seconds, then
+    cancel the rest (recorded as failed, never re-run) and the background
+    tasks. Only claimed-but-unstarted jobs go back on the queue.
+    """
+    workers_stopping.set()
+    job_wakeup.set()
+    if grievance_tasks:
+        _, pending = await asyncio.wait(grievance_tasks, timeout=grace)
+        if pending:
+            logger.warning(f"⏱️ {len(pending)} job(s) still running after {grace:.0f}s, stopping them")
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*grievance_tasks, return_exceptions=True)
+        grievance_tasks.clear()
+    for task in worker_tasks:
+        task.cancel()
+    await asyncio.gather(*worker_tasks, return_exceptions=True)
+    worker_tasks.clear()
+    await asyncio.to_thread(job_store.release, started_jobs)
+    browser_pool.shutdown(wait=True)
+    await async_engine.stop()
+    await http_engine.stop()
+    ocr_pool.shutdown()
 
-with open("departments.json", "r", encoding="utf-8") as f:
-        DEPARTMENT_CONTACTS = json.load(f)
 
 @app.on_event("startup")
 async def startup_event():
     logger.info("🚀 Starting FastAPI application...")
+    start_grievance_workers(GRIEVANCE_QUEUE_WORKERS)
+    worker_tasks.append(asyncio.create_task(outbox.serve()))
+    directory_refresher.start()
 
     
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("🛑 Shutting down FastAPI application...")
     try:
-        if hasattr(thread_local, "browser") and thread_local.browser:
-            thread_local.browser.close()
-            logger.info("Browser closed")
-        if hasattr(thread_local, "playwright") and thread_local.playwright:
-            thread_local.playwright.stop()
-            logger.info("Playwright stopped")
-        executor.shutdown(wait=True)
-        logger.info("Thread pool shutdown")
+        await directory_refresher.stop()
+        for task in batch_tasks:
+            task.cancel()
+        await asyncio.gather(*batch_tasks, return_exceptions=True)
+        await stop_grievance_workers()
+        await smtp_pool.close()
     except Exception as e:
         logger.exception("Error during shutdown")
 
 
-def solve_captcha(page, max_retries: int = 10):
+# src of the captcha image if the page has one in the DOM already, without waiting for it
+_CAPTCHA_SRC_JS = """() => document.querySelector("img[alt='captcha']")?.getAttribute("src") || null"""
+
+
+def prefetch_captcha(page):
+    """
+    Start OCR on the captcha the form already carries, so the rest of the form
+    is filled while an OCR process reads it. Returns (src, future) or None.
+    """
+    captcha_src = page.evaluate(_CAPTCHA_SRC_JS)
+    captcha_bytes = decode_captcha_src(captcha_src)
+    future = ocr_pool.prefetch(captcha_bytes) if captcha_bytes else None
+    return (captcha_src, future) if future else None
+
+
+def solve_captcha(page, max_retries: int = 10, prefetched=None):
     """
-    Try to solve captcha with OCR. Retry if OCR fails.
+    Try to solve captcha with OCR. Retry if OCR fails. `prefetched` is
+    prefetch_captcha()'s result; used if the captcha has not changed since.
     """
     for attempt in range(1, max_retries + 1):
         try:
             logger.info(f"🔄 Captcha attempt {attempt}/{max_retries}")
 
             captcha_src = page.locator("img[alt='captcha']").get_attribute("src")
-            if not captcha_src or not captcha_src.startswith("data:image/png;base64,"):
+            captcha_bytes = decode_captcha_src(captcha_src)
+            if not captcha_bytes:
                 logger.error("❌ Captcha image not found")
                 return None
 
-            # Decode base64 image
-            captcha_base64 = captcha_src.split(",")[1]
-            captcha_bytes = base64.b64decode(captcha_base64)
-
-            # Preprocess image
-            captcha_img = Image.open(BytesIO(captcha_bytes)).convert("L")
-            captcha_img = ImageOps.autocontrast(captcha_img)
-
-            img_cv = np.array(captcha_img)
-            _, img_cv = cv2.threshold(img_cv, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-            kernel = np.ones((2, 2), np.uint8)
-            img_cv = cv2.morphologyEx(img_cv, cv2.MORPH_OPEN, kernel)
-            processed_img = Image.fromarray(img_cv)
-
-            # OCR with multiple configs
-            configs = [
-                "--psm 8 -c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789",
-                "--psm 7",
-                "--psm 6",
-            ]
-            guesses = []
-            for cfg in configs:
-                text = pytesseract.image_to_string(processed_img, config=cfg).strip()
-                if text:
-                    guesses.append(text)
-
-            captcha_text = max(guesses, key=len) if guesses else ""
+            ahead = None
+            if prefetched:
+                if prefetched[0] == captcha_src:
+                    ahead = prefetched[1]
+                else:
+                    prefetched[1].cancel()
+                prefetched = None
+            captcha_text, candidates = ocr_pool.read(captcha_bytes, ahead)
 
+            guesses = [(c.text, round(c.score)) for c in candidates]
             logger.info(f"🔍 Captcha guesses: {guesses} | Picked: '{captcha_text}'")
 
             if captcha_text:
                 page.fill("input[name='captchaName']", captcha_text)
 
                 # Click submit to check if captcha passes
-                page.get_by_role("button", name="Submit").click()
-                page.wait_for_timeout(3000)
+                with observe_step("submit"):
+                    submit_and_wait_for_verdict(page, page.get_by_role("button", name="Submit"))
 
                 # Detect if captcha was accepted or rejected
                 if not page.locator("img[alt='captcha']").is_visible():
+                    record_captcha_result(captcha_bytes, captcha_text, accepted=True, candidates=candidates)
+                    CAPTCHA_ATTEMPTS.labels(outcome="accepted").inc()
+                    CAPTCHA_SOLVES.labels(result="solved").inc()
                     logger.info("✅ Captcha solved successfully")
                     logger.info("Grievance submitted successfully ✅")
                     return captcha_text
                 else:
+                    record_captcha_result(captcha_bytes, captcha_text, accepted=False, candidates=candidates)
+                    CAPTCHA_ATTEMPTS.labels(outcome="rejected").inc()
                     logger.warning("⚠️ Captcha rejected, retrying...")
 
                     # Reload captcha for retry
                     page.click("img[alt='captcha']")
-                    page.wait_for_timeout(1500)
+                    wait_for_captcha_reload(page, captcha_src)
 
             else:
+                CAPTCHA_ATTEMPTS.labels(outcome="empty").inc()
                 logger.warning("⚠️ Empty captcha guess, retrying...")
 
+        except CaptchaVerdictTimeout:
+            # Submitted, outcome unknown: another attempt could file the grievance twice
+            CAPTCHA_ATTEMPTS.labels(outcome="timeout").inc()
+            raise
         except Exception as e:
+            CAPTCHA_ATTEMPTS.labels(outcome="error").inc()
             logger.exception(f"Error during captcha attempt {attempt}")
 
     # If all retries fail, return a fallback
-    fallback = "".join(random.choices(string.ascii_letters + string.digits, k=5))
+    fallback = fallback_captcha()
+    CAPTCHA_SOLVES.labels(result="fallback").inc()
     logger.error(f"❌ All captcha attempts failed, using fallback: {fallback}")
     page.fill("input[name='captchaName']", fallback)
     return fallback
 
 
-#forward the complaint using email
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from dotenv import load_dotenv
-
-load_dotenv()
-
-SMTP_SERVER = "smtp.gmail.com"
-SMTP_PORT = 587
-SMTP_USER = os.getenv("SMTP_USER")  # set in env
-SMTP_PASS = os.getenv("SMTP_PASS")  # app password / key
-
-def send_email(to_email: str, subject: str, body: str):
-    """Send email via SMTP"""
+async def store_email(
+    to_email: str,
+    subject: str,
+    body: str,
+    dedupe_key: Optional[str] = None,
+    batch_id: Optional[str] = None
+):
+    """Queue an email in the outbox, or hold it for its bulk upload's digest (off the loop, retried while locked)."""
+    if batch_id is not None:
+        await retry_db(outbox.hold, f"batch:{batch_id}", to_email, subject, body, dedupe_key,
+                       what=f"Holding email to {to_email}")
+    elif await retry_db(outbox.enqueue, to_email, subject, body, dedupe_key, what=f"Queueing email to {to_email}"):
+        outbox.wake()
+
+
+async def queue_email(
+    to_email: str,
+    subject: str,
+    body: str,
+    dedupe_key: Optional[str] = None,
+    batch_id: Optional[str] = None
+) -> bool:
+    """
+    store_email for a grievance job, whose portal submission is over by
+    then: a failure is logged and reported as False, never raised, so a filed
+    grievance is not marked failed (and re-filed by a client retry) over an email.
+    """
     try:
-        msg = MIMEMultipart()
-        msg["From"] = SMTP_USER
-        msg["To"] = to_email
-        msg["Subject"] = subject
-        msg.attach(MIMEText(body, "plain"))
-
-        with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
-            server.starttls()
-            server.login(SMTP_USER, SMTP_PASS)
-            server.sendmail(SMTP_USER, to_email, msg.as_string())
-
-        logger.info(f"📧 Email sent successfully to {to_email}")
-        return True
-    except Exception as e:
-        logger.exception(f"❌ Failed to send email to {to_email}")
+        await store_email(to_email, subject, body, dedupe_key, batch_id)
+    except Exception:
+        logger.exception(f"Could not queue email '{subject}' to {to_email}")
         return False
+    return True
+
+
+async def forward_to_department(
+    issue_text: str,
+    grievance_location: Optional[str],
+    grievance_type: Optional[str],
+    ulb: str,
+    user_name: str,
+    user_mobile: str,
+    user_email: str,
+    dedupe_key: Optional[str] = None,
+    batch_id: Optional[str] = None
+):
+    """Forward a grievance accepted by the portal to the department email; False if it could not be queued."""
+    dept_contact = directory.department_contact(ulb)
+    if dept_contact and dept_contact.get("email"):
+        subject = f"New Grievance Raised - {grievance_type or 'General'}"
+        body = (
+            f"A new grievance has been submitted.\n\n"
+            f"Description: {issue_text}\n"
+            f"Location: {grievance_location}\n"
+            f"Type: {grievance_type}\n"
+            f"ULB: {ulb}\n\n"
+            f"User Details:\n"
+            f"Name: {user_name}\n"
+            f"Mobile: {user_mobile}\n"
+            f"Email: {user_email}\n"
+        )
+        return await queue_email(dept_contact["email"], subject, body, dedupe_key=dedupe_key, batch_id=batch_id)
+    return True
 
 def automate_grievance(
     issue_text: str,
@@ -208,367 +335,168 @@ def automate_grievance(
     user_mobile: str,
     user_email: str
 ):
-    browser = get_browser()
-    #hardcoded location, we can make it dynamic by fetching user's location
-    context = browser.new_context(
-        permissions=["geolocation"],
-        geolocation={"latitude": 23.36, "longitude": 85.33},  
-        locale="en-US"
-    )
-    page = context.new_page()
-
+    context = None
     try:
-        logger.info("Navigating to grievance portal...")
-        page.goto("https://jharkhandegovernance.com/grievance/main", timeout=60000)
-
-        logger.info("Clicking 'Register Grievance Now'")
-        page.get_by_role("button", name="Register Grievance Now").click()
-
-        logger.info("Acknowledging form")
-        page.get_by_role("checkbox").click()
-        page.wait_for_selector("button:has-text('Continue'):not([disabled])")
-        page.get_by_role("button", name="Continue").click()
-
-        logger.info(f"Selecting ULB: {ulb}")
-        page.select_option("select[name='ulb']", label=ulb)
-        page.get_by_role("button", name="Next").click()
-
-        logger.info("Filling grievance description")
-        page.fill("textarea[name='complaintDescription']", issue_text)
-        page.get_by_role("checkbox").click()
-
-        if extra_info:
-            logger.info("Adding extra info")
-            page.get_by_text("Give More Information").click()
-            if grievance_location:
-                page.fill("input[name='grievanceLocation']", grievance_location)
-            if grievance_type:
-                page.select_option("select[name='problemTypeId']", label=grievance_type)
-
-        page.get_by_role("button", name="Next").click()
-
-        logger.info("Filling user details")
-        page.fill("input[name='name']", user_name)
-        page.fill("input[name='mobileNo']", user_mobile)
-        page.get_by_role("checkbox").click()
-        page.fill("input[name='email']", user_email)
-
-        page.get_by_role("button", name="Next").click()
-
-        logger.info("Handling captcha with auto-retry OCR")
-        solve_captcha(page, max_retries=10)
+        session = warm_pages.take()
+        if session:
+            logger.info("♨️ Starting from a pre-warmed context")
+        else:
+            with observe_step("navigate"):
+                session = open_form_entry(get_browser())
+        context, page = session.context, session.page
+
+        with observe_step("ulb_select"):
+            logger.info(f"Selecting ULB: {ulb}")
+            page.select_option("select[name='ulb']", label=ulb)
+            page.get_by_role("button", name="Next").click()
+
+        with observe_step("form_fill"):
+            logger.info("Filling grievance description")
+            page.fill("textarea[name='complaintDescription']", issue_text)
+            # The form is rendered: OCR its captcha while this thread fills in the rest
+            prefetched = prefetch_captcha(page)
+            page.get_by_role("checkbox").click()
+
+            if extra_info:
+                logger.info("Adding extra info")
+                page.get_by_text("Give More Information").click()
+                if grievance_location:
+                    page.fill("input[name='grievanceLocation']", grievance_location)
+                if grievance_type:
+                    page.select_option("select[name='problemTypeId']", label=grievance_type)
+
+            page.get_by_role("button", name="Next").click()
+
+            logger.info("Filling user details")
+            page.fill("input[name='name']", user_name)
+            page.fill("input[name='mobileNo']", user_mobile)
+            page.get_by_role("checkbox").click()
+            page.fill("input[name='email']", user_email)
+
+            page.get_by_role("button", name="Next").click()
+
+        with observe_step("captcha"):
+            logger.info("Handling captcha with auto-retry OCR")
+            solve_captcha(page, max_retries=10, prefetched=prefetched)
 
         # page.fill("input[name='captchaName']", captcha_text)
 
         # logger.info("Submitting grievance form")
         # page.get_by_role("button", name="Submit").click()
 
-        page.wait_for_timeout(5000)
+        wait_for_idle(page)
         page.close()
         context.close()
 
-        # ✅ Forward complaint to department email
-        dept_contact = DEPARTMENT_CONTACTS.get(ulb)
-        if dept_contact and dept_contact.get("email"):
-            subject = f"New Grievance Raised - {grievance_type or 'General'}"
-            body = (
-                f"A new grievance has been submitted.\n\n"
-                f"Description: {issue_text}\n"
-                f"Location: {grievance_location}\n"
-                f"Type: {grievance_type}\n"
-                f"ULB: {ulb}\n\n"
-                f"User Details:\n"
-                f"Name: {user_name}\n"
-                f"Mobile: {user_mobile}\n"
-                f"Email: {user_email}\n"
-            )
-            send_email(dept_contact["email"], subject, body)
-
         # logger.info("Grievance submitted successfully ✅")
-        return {"status": "success", "message": "Grievance submitted & forwarded to department"}
+        logger.info(f"🌐 Network savings: {session.network.as_dict()}")
+        return {
+            "status": "success",
+            "message": "Grievance submitted & forwarded to department",
+            "network": session.network.as_dict(),
+        }
 
     except Exception as e:
         logger.exception("Error during grievance automation")
-        context.close()
+        if context:
+            context.close()
         return {"status": "error", "message": str(e)}
 
-#ulb options
-ULB_OPTIONS = {
-    "JNP1": "Jugsalai Nagar Parishad",
-    "CMC": "Chas Municipal Corporation",
-    "PNP1": "Phusro Nagar Parishad",
-    "BNP3": "Bachra Nagar Panchayat",
-    "CNP4": "Chatra Nagar Parishad",
-    "DNN": "Deoghar Municipal Corporation",
-    "MNP3": "Madhupur Nagar Parishad",
-    "CNP3": "Chirkunda Nagar Parishad",
-    "DMC": "Dhanbad Municipal Corporation",
-    "BNP7": "Basukinath Nagar Panchayat",
-    "DNP3": "Dumka Nagar Parishad",
-    "AMC": "Adityapur Municipal Corporation",
-    "CNP6": "Chakulia Nagar Panchayat",
-    "JNC": "Jamshedpur NAC",
-    "MMC2": "Mango Municipal Corporation",
-    "GNP1": "Garhwa Nagar Parishad",
-    "MNP4": "Manjhiaon Nagar Panchayat",
-    "NUNP": "Nagar Uttari Nagar Panchayat",
-    "BNP4": "Badaki Saraiya Nagar Panchayat",
-    "DNP2": "Dhanvar Nagar Panchayat",
-    "GMC": "Giridih Municipal Corporation",
-    "GNP3": "Godda Nagar Parishad",
-    "GNP2": "Gumla Nagar Parishad",
-    "HMC": "Hazaribagh Municipal Corporation",
-    "JNP3": "Jamtara Nagar Panchayat",
-    "MNP1": "Mihijam Nagar Parishad",
-    "KNP2": "Khunti Nagar Panchayat",
-    "DNP1": "Domchanch Nagar Panchayat",
-    "JNP2": "Jhumritilaiya Nagar Parishad",
-    "KNP3": "Koderma Nagar Panchayat",
-    "LNP2": "Latehar Nagar Panchayat",
-    "LNP": "Lohardaga Nagar Parishad",
-    "PNP2": "Pakur Nagar Parishad",
-    "BNP5": "Bishrampur Nagar Parishad",
-    "CNP1": "Chhatarpur Nagar Panchayat",
-    "HNP2": "Hussainabad Nagar Panchayat",
-    "MMC": "Medininagar Municipal Corporation",
-    "RNP": "Ramgarh Nagar Parishad",
-    "BNP6": "Bundu Nagar Panchayat",
-    "RMC": "Ranchi Municipal Corporation",
-    "BNP2": "Barharwa Nagar Panchayat",
-    "RNP2": "Rajmahal Nagar Panchayat",
-    "SNP2": "Sahibganj Nagar Parishad",
-    "KNP": "Kapali Nagar Parishad",
-    "SNP3": "Saraikela Nagar Panchayat",
-    "SNP": "Simdega Nagar Parishad",
-    "CNP2": "Chaibasa Nagar Parishad",
-    "CNP5": "Chakradharpur Nagar Parishad",
-    "UDHD": "Urban Development & Housing Dept.",
-    "DMA": "Directorate of Muncipal Administration",
-    "SUDA": "State Urban Development Agency",
-    "JSHB": "Jharkhand State Housing Board",
-    "JUIDCO": "JUIDCO",
-    "JUTCOL": "JUTCOL",
-    "RSCCL": "Ranchi Smart City Corporation Limited",
-    "MADA": "MADA",
-    "RRDA": "RRDA",
-}
-
-#grievance issue types
-ISSUE_TYPES = {
-    "TD": "Test Demo",
-    "TC": "TEST CASE",
-    "ELHP": "Electricity connection in LHP",
-    "FNR": "Fund not received",
-    "PMAY": "PMAY (LHP) Handover",
-    "HYDT": "HYDT REPARING",
-    "MR": "Motor Repairing",
-    "NBRI": "New Boring Related Issue (HYDT/MINI HYDT)",
-    "WBI": "Water Bill Related Issue",
-    "HPR": "Hand Pump Repairing",
-    "WLL": "Water Line Leakage",
-    "ST": "SEPTIC TANK",
-    "RNB": "R & B Related Issues",
-    "NHTL": "New Holding and Trade licence",
-    "NTLR": "New Trade licence and renewal",
-    "TRI": "Tax increase related issue",
-    "HTNG": "Applied but holding or trade number not generated",
-    "BPR": "Bill Paid online but receipt not generated",
-    "WNE": "Wrong Name In Bill/Error in Spelling/Address Change/Phone number change",
-    "TEST": "test",
-    "TRI2": "Tax related information",
-    "TR": "Tax Reduction",
-    "PVC": "Property Vacant/Closed",
-    "PTU": "Property Tax-Application done but not resolved",
-    "NOT": "Name/Occupier Transfer",
-    "MR2": "Measurement Related",
-    "DR": "Discount Related",
-    "BNR": "Bill Not Received",
-    "COT": "Change of Owner/Tenant",
-    "CIP": "Change In Purpose (Residential/commercial)",
-    "DIC": "Drain Is Fully Clogged",
-    "IDG": "Issue of Dump garbage",
-    "NWT": "Need Water Tanker",
-    "SNR": "Sweeping not done on road",
-    "DTV": "Door-To-Door Vehicle Not Comming",
-    "DC": "Drain Cleaning",
-    "CPT": "Cleaning Of Public Toilets",
-    "GC": "Grass Cutting",
-    "RC": "Road Cleaning",
-    "DA": "Dead Animal",
-    "GC2": "Garbage Collection",
-    "CI": "Cleaning Issue",
-    "HMLR": "High Mast Light repairing",
-    "NSLI": "New Street Light Installation",
-    "SLR": "Street Light Repairing",
-    "CWDB": "To Capture The Wandering Dogs And biting dog",
-    "TSD": "Treatment of ill / sick Dogs",
-    "CRD": "To Capture rabies dogs",
-    "CSV": "Capture stray dogs for Sterilization And Vaccination",
-    "MI": "Mosquito Infestation",
-    "RFP": "Regarding Fogging Perfomance",
-    "CRT": "Clear the road by cutting fallen trees",
-    "TCT": "Trimming / Cutting the trees branches on road side",
-    "DW": "Drain work",
-    "RW": "Road work",
-    "DMCM": "Drainage- Manhole Cover Missing",
-    "RWL": "Road-Waterlogged Due To Rain",
-    "RO": "Road-Other",
-    "MHR": "Manhole Repairing",
-    "MCR": "Manhole Cover Repairing",
-    "FR": "Footpath Renovation",
-    "IA": "Illegal Activity",
-    "PRB": "Public Road Blocked",
-    "IS": "Illegal Store",
-    "IC": "Illegal Construction",
-    "IVP": "Illegal Vehicle Parking",
-    "IPF": "ILLEGAL PIG FARMING",
-    "ICW": "Illegal connection of water from RMC water tank",
-    "ODI": "Open Defecation issue",
-    "OUI": "Open urination issue",
-    "IL": "Issue of litring",
-    "ICC": "Illegal Construction of cow shed",
-    "WBM": "Waste Building Materials on public road",
-    "IDGR": "Issue of Dump garbage on road",
-    "IBG": "Issue of burning garbage",
-    "IDGP": "Issue of Dump garbage in pond",
-    "SUP": "Single use plastic issue",
-    "NDB": "No Dustbin in business places",
-    "BPB": "Banned plastic bag issue",
-    "CMR": "Construction material is on the roadside",
-    "VCTA": "violation of Cigarettes and Other Tobacco Products Act",
-    "EF": "Encroachment free",
-    "SUP2": "Single Use Plastic",
-    "SUH": "Shelters for Urban Homeless",
-    "SUV": "Support to Urban strret Vendors",
-    "ANW": "Application is not Working",
-    "CMI": "When my certificate will issue",
-    "DN": "Documents needed",
-    "WCL": "Why certificate is late",
-    "BDR": "Regarding Birth/Death Registration",
-}
-
-department_names = {
-    "dummy": "Dummy Department",
-    "agriculture": "Department of Agriculture, Animal Husbandry & Co-operative",
-    "building_construction": "Department of Building Construction",
-    "cabinet_election": "Department of Cabinet Election",
-    "cabinet_secretariat": "Department of Cabinet Secretariat and Vigilance",
-    "commercial_taxes": "Department of Commercial Taxes",
-    "drinking_water": "Department of Drinking Water and Sanitation",
-    "energy": "Department of Energy",
-    "excise": "Department of Excise and Prohibition",
-    "finance": "Department of Finance",
-    "food_supply": "Department of Food, Public Distribution & Consumer Affairs",
-    "forest": "Department of Forest, Environment & Climate Change",
-    "health": "Department of Health, Medical Education & Family Welfare",
-    "home": "Department of Home, Jail & Disaster Management",
-    "industries": "Department of Industries",
-    "ipr": "Department of Information & Public Relations",
-    "it": "Department of Information Technology & e-Governance",
-    "law": "Department of Law",
-    "mines": "Department of Mines & Geology",
-    "panchayati_raj": "Department of Panchayati Raj",
-    "personnel": "Department of Personnel, Administrative Reforms & Rajbhasha",
-    "revenue": "Department of Revenue, Registration & Land Reforms",
-    "road_construction": "Department of Road Construction",
-    "rural_development": "Department of Rural Development",
-    "welfare": "Department of Scheduled Tribe, Scheduled Caste, Minority and Backward Class Welfare",
-    "school_edu": "Department of School Education & Literacy",
-    "tourism": "Department of Tourism, Arts, Culture, Sports & Youth Affairs",
-    "transport": "Department of Transport",
-    "urban_dev": "Department of Urban Development & Housing",
-    "water_resources": "Department of Water Resources",
-    "women_child": "Department of Women, Child Development & Social Security"
-}
-
-@app.post("/submit-grievance/")
-async def submit_grievance(
-    issue_text: str = Form(...),
-    extra_info: bool = Form(False),
-    grievance_location: Optional[str] = Form(None),
-    grievance_type: Optional[str] = Form(None),
-    ulb: str = Form(...),
-    department: str = Form(...),
-    user_name: str = Form(...),
-    user_mobile: str = Form(...),
-    user_email: str = Form(...)
+async def run_automation(
+    issue_text: str,
+    extra_info: bool,
+    grievance_location: Optional[str],
+    grievance_type: Optional[str],
+    ulb: str,
+    user_name: str,
+    user_mobile: str,
+    user_email: str
 ):
-    try:
-        loop = asyncio.get_event_loop()
-        result = await loop.run_in_executor(
-            executor,
-            automate_grievance,
-            issue_text,
-            extra_info,
-            grievance_location,
-            grievance_type,
-            ULB_OPTIONS.get(ulb, ulb),
-            user_name,
-            user_mobile,
-            user_email,
-        )
-
-        # Load contact details
-        with open("departments.json", "r", encoding="utf-8") as f:
-            departments = json.load(f)
-
-        with open("ulb_info.json", "r", encoding="utf-8") as f:
-            ULB_CONTACTS = {u["ulb_name"]: u for u in json.load(f)}
-
-        # Normalize department input
-        department = department.strip()
-        logger.info(f"Received department: '{department}'")
-
-        # Resolve department display name
-        dept_display = department_names.get(department)
-        if not dept_display:
-            # Fallback: check if department is a display name
-            dept_display = next(
-                (v for k, v in department_names.items() if v.lower() == department.lower()),
-                department
-            )
-        logger.info(f"Resolved dept_display: '{dept_display}'")
-
-        # ---------------------------
-        # ULB normalization (same pattern as department)
-        # ---------------------------
-
-        ulb = ulb.strip()
-        logger.info(f"Received ulb: '{ulb}'")
-
-        # Resolve ULB display name
-        ulb_display = ULB_OPTIONS.get(ulb)
-        if not ulb_display:
-            # Fallback: check if ulb is already a display name
-            ulb_display = next(
-                (v for k, v in ULB_OPTIONS.items() if v.lower() == ulb.lower()),
-                ulb
-            )
-        logger.info(f"Resolved ulb_display: '{ulb_display}'")
-        # Use the full ULB name for lookup in ulb_info.json
-        ulb_info = ULB_CONTACTS.get(ulb_display)
-        logger.info(f"Resolved ulb_info: {ulb_info}")
-
-        # Resolve department key for departments.json
-        dept_key = next(
-            (k for k, v in department_names.items() if v.lower() == dept_display.lower()),
-            department
-        )
-        # Use the full department name for lookup in departments.json
-        dept_info = departments.get(dept_display)  # Use full name directly
-        logger.info(f"Resolved dept_info: {dept_info}")
-
-        ulb_display = ULB_OPTIONS.get(ulb, ulb)
-        ulb_info = ULB_CONTACTS.get(ulb_display)
-
-        forwarded = []
+    """Run automate_grievance on the configured engine."""
+    args = (
+        issue_text, extra_info, grievance_location, grievance_type,
+        ulb, user_name, user_mobile, user_email,
+    )
+    engine = AUTOMATION_ENGINE
+    if engine == "http":
+        result = await http_engine.automate_grievance(*args)
+        if result.pop("fallback", False) and HTTP_FALLBACK_ENGINE != "none":
+            GRIEVANCE_RUNS.labels(engine=engine, result="fallback").inc()
+            logger.warning(f"↩️ HTTP engine failed, retrying on the {HTTP_FALLBACK_ENGINE} browser engine")
+            engine = HTTP_FALLBACK_ENGINE
+    if engine == "async":
+        result = await async_engine.automate_grievance(*args)
+    elif engine == "sync":
+        result = await browser_pool.run(automate_grievance, *args)
+    # else: http, finished above
+    GRIEVANCE_RUNS.labels(engine=engine, result=result.get("status", "error")).inc()
+    return result
+
+# Contact directory (departments.json + ulb_info.json), hot-reloaded on change
+directory = ContactDirectory(department_names, ULB_OPTIONS)
+directory_refresher = DirectoryRefresher(directory)
+
+async def process_grievance(
+    issue_text: str,
+    extra_info: bool,
+    grievance_location: Optional[str],
+    grievance_type: Optional[str],
+    ulb: str,
+    department: str,
+    user_name: str,
+    user_mobile: str,
+    user_email: str,
+    job_id: Optional[str] = None,
+    batch_id: Optional[str] = None
+):
+    """
+    Run one grievance job: portal automation, then forward it by email.
+    Emails are keyed by job id so a re-run job does not queue them twice;
+    jobs of a bulk upload (batch_id) hold them for the batch's digest.
+    """
+    # Exact portal label for the ULB <select>, free-text input resolved fuzzily
+    portal_ulb, _ = directory.resolve_ulb(ulb)
+    result = await run_automation(
+        issue_text,
+        extra_info,
+        grievance_location,
+        grievance_type,
+        portal_ulb,
+        user_name,
+        user_mobile,
+        user_email,
+    )
 
-        # Send grievance to Department
-        if dept_info and dept_info.get("email"):
-            send_email(
-                to_email=dept_info["email"],
-                subject=f"New Grievance Raised - {dept_display}",
-                body=f"""
+    unqueued = []
+    if result.get("status") == "success":
+        if not await forward_to_department(
+            issue_text, grievance_location, grievance_type, portal_ulb, user_name, user_mobile, user_email,
+            dedupe_key=f"{job_id}:portal-department" if job_id else None,
+            batch_id=batch_id,
+        ):
+            unqueued.append("portal-department")
+
+    # Resolve department / ULB from the in-memory contact directory
+    department = department.strip()
+    logger.info(f"Received department: '{department}'")
+    dept_display, dept_info = directory.resolve_department(department)
+    logger.info(f"Resolved dept_display: '{dept_display}'")
+    logger.info(f"Resolved dept_info: {dept_info}")
+
+    ulb = ulb.strip()
+    logger.info(f"Received ulb: '{ulb}'")
+    ulb_display, ulb_info = directory.resolve_ulb(ulb)
+    logger.info(f"Resolved ulb_display: '{ulb_display}'")
+    logger.info(f"Resolved ulb_info: {ulb_info}")
+
+    forwarded = []
+
+    # Send grievance to Department
+    if dept_info and dept_info.get("email"):
+        queued = await queue_email(
+            to_email=dept_info["email"],
+            subject=f"New Grievance Raised - {dept_display}",
+            body=f"""
 Dear {dept_display},
 
 A new grievance has been raised.
@@ -583,16 +511,21 @@ A new grievance has been raised.
 
 Regards,  
 Jharkhand Civic Issue Automation System
-"""
-            )
+""",
+            dedupe_key=f"{job_id}:department" if job_id else None,
+            batch_id=batch_id
+        )
+        if queued:
             forwarded.append(f"Department: {dept_display}")
-
-        # Send grievance to ULB
-        if ulb_info and ulb_info.get("email"):
-            send_email(
-                to_email=ulb_info["email"],
-                subject=f"New Grievance Raised - {ulb_display}",
-                body=f"""
+        else:
+            unqueued.append("department")
+
+    # Send grievance to ULB
+    if ulb_info and ulb_info.get("email"):
+        queued = await queue_email(
+            to_email=ulb_info["email"],
+            subject=f"New Grievance Raised - {ulb_display}",
+            body=f"""
 Dear {ulb_display},
 
 A new grievance has been raised.
@@ -607,15 +540,20 @@ A new grievance has been raised.
 
 Regards,  
 Jharkhand Civic Issue Automation System
-"""
-            )
+""",
+            dedupe_key=f"{job_id}:ulb" if job_id else None,
+            batch_id=batch_id
+        )
+        if queued:
             forwarded.append(f"ULB: {ulb_display}")
-
-        # Send confirmation to user
-        send_email(
-            to_email=user_email,
-            subject="✅ Your Grievance Has Been Submitted",
-            body=f"""
+        else:
+            unqueued.append("ulb")
+
+    # Send confirmation to user
+    confirmed = await queue_email(
+        to_email=user_email,
+        subject="✅ Your Grievance Has Been Submitted",
+        body=f"""
 Hello {user_name},
 
 Your grievance has been successfully submitted and forwarded to:
@@ -632,19 +570,358 @@ Thank you for helping improve civic services in Jharkhand!
 
 Regards,  
 Jharkhand Civic Issue Automation System
-"""
+""",
+        dedupe_key=f"{job_id}:user-confirmation" if job_id else None,
+        batch_id=batch_id
+    )
+
+    result["forwarded_to"] = forwarded
+    result["confirmation_sent_to_user"] = confirmed
+    if not confirmed:
+        unqueued.append("user-confirmation")
+    if unqueued:
+        # The grievance stands; these emails were lost and need resending by hand
+        result["emails_not_queued"] = unqueued
+    result["department_name"] = dept_display if dept_info else "N/A"
+    result["ulb_name"] = ulb_display if ulb_info else "N/A"
+
+    return result
+
+
+async def keep_lease(job_id: str):
+    """Heartbeat a claimed job's lease until cancelled (or until it is lost)."""
+    interval = job_store.lease_seconds / 3
+    delay = interval
+    while True:
+        await asyncio.sleep(delay)
+        try:
+            held = await asyncio.to_thread(job_store.heartbeat, job_id)
+        except Exception:
+            # Keep trying well inside the lease, or another worker will re-run the job
+            logger.exception(f"Heartbeat for job {job_id} failed, retrying")
+            delay = min(1.0, interval)
+            continue
+        if not held:
+            logger.warning(f"⚠️ Lost the lease on job {job_id}, another worker may re-run it")
+            return
+        delay = interval
+
+
+async def run_job(worker_id: int, job: dict):
+    """Run one claimed job under a heartbeat and record its outcome."""
+    job_id = job["id"]
+    started_jobs.add(job_id)
+    logger.info(f"⚙️ Worker {worker_id} running job {job_id} (attempt {job['attempts']})")
+    heartbeat = asyncio.create_task(keep_lease(job_id))
+    try:
+        try:
+            result = await process_grievance(**job["payload"], job_id=job_id)
+            status, error = (SUCCEEDED if result.get("status") == "success" else FAILED), None
+        except asyncio.CancelledError:
+            # Still running past the drain deadline: the portal may already have it, so don't re-run it
+            await retry_db(
+                job_store.finish, job_id, FAILED, None, "Worker stopped mid-submission; the portal may have it",
+                what=f"Recording interrupted job {job_id}", deadline=job_store.lease_seconds / 2,
+            )
+            started_jobs.discard(job_id)
+            raise
+        except Exception as e:
+            logger.exception(f"Job {job_id} failed")
+            result, status, error = None, FAILED, str(e)
+        await retry_db(
+            job_store.finish, job_id, status, result, error,
+            what=f"Recording job {job_id}", deadline=job_store.lease_seconds / 2,
         )
+        started_jobs.discard(job_id)
+    finally:
+        heartbeat.cancel()
+
+
+async def track_queue_depth():
+    """Refresh JOB_QUEUE_DEPTH from the store in a thread, so a metrics scrape never waits on SQLite."""
+    while True:
+        try:
+            JOB_QUEUE_DEPTH.set(await asyncio.to_thread(job_store.count, QUEUED))
+        except Exception as e:
+            logger.warning(f"⚠️ Could not read the job queue depth ({e})")
+        await asyncio.sleep(QUEUE_DEPTH_SECONDS)
+
+
+async def grievance_worker(worker_id: int):
+    """Background worker draining queued grievance jobs until workers_stopping is set."""
+    backoff = QUEUE_POLL_SECONDS
+    while not workers_stopping.is_set():
+        try:
+            job = await asyncio.to_thread(job_store.claim_next, GRIEVANCE_JOB)
+        except Exception:
+            logger.exception(f"Worker {worker_id} could not claim a job, retrying in {backoff:.0f}s")
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30)
+            continue
+        backoff = QUEUE_POLL_SECONDS
+
+        if job is None:
+            job_wakeup.clear()
+            try:
+                await asyncio.wait_for(job_wakeup.wait(), timeout=QUEUE_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            continue
+
+        try:
+            await run_job(worker_id, job)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # The outcome could not be recorded; the job stays leased to us and is not released
+            logger.exception(f"Worker {worker_id} could not record job {job['id']}")
+
+
+async def duplicate_of(key: str) -> Optional[tuple]:
+    """
+    (job, cached (job id, content key)) a cached key points at, unless the
+    job failed (a retry should run again). The cache entry is returned as
+    read: it may expire while the job is looked up.
+    """
+    cached = recent_submissions.get(key)
+    if cached is None:
+        return None
+    job = await retry_db(job_store.get, cached[0], what=f"Looking up job {cached[0]}")
+    if job is None or job["status"] == FAILED:
+        recent_submissions.discard(key)
+        return None
+    return job, cached
+
+
+class IdempotencyConflict(Exception):
+    """The Idempotency-Key was already used for a different grievance."""
+
+
+async def enqueue_grievance(payload: dict, idempotency_key: Optional[str] = None) -> dict:
+    """
+    Queue one grievance job, or attach to the job already filed for the same
+    Idempotency-Key / content. Returns the job's status body (with
+    "duplicate": True for an attached one). Store calls run in a thread and
+    retry while other processes hold the database; enqueue_lock keeps two
+    identical submissions from both missing the duplicate check meanwhile.
+    """
+    async with enqueue_lock:
+        return await _enqueue_grievance(payload, idempotency_key)
 
-        result["forwarded_to"] = forwarded
-        result["confirmation_sent_to_user"] = True
-        result["department_name"] = dept_display if dept_info else "N/A"
-        result["ulb_name"] = ulb_display if ulb_info else "N/A"
 
-        return result
+async def _enqueue_grievance(payload: dict, idempotency_key: Optional[str]) -> dict:
+    # A retried or repeated submission attaches to the job already filed
+    content_key = "fp:" + fingerprint(
+        payload["issue_text"], directory.resolve_ulb(payload["ulb"])[0], payload["user_mobile"], payload["grievance_type"]
+    )
+    request_key = f"idem:{idempotency_key}" if idempotency_key else None
+    for match, key in (("idempotency_key", request_key), ("fingerprint", content_key)):
+        if key is None or (found := await duplicate_of(key)) is None:
+            continue
+        job, (_, cached_content_key) = found
+        if match == "idempotency_key" and cached_content_key != content_key:
+            raise IdempotencyConflict("Idempotency-Key was already used for a different grievance")
+        if request_key and match == "fingerprint":
+            recent_submissions.put(request_key, (job["id"], content_key))
+        DUPLICATE_SUBMISSIONS.labels(match=match).inc()
+        logger.info(f"🔂 Duplicate submission ({match}) attached to job {job['id']}")
+        return {
+            "status": job["status"],
+            "job_id": job["id"],
+            "status_url": f"/grievances/{job['id']}",
+            "duplicate": True,
+            "result": job["result"],
+        }
+
+    job_id = await retry_db(job_store.enqueue, GRIEVANCE_JOB, payload, what="Queueing a grievance job")
+    recent_submissions.put(content_key, (job_id, content_key))
+    if request_key:
+        recent_submissions.put(request_key, (job_id, content_key))
+    job_wakeup.set()
+    return {"status": QUEUED, "job_id": job_id, "status_url": f"/grievances/{job_id}"}
 
+
+@app.post("/submit-grievance/", status_code=202)
+async def submit_grievance(
+    issue_text: str = Form(...),
+    extra_info: bool = Form(False),
+    grievance_location: Optional[str] = Form(None),
+    grievance_type: Optional[str] = Form(None),
+    ulb: str = Form(...),
+    department: str = Form(...),
+    user_name: str = Form(...),
+    user_mobile: str = Form(...),
+    user_email: str = Form(...),
+    idempotency_key: Optional[str] = Header(None)
+):
+    try:
+        body = await enqueue_grievance({
+            "issue_text": issue_text,
+            "extra_info": extra_info,
+            "grievance_location": grievance_location,
+            "grievance_type": grievance_type,
+            "ulb": ulb,
+            "department": department,
+            "user_name": user_name,
+            "user_mobile": user_mobile,
+            "user_email": user_email,
+        }, idempotency_key)
+        return JSONResponse(status_code=200, content=body) if body.get("duplicate") else body
+
+    except IdempotencyConflict as e:
+        return JSONResponse(status_code=422, content={"status": "error", "message": str(e)})
     except Exception as e:
         logger.exception("Internal Server Error while handling request")
-        return {"status": "error", "message": f"Internal Server Error: {str(e)}"}
+        return JSONResponse(
+            status_code=500,
+            content={"status": "error", "message": f"Internal Server Error: {str(e)}"}
+        )
+
+
+async def run_batch(batch_id: str, upload: UploadStream, idempotency_key: Optional[str], lines: asyncio.Queue):
+    """
+    Enqueue every row of an upload as a grievance job (the same path as
+    /submit-grievance/), follow the jobs until each has finished, then queue
+    the batch's digest emails. Keeps going if the client disconnects.
+    """
+    pending = {}  # job id -> row numbers waiting for its outcome
+    counts = {SUCCEEDED: 0, FAILED: 0, "rejected": 0}
+    reading = True
+
+    async def follow():
+        while reading or pending:
+            await asyncio.sleep(QUEUE_POLL_SECONDS)
+            try:
+                jobs = await retry_db(job_store.get_many, list(pending), what=f"Following batch {batch_id}")
+            except Exception:
+                # Rows still pending are picked up on a later poll
+                logger.exception(f"Batch {batch_id} could not read its jobs, retrying")
+                continue
+            for job in jobs:
+                if job["status"] not in (SUCCEEDED, FAILED):
+                    continue
+                for number in pending.pop(job["id"]):
+                    counts[job["status"]] += 1
+                    lines.put_nowait({
+                        "row": number, "job_id": job["id"], "status": job["status"],
+                        "result": job["result"], "error": job["error"],
+                    })
+
+    feeder = asyncio.create_task(upload.feed())
+    follower = asyncio.create_task(follow())
+    try:
+        try:
+            await upload.started.wait()
+            logger.info(f"📦 Batch {batch_id} started from '{upload.filename or upload.content_type}'")
+            rows = iter_rows(io.BufferedReader(upload), upload.filename, upload.content_type)
+            while (item := await asyncio.to_thread(next, rows, None)) is not None:
+                number, payload = item
+                try:
+                    if isinstance(payload, str):
+                        raise ValueError(payload)
+                    # Re-sending the same upload with the same key attaches every row to its job
+                    row_key = f"{idempotency_key}:{number}" if idempotency_key else None
+                    queued = await enqueue_grievance({**payload, "batch_id": batch_id}, row_key)
+                except (ValueError, IdempotencyConflict) as e:
+                    counts["rejected"] += 1
+                    lines.put_nowait({"row": number, "status": "error", "message": str(e)})
+                    continue
+                pending.setdefault(queued["job_id"], []).append(number)
+                lines.put_nowait({"row": number, **queued})
+        except Exception as e:
+            logger.exception(f"Batch {batch_id} upload could not be parsed")
+            lines.put_nowait({"row": None, "status": "error", "message": f"Unreadable upload: {e}"})
+        finally:
+            reading = False
+            feeder.cancel()
+        await follower
+    finally:
+        follower.cancel()
+        # Held emails of jobs that finish after a shutdown go out with the outbox's stale-digest sweep
+        emails = await asyncio.to_thread(outbox.flush_digest, f"batch:{batch_id}")
+        if emails:
+            outbox.wake()
+        logger.info(f"📦 Batch {batch_id} finished: {counts}, {emails} digest email(s) queued")
+        lines.put_nowait({"summary": {"batch_id": batch_id, **counts, "emails_queued": emails}})
+        lines.put_nowait(None)
+
+
+@app.post("/submit-grievances/batch")
+async def submit_grievances_batch(request: Request, idempotency_key: Optional[str] = Header(None)):
+    """
+    Bulk submission from a CSV (header row) or JSONL upload with the same
+    fields as /submit-grievance/: a multipart form with a "file" field, or
+    the file as the raw body (Content-Type text/csv / application/x-ndjson).
+    The body is parsed while it arrives, never spooled, and every row becomes
+    a grievance job for the queue workers. NDJSON is streamed back: one line
+    per row when it is queued (job id), one when its job has finished, then a
+    summary line. Emails are sent as one digest per recipient once every
+    job of the batch has finished.
+    """
+    batch_id = uuid.uuid4().hex
+    upload = UploadStream(request)
+    lines = asyncio.Queue()
+    task = asyncio.create_task(run_batch(batch_id, upload, idempotency_key, lines))
+    batch_tasks.add(task)
+    task.add_done_callback(batch_tasks.discard)
+
+    async def results():
+        while (line := await lines.get()) is not None:
+            yield json.dumps(line) + "\n"
+
+    return UploadStreamingResponse(results(), upload, media_type="application/x-ndjson")
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus scrape endpoint."""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+@app.get("/directory/status")
+async def directory_status():
+    """Last scheduled contact refresh: when, how long, what changed."""
+    snap = directory.snapshot
+    return {
+        **directory_refresher.status,
+        "departments": len(snap.departments),
+        "ulbs": len(snap.ulbs),
+    }
+
+
+@app.get("/outbox/dead-letters")
+async def list_dead_letters(limit: int = 100):
+    """Emails that exhausted their retries."""
+    return {"dead_letters": outbox.dead_letters(limit)}
+
+
+@app.post("/outbox/dead-letters/{message_id}/replay")
+async def replay_dead_letter(message_id: str):
+    if not outbox.replay(message_id):
+        return JSONResponse(status_code=404, content={"status": "error", "message": "Dead letter not found"})
+    return {"status": "queued", "message_id": message_id}
+
+
+@app.get("/grievances/{job_id}")
+async def get_grievance(job_id: str):
+    try:
+        job = await retry_db(job_store.get, job_id, what=f"Looking up job {job_id}")
+    except Exception as e:
+        logger.exception(f"Could not read job {job_id}")
+        return JSONResponse(status_code=503, content={"status": "error", "message": f"Job store unavailable: {e}"})
+    if job is None:
+        return JSONResponse(status_code=404, content={"status": "error", "message": "Job not found"})
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "attempts": job["attempts"],
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"],
+        "lease_owner": job["lease_owner"],
+        "lease_expires_at": job["lease_expires_at"],
+        "result": job["result"],
+        "error": job["error"],
+    }
     
 @app.post("/submit-email/")
 async def submit_email(
@@ -658,55 +935,24 @@ async def submit_email(
     user_email: str = Form(...)
 ):
     try:
-        # Load contact details
-        with open("departments.json", "r", encoding="utf-8") as f:
-            departments = json.load(f)
-
-        with open("ulb_info.json", "r", encoding="utf-8") as f:
-            ULB_CONTACTS = {u["ulb_name"]: u for u in json.load(f)}
-
-        # Normalize department input
+        # Resolve department / ULB from the in-memory contact directory
         department = department.strip()
         logger.info(f"Received department: '{department}'")
-
-        # Resolve department display name
-        dept_display = department_names.get(department)
-        if not dept_display:
-            # Fallback: check if department is a display name
-            dept_display = next(
-                (v for k, v in department_names.items() if v.lower() == department.lower()),
-                department
-            )
+        dept_display, dept_info = directory.resolve_department(department)
         logger.info(f"Resolved dept_display: '{dept_display}'")
-
-        # Use the full department name for lookup in departments.json
-        dept_info = departments.get(dept_display)
         logger.info(f"Resolved dept_info: {dept_info}")
 
         ulb = ulb.strip()
         logger.info(f"Received ulb: '{ulb}'")
-
-        # Resolve ULB display name
-        ulb_display = ULB_OPTIONS.get(ulb)
-        if not ulb_display:
-            # Fallback: check if ulb is already a display name
-            ulb_display = next(
-                (v for k, v in ULB_OPTIONS.items() if v.lower() == ulb.lower()),
-                ulb
-            )
+        ulb_display, ulb_info = directory.resolve_ulb(ulb)
         logger.info(f"Resolved ulb_display: '{ulb_display}'")
-        # Use the full ULB name for lookup in ulb_info.json
-        ulb_info = ULB_CONTACTS.get(ulb_display)
         logger.info(f"Resolved ulb_info: {ulb_info}")
 
-        ulb_display = ULB_OPTIONS.get(ulb, ulb)
-        ulb_info = ULB_CONTACTS.get(ulb_display)
-
         forwarded = []
 
         # Send to Department
         if dept_info and dept_info.get("email"):
-            send_email(
+            await store_email(
                 to_email=dept_info["email"],
                 subject=f"New Grievance Raised - {dept_display}",
                 body=f"""
@@ -730,7 +976,7 @@ Jharkhand Civic Issue Automation System
 
         # Send to ULB
         if ulb_info and ulb_info.get("email"):
-            send_email(
+            await store_email(
                 to_email=ulb_info["email"],
                 subject=f"New Grievance Raised - {ulb_display}",
                 body=f"""
@@ -753,7 +999,7 @@ Jharkhand Civic Issue Automation System
             forwarded.append(f"ULB: {ulb_display}")
 
         # Send confirmation to user
-        send_email(
+        await store_email(
             to_email=user_email,
             subject="✅ Your Grievance Has Been Submitted",
             body=f"""
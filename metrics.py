@@ -0,0 +1,95 @@
+import time
+from contextlib import contextmanager
+
+from prometheus_client import Counter, Gauge, Histogram
+
+# Portal flow
+PORTAL_STEP_SECONDS = Histogram(
+    "grievance_portal_step_seconds",
+    "Time spent in each step of the portal flow",
+    ["step"],
+    buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120),
+)
+GRIEVANCE_RUNS = Counter(
+    "grievance_automation_runs_total",
+    "automate_grievance runs by engine and result",
+    ["engine", "result"],
+)
+DUPLICATE_SUBMISSIONS = Counter(
+    "grievance_duplicate_submissions_total",
+    "Submissions answered from an existing job (idempotency_key, fingerprint)",
+    ["match"],
+)
+PORTAL_REQUESTS = Counter(
+    "portal_requests_total",
+    "Portal sub-resource requests by outcome (blocked, cache_fresh, cache_revalidated, network)",
+    ["outcome"],
+)
+ASSET_BYTES_SAVED = Counter("portal_asset_bytes_saved_total", "Bytes served from the asset cache")
+ASSET_SECONDS_SAVED = Counter("portal_asset_seconds_saved_total", "Estimated download time saved by the asset cache")
+
+# Captcha / OCR
+OCR_SECONDS = Histogram(
+    "captcha_ocr_seconds",
+    "OCR time per recognizer config",
+    ["config"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+CAPTCHA_ATTEMPTS = Counter(
+    "captcha_attempts_total",
+    "Captcha attempts by outcome (accepted, rejected, empty, timeout, error)",
+    ["outcome"],
+)
+CAPTCHA_SOLVES = Counter(
+    "captcha_solves_total",
+    "Captcha loops by final result (solved, fallback)",
+    ["result"],
+)
+
+# Email
+SMTP_SEND_SECONDS = Histogram(
+    "smtp_send_seconds",
+    "SMTP delivery latency by result",
+    ["result"],
+    buckets=(0.1, 0.25, 0.5, 1, 2, 5, 10, 30),
+)
+
+# Capacity (values filled in through set_function by the owners of the pools)
+EXECUTOR_QUEUE_DEPTH = Gauge("browser_executor_queue_depth", "Jobs waiting for a browser worker")
+JOB_QUEUE_DEPTH = Gauge("grievance_job_queue_depth", "Grievance jobs queued in the durable store")
+ACTIVE_BROWSERS = Gauge("active_browsers", "Launched browser processes")
+ACTIVE_CONTEXTS = Gauge("active_browser_contexts", "Grievances currently being driven in a browser")
+WARM_CONTEXTS_TAKEN = Counter(
+    "warm_contexts_taken_total",
+    "Grievances started from a pre-warmed context (hit) or a cold one (miss)",
+    ["result"],
+)
+
+
+# Contact directory
+DIRECTORY_REFRESHES = Counter(
+    "directory_refreshes_total",
+    "Scheduled contact directory refreshes by result (updated, unchanged, rejected, failed)",
+    ["result"],
+)
+
+
+# Extra callbacks(step, seconds) fed by observe_step, e.g. the portal benchmark
+_step_listeners = []
+
+
+def add_step_listener(fn):
+    _step_listeners.append(fn)
+
+
+@contextmanager
+def observe_step(step: str):
+    """Context manager timing one portal step."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        PORTAL_STEP_SECONDS.labels(step=step).observe(elapsed)
+        for fn in _step_listeners:
+            fn(step, elapsed)
@@ -0,0 +1,212 @@
+"""
+Offline stand-in for the Jharkhand grievance portal, for load tests and
+benchmarks. Serves the same flow and selectors automate_grievance drives
+(Register Grievance Now -> acknowledgement -> select[name='ulb'] ->
+description / problemTypeId -> user details -> base64 PNG captcha -> Submit).
+
+    python mock_portal.py --port 8100 --latency-ms 150 --reject-rate 0.3
+    PORTAL_URL=http://127.0.0.1:8100/grievance/main python main.py
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import html
+import itertools
+import os
+import random
+import time
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse, JSONResponse, Response
+
+from bench_ocr import synthetic_captcha
+from captcha import CAPTCHA_CHARSET
+from portal_data import ISSUE_TYPES, ULB_OPTIONS
+
+# Mean added latency per request (uniform jitter of +/-50%)
+MOCK_LATENCY_MS = float(os.getenv("MOCK_LATENCY_MS", "100"))
+# Fraction of submissions rejected as a wrong captcha, whatever was typed
+MOCK_REJECT_RATE = float(os.getenv("MOCK_REJECT_RATE", "0.2"))
+# Also reject answers that don't match the generated captcha text
+MOCK_CHECK_CAPTCHA = os.getenv("MOCK_CHECK_CAPTCHA", "0") == "1"
+MOCK_CAPTCHA_LENGTH = 5
+
+app = FastAPI(title="Mock Jharkhand grievance portal")
+
+captchas = {}  # captcha id -> answer
+grievance_ids = itertools.count(1)
+stats = {"captchas": 0, "submissions": 0, "accepted": 0, "rejected": 0}
+
+
+@app.middleware("http")
+async def add_latency(request: Request, call_next):
+    if MOCK_LATENCY_MS > 0:
+        await asyncio.sleep(MOCK_LATENCY_MS / 1000 * random.uniform(0.5, 1.5))
+    return await call_next(request)
+
+
+def _options(values, placeholder):
+    return f"<option value=''>{placeholder}</option>" + "".join(
+        f"<option value='{html.escape(code)}'>{html.escape(label)}</option>" for code, label in values.items()
+    )
+
+
+PAGE = """<!doctype html>
+<html><head><meta charset="utf-8"><title>Grievance Portal (mock)</title>
+<link rel="stylesheet" href="/grievance/static/style.css">
+<script src="/grievance/static/app.js" defer></script></head>
+<body>
+<img src="/grievance/static/logo.png" alt="logo" width="40" height="40">
+<section id="home"><h1>Public Grievance</h1><button type="button" id="register">Register Grievance Now</button></section>
+<section id="ack" hidden>
+  <p>I have read the guidelines for registering a grievance.</p>
+  <label><input type="checkbox" id="ack-check"> I agree</label>
+  <button type="button" id="ack-continue" disabled>Continue</button>
+</section>
+<section id="ulb-step" hidden>
+  <select name="ulb">{ulb_options}</select>
+  <button type="button" data-next="desc-step" data-require="ulb">Next</button>
+</section>
+<section id="desc-step" hidden>
+  <textarea name="complaintDescription"></textarea>
+  <label><input type="checkbox" name="declaration"> The information is correct</label>
+  <a href="#" id="more">Give More Information</a>
+  <div id="more-info" hidden>
+    <input name="grievanceLocation">
+    <select name="problemTypeId">{type_options}</select>
+  </div>
+  <button type="button" data-next="user-step" data-require="complaintDescription">Next</button>
+</section>
+<section id="user-step" hidden>
+  <input name="name"><input name="mobileNo">
+  <label><input type="checkbox" name="consent"> Send me updates</label>
+  <input name="email">
+  <button type="button" data-next="captcha-step" data-require="name,mobileNo">Next</button>
+</section>
+<section id="captcha-step" hidden>
+  <img alt="captcha" src="" width="130" height="40">
+  <input name="captchaName">
+  <button type="button" id="submit">Submit</button>
+  <p id="captcha-error" hidden>Invalid captcha</p>
+</section>
+<section id="done" hidden><h2>Grievance registered</h2><p id="grievance-id"></p></section>
+</body></html>"""
+
+APP_JS = """
+const $ = s => document.querySelector(s);
+const field = n => document.querySelector(`[name='${n}']`);
+function show(id) {
+  document.querySelectorAll("section").forEach(s => s.hidden = s.id !== id);
+  if (id === "captcha-step") loadCaptcha();
+}
+let captchaId = null;
+async function loadCaptcha() {
+  const r = await fetch("/grievance/api/captcha");
+  const c = await r.json();
+  captchaId = c.id;
+  $("img[alt='captcha']").src = c.image;
+}
+$("#register").onclick = () => show("ack");
+$("#ack-check").onchange = e => $("#ack-continue").disabled = !e.target.checked;
+$("#ack-continue").onclick = () => show("ulb-step");
+$("#more").onclick = e => { e.preventDefault(); $("#more-info").hidden = false; };
+document.querySelectorAll("[data-next]").forEach(b => b.onclick = () => {
+  const missing = b.dataset.require.split(",").filter(n => !field(n).value);
+  if (!missing.length) show(b.dataset.next);
+});
+$("img[alt='captcha']").onclick = loadCaptcha;
+$("#submit").onclick = async () => {
+  const body = {captchaId, captchaName: field("captchaName").value};
+  ["ulb", "complaintDescription", "grievanceLocation", "problemTypeId", "name", "mobileNo", "email"]
+    .forEach(n => body[n] = field(n).value);
+  const r = await fetch("/grievance/api/grievances", {
+    method: "POST", headers: {"Content-Type": "application/json"}, body: JSON.stringify(body)});
+  const res = await r.json();
+  if (r.ok) {
+    $("#grievance-id").textContent = res.grievanceId;
+    show("done");
+  } else {
+    $("#captcha-error").hidden = false;
+    field("captchaName").value = "";
+    await loadCaptcha();
+  }
+};
+"""
+
+STYLE_CSS = "body{font-family:sans-serif;margin:2em} section{margin:1em 0} input,select,textarea{display:block;margin:.3em 0}"
+
+# 1x1 transparent PNG (blocked by the automation's interception layer anyway)
+LOGO_PNG = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg=="
+)
+
+STATIC = {
+    "app.js": ("text/javascript", APP_JS.encode("utf-8")),
+    "style.css": ("text/css", STYLE_CSS.encode("utf-8")),
+    "logo.png": ("image/png", LOGO_PNG),
+}
+
+
+@app.get("/grievance/main", response_class=HTMLResponse)
+async def portal_page():
+    return PAGE.format(
+        ulb_options=_options(ULB_OPTIONS, "Select ULB"),
+        type_options=_options(ISSUE_TYPES, "Select problem type"),
+    )
+
+
+@app.get("/grievance/static/{name}")
+async def static_asset(name: str, request: Request):
+    """Static files with an ETag, so conditional requests get a 304."""
+    if name not in STATIC:
+        return Response(status_code=404)
+    content_type, body = STATIC[name]
+    etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type=content_type, headers=headers)
+
+
+@app.get("/grievance/api/captcha")
+async def new_captcha():
+    answer = "".join(random.choices(CAPTCHA_CHARSET, k=MOCK_CAPTCHA_LENGTH))
+    png = await asyncio.to_thread(synthetic_captcha, answer)
+    captcha_id = os.urandom(8).hex()
+    captchas[captcha_id] = answer
+    stats["captchas"] += 1
+    return {"id": captcha_id, "image": "data:image/png;base64," + base64.b64encode(png).decode("ascii")}
+
+
+@app.post("/grievance/api/grievances")
+async def submit(request: Request):
+    body = await request.json()
+    stats["submissions"] += 1
+    answer = captchas.pop(body.get("captchaId"), None)
+    wrong = MOCK_CHECK_CAPTCHA and (answer is None or body.get("captchaName") != answer)
+    if wrong or random.random() < MOCK_REJECT_RATE:
+        stats["rejected"] += 1
+        return JSONResponse(status_code=400, content={"status": "rejected", "message": "Invalid captcha"})
+    stats["accepted"] += 1
+    return {"status": "accepted", "grievanceId": f"MOCK-{time.strftime('%Y%m%d')}-{next(grievance_ids):06d}"}
+
+
+@app.get("/grievance/api/stats")
+async def portal_stats():
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the mock grievance portal")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency-ms", type=float, default=MOCK_LATENCY_MS)
+    parser.add_argument("--reject-rate", type=float, default=MOCK_REJECT_RATE)
+    parser.add_argument("--check-captcha", action="store_true", default=MOCK_CHECK_CAPTCHA)
+    args = parser.parse_args()
+
+    MOCK_LATENCY_MS, MOCK_REJECT_RATE, MOCK_CHECK_CAPTCHA = args.latency_ms, args.reject_rate, args.check_captcha
+    print(f"🧪 Mock portal on http://{args.host}:{args.port}/grievance/main")
+    uvicorn.run(app, host=args.host, port=args.port)
@@ -0,0 +1,124 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from captcha import get_ocr_backend, get_template_recognizer, observe_ocr_timings, read_captcha
+from metrics import OCR_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# OCR processes shared by all browser workers / contexts (0 = OCR in the calling thread)
+OCR_PROCESSES = max(0, int(os.getenv("OCR_PROCESSES", str(min(2, os.cpu_count() or 1)))))
+
+
+def _init_worker():
+    """Load the OCR engines and glyph bank once per process, not per captcha."""
+    get_ocr_backend()
+    get_template_recognizer()
+
+
+def _read(captcha_bytes: bytes):
+    """Runs in an OCR process."""
+    # The glyph bank learns in the API process; recognize() picks up the saved file by mtime
+    timings = []
+    text, candidates = read_captcha(captcha_bytes, timings=timings)
+    # Metrics recorded here would stay in this process' registry, which nobody scrapes
+    return text, candidates, timings
+
+
+def _observed(result):
+    """Record a worker's per-config OCR times in this process; return (text, candidates)."""
+    text, candidates, timings = result
+    observe_ocr_timings(timings)
+    return text, candidates
+
+
+class OcrProcessPool:
+    """
+    Captcha OCR in a pool of spawned processes, so browser threads and the
+    event loop only wait on a future while preprocessing and Tesseract run on
+    other cores. The PNG is only a few KB, so it is simply pickled into the
+    call.
+    """
+
+    def __init__(self, processes: int = OCR_PROCESSES):
+        self.processes = processes
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                )
+                logger.info(f"🧮 Started {self.processes} OCR process(es)")
+            return self._executor
+
+    def _reset(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, captcha_bytes: bytes):
+        """Queue one captcha; returns a Future of (text, candidates, per-config timings)."""
+        return self._get_executor().submit(_read, captcha_bytes)
+
+    def prefetch(self, captcha_bytes: bytes):
+        """
+        Start OCR without waiting for it, for a thread that has other work to
+        do meanwhile; hand the returned future to read() later (or cancel it).
+        None without a pool.
+        """
+        if not self.processes:
+            return None
+        try:
+            return self.submit(captcha_bytes)
+        except BrokenProcessPool:
+            logger.exception("❌ OCR process pool broke, restarting it")
+            self._reset()
+        return None
+
+    def read(self, captcha_bytes: bytes, prefetched=None):
+        """
+        Blocking read_captcha via the pool (falls back to this thread if the
+        pool broke). With a future from prefetch(), only waits for that one.
+        """
+        if not self.processes:
+            return read_captcha(captcha_bytes)
+        with OCR_SECONDS.labels(config="process_pool").time():
+            try:
+                return _observed((prefetched or self.submit(captcha_bytes)).result())
+            except BrokenProcessPool:
+                logger.exception("❌ OCR process pool broke, restarting it")
+                self._reset()
+        return read_captcha(captcha_bytes)
+
+    async def read_async(self, captcha_bytes: bytes):
+        """read() for the event loop: other contexts keep running while OCR works."""
+        if not self.processes:
+            return await asyncio.to_thread(read_captcha, captcha_bytes)
+        with OCR_SECONDS.labels(config="process_pool").time():
+            try:
+                return _observed(await asyncio.wrap_future(self.submit(captcha_bytes)))
+            except BrokenProcessPool:
+                logger.exception("❌ OCR process pool broke, restarting it")
+                self._reset()
+        return await asyncio.to_thread(read_captcha, captcha_bytes)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=True, cancel_futures=True)
+            logger.info("OCR process pool shutdown")
+
+
+ocr_pool = OcrProcessPool()
@@ -0,0 +1,356 @@
+import asyncio
+import hashlib
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Optional
+
+from emailer import deliver_email, smtp_pool
+from job_queue import default_owner
+from sqlite_retry import retry_db
+
+logger = logging.getLogger(__name__)
+
+# Local persistent outbox for every outgoing email
+OUTBOX_DB_PATH = os.getenv("OUTBOX_DB_PATH", "outbox.db")
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+# Exponential backoff: base * 2**(attempts - 1), capped, with +/-20% jitter
+OUTBOX_BACKOFF_BASE_SECONDS = float(os.getenv("OUTBOX_BACKOFF_BASE_SECONDS", "30"))
+OUTBOX_BACKOFF_MAX_SECONDS = float(os.getenv("OUTBOX_BACKOFF_MAX_SECONDS", "3600"))
+OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", "5"))
+# Digest items not flushed by their batch within this long are sent anyway (batch cut off by a restart)
+OUTBOX_DIGEST_MAX_HOLD_SECONDS = float(os.getenv("OUTBOX_DIGEST_MAX_HOLD_SECONDS", "3600"))
+# A message another sender has been delivering for this long is assumed cut off and re-queued
+OUTBOX_CLAIM_TIMEOUT_SECONDS = float(os.getenv("OUTBOX_CLAIM_TIMEOUT_SECONDS", "600"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id               TEXT PRIMARY KEY,
+    dedupe_key       TEXT UNIQUE,
+    to_email         TEXT NOT NULL,
+    subject          TEXT NOT NULL,
+    body             TEXT NOT NULL,
+    status           TEXT NOT NULL,
+    attempts         INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at  REAL NOT NULL,
+    last_error       TEXT,
+    created_at       REAL NOT NULL,
+    sent_at          REAL,
+    claimed_by       TEXT,
+    claimed_at       REAL
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox (status, next_attempt_at);
+CREATE TABLE IF NOT EXISTS dead_letters (
+    id          TEXT PRIMARY KEY,
+    dedupe_key  TEXT,
+    to_email    TEXT NOT NULL,
+    subject     TEXT NOT NULL,
+    body        TEXT NOT NULL,
+    attempts    INTEGER NOT NULL,
+    last_error  TEXT,
+    created_at  REAL NOT NULL,
+    dead_at     REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS digest_items (
+    dedupe_key  TEXT PRIMARY KEY,
+    digest_key  TEXT NOT NULL,
+    to_email    TEXT NOT NULL,
+    subject     TEXT NOT NULL,
+    body        TEXT NOT NULL,
+    created_at  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_digest_items_key ON digest_items (digest_key, created_at);
+"""
+
+# Columns added after the first release (outbox.db files created before them)
+MIGRATIONS = {
+    "claimed_by": "ALTER TABLE outbox ADD COLUMN claimed_by TEXT",
+    "claimed_at": "ALTER TABLE outbox ADD COLUMN claimed_at REAL",
+}
+
+# Message lifecycle: pending -> sending -> sent  (or -> dead_letters after the retry limit)
+PENDING, SENDING, SENT = "pending", "sending", "sent"
+
+
+def compose_digest(items) -> tuple:
+    """(subject, body) of one message carrying every (subject, body) in items."""
+    if len(items) == 1:
+        return items[0]
+    subjects = {s for s, _ in items}
+    subject = f"{subjects.pop()} ({len(items)})" if len(subjects) == 1 else f"{len(items)} New Grievances Raised"
+    body = "\n\n----------------------------------------\n\n".join(
+        f"[{i}/{len(items)}] {s}\n{b.strip()}" for i, (s, b) in enumerate(items, 1)
+    )
+    return subject, body
+
+
+class EmailOutbox:
+    """
+    SQLite outbox drained by a background sender. The HTTP path only inserts;
+    delivery, retries with backoff and dead-lettering happen in serve().
+    """
+
+    def __init__(self, path: str = OUTBOX_DB_PATH, owner: Optional[str] = None):
+        self.path = path
+        # Tags the messages this process is sending, so other senders leave them alone
+        self.owner = owner or default_owner()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(outbox)")}
+        for column, ddl in MIGRATIONS.items():
+            if column not in columns:
+                self._conn.execute(ddl)
+        self._wakeup = asyncio.Event()
+
+    def enqueue(self, to_email: str, subject: str, body: str, dedupe_key: Optional[str] = None) -> Optional[str]:
+        """
+        Persist one message. With a dedupe_key, a message already queued (or
+        sent) under the same key is not queued again; returns None then.
+        Blocking and does not wake the sender, like flush_digest: call wake()
+        from the loop once it returns.
+        """
+        message_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT OR IGNORE INTO outbox "
+                "(id, dedupe_key, to_email, subject, body, status, next_attempt_at, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (message_id, dedupe_key, to_email, subject, body, PENDING, now, now),
+            )
+        if not cur.rowcount:
+            logger.info(f"📭 Email '{dedupe_key}' already in outbox, not queued again")
+            return None
+        logger.info(f"📮 Queued email {message_id} to {to_email}")
+        return message_id
+
+    def hold(self, digest_key: str, to_email: str, subject: str, body: str, dedupe_key: Optional[str] = None) -> bool:
+        """
+        Keep a message for the digest `digest_key` (a bulk upload) instead of
+        sending it; flush_digest() turns the held messages into one email per
+        recipient. Returns False if `dedupe_key` is already held.
+        """
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT OR IGNORE INTO digest_items (dedupe_key, digest_key, to_email, subject, body, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (dedupe_key or uuid.uuid4().hex, digest_key, to_email, subject, body, time.time()),
+            )
+        return cur.rowcount == 1
+
+    def flush_digest(self, digest_key: str) -> int:
+        """
+        Queue one message per recipient from the held items; returns how many
+        were queued. Blocking, so usually run in a thread: it does not wake the
+        sender, the caller does with wake() once back on the loop.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT * FROM digest_items WHERE digest_key = ? ORDER BY created_at", (digest_key,)
+                ).fetchall()
+                by_recipient = {}
+                for row in rows:
+                    by_recipient.setdefault(row["to_email"], []).append(row)
+                for to_email, items in by_recipient.items():
+                    subject, body = compose_digest([(r["subject"], r["body"]) for r in items])
+                    # Items held after a flush make a digest of their own, not a duplicate of this one
+                    items_hash = hashlib.sha1("\n".join(r["dedupe_key"] for r in items).encode("utf-8")).hexdigest()[:16]
+                    self._conn.execute(
+                        "INSERT OR IGNORE INTO outbox "
+                        "(id, dedupe_key, to_email, subject, body, status, next_attempt_at, created_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (uuid.uuid4().hex, f"{digest_key}:{to_email}:{items_hash}", to_email, subject, body,
+                         PENDING, now, now),
+                    )
+                self._conn.execute("DELETE FROM digest_items WHERE digest_key = ?", (digest_key,))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        if by_recipient:
+            logger.info(f"📮 Queued {len(by_recipient)} digest email(s) for {digest_key}")
+        return len(by_recipient)
+
+    def wake(self):
+        """Have the sender look for due messages now. Call from the event loop thread."""
+        self._wakeup.set()
+
+    def flush_stale_digests(self, max_hold: float = OUTBOX_DIGEST_MAX_HOLD_SECONDS) -> int:
+        """
+        Flush digests whose newest item is older than max_hold (their batch
+        never flushed them). Like flush_digest, does not wake the sender.
+        """
+        with self._lock:
+            keys = [row[0] for row in self._conn.execute(
+                "SELECT digest_key FROM digest_items GROUP BY digest_key HAVING MAX(created_at) < ?",
+                (time.time() - max_hold,),
+            )]
+        for key in keys:
+            logger.warning(f"⏱️ Digest {key} was never flushed by its batch, sending it now")
+        return sum(self.flush_digest(key) for key in keys)
+
+    def _claim_due(self, limit: int):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT * FROM outbox WHERE status = ? AND next_attempt_at <= ? "
+                    "ORDER BY next_attempt_at LIMIT ?",
+                    (PENDING, time.time(), limit),
+                ).fetchall()
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE outbox SET status = ?, claimed_by = ?, claimed_at = ? WHERE id = ?",
+                    [(SENDING, self.owner, now, r["id"]) for r in rows],
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return [dict(r) for r in rows]
+
+    def _mark_sent(self, message_id: str):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE outbox SET status = ?, attempts = attempts + 1, sent_at = ?, last_error = NULL WHERE id = ?",
+                (SENT, time.time(), message_id),
+            )
+
+    def _mark_failed(self, message: dict, error: str):
+        attempts = message["attempts"] + 1
+        with self._lock:
+            if attempts >= OUTBOX_MAX_ATTEMPTS:
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO dead_letters "
+                        "(id, dedupe_key, to_email, subject, body, attempts, last_error, created_at, dead_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (message["id"], message["dedupe_key"], message["to_email"], message["subject"],
+                         message["body"], attempts, error, message["created_at"], time.time()),
+                    )
+                    self._conn.execute("DELETE FROM outbox WHERE id = ?", (message["id"],))
+                    self._conn.execute("COMMIT")
+                except Exception:
+                    self._conn.execute("ROLLBACK")
+                    raise
+                logger.error(f"☠️ Email {message['id']} to {message['to_email']} dead-lettered after {attempts} attempts")
+                return
+            delay = min(OUTBOX_BACKOFF_MAX_SECONDS, OUTBOX_BACKOFF_BASE_SECONDS * 2 ** (attempts - 1))
+            delay *= random.uniform(0.8, 1.2)
+            self._conn.execute(
+                "UPDATE outbox SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                (PENDING, attempts, time.time() + delay, error, message["id"]),
+            )
+        logger.warning(f"⏳ Email {message['id']} failed (attempt {attempts}), retrying in {delay:.0f}s")
+
+    def requeue_sending(self, claim_timeout: float = OUTBOX_CLAIM_TIMEOUT_SECONDS) -> int:
+        """
+        Messages cut off mid-send go back to pending once their claim is
+        older than claim_timeout (the sender crashed or restarted; claims made
+        before claimed_at existed count as old). Messages a live sender, this
+        one or another process, is delivering right now are left alone.
+        """
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE outbox SET status = ?, claimed_by = NULL, claimed_at = NULL "
+                "WHERE status = ? AND (claimed_at IS NULL OR claimed_at < ?)",
+                (PENDING, SENDING, time.time() - claim_timeout),
+            )
+        return cur.rowcount
+
+    def dead_letters(self, limit: int = 100):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM dead_letters ORDER BY dead_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    def replay(self, message_id: str) -> bool:
+        """
+        Move a dead letter back to the outbox under its original id. The row
+        leaves dead_letters in the same transaction, so replaying twice (or
+        replaying a message that was in fact sent) never queues a second copy.
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT * FROM dead_letters WHERE id = ?", (message_id,)).fetchone()
+                if row is None:
+                    self._conn.execute("ROLLBACK")
+                    return False
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO outbox "
+                    "(id, dedupe_key, to_email, subject, body, status, next_attempt_at, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (row["id"], row["dedupe_key"], row["to_email"], row["subject"], row["body"],
+                     PENDING, time.time(), row["created_at"]),
+                )
+                self._conn.execute("DELETE FROM dead_letters WHERE id = ?", (message_id,))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        self._wakeup.set()
+        logger.info(f"🔁 Replaying dead-lettered email {message_id}")
+        return True
+
+    async def _deliver(self, message: dict):
+        try:
+            # Message-ID is the outbox id, so a resend after a crash mid-send is
+            # recognisable as the same message by the receiving side
+            await deliver_email(
+                message["to_email"], message["subject"], message["body"], message_id=message["id"]
+            )
+        except Exception as e:
+            await retry_db(self._mark_failed, message, f"{type(e).__name__}: {e}",
+                           what=f"Recording failed email {message['id']}")
+        else:
+            # Left 'sending' if this never succeeds: re-sent (same Message-ID) once the claim times out
+            await retry_db(self._mark_sent, message["id"], what=f"Recording sent email {message['id']}")
+            logger.info(f"📧 Email {message['id']} sent to {message['to_email']}")
+
+    async def serve(self):
+        """Background sender: deliver due messages, up to the SMTP pool size at once."""
+        backoff = OUTBOX_POLL_SECONDS
+        while True:
+            # Cleared before claiming: a wake() from here on finds the event set
+            self._wakeup.clear()
+            try:
+                requeued = await asyncio.to_thread(self.requeue_sending)
+                if requeued:
+                    logger.warning(f"♻️ Re-queued {requeued} email(s) interrupted mid-send")
+                # Flushed digests are picked up by the claim right below, no wakeup needed
+                await asyncio.to_thread(self.flush_stale_digests)
+                batch = await asyncio.to_thread(self._claim_due, smtp_pool.size)
+                backoff = OUTBOX_POLL_SECONDS
+                if batch:
+                    results = await asyncio.gather(*(self._deliver(m) for m in batch), return_exceptions=True)
+                    for message, error in zip(batch, results):
+                        if isinstance(error, Exception):
+                            logger.error(f"❌ Could not record outcome of email {message['id']}: {error}")
+                    continue
+            except Exception:
+                logger.exception(f"Outbox sender error, retrying in {backoff:.0f}s")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 60)
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=OUTBOX_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,190 @@
+"""Option labels used by the grievance portal and the contact directory."""
+
+#ulb options
+ULB_OPTIONS = {
+    "JNP1": "Jugsalai Nagar Parishad",
+    "CMC": "Chas Municipal Corporation",
+    "PNP1": "Phusro Nagar Parishad",
+    "BNP3": "Bachra Nagar Panchayat",
+    "CNP4": "Chatra Nagar Parishad",
+    "DNN": "Deoghar Municipal Corporation",
+    "MNP3": "Madhupur Nagar Parishad",
+    "CNP3": "Chirkunda Nagar Parishad",
+    "DMC": "Dhanbad Municipal Corporation",
+    "BNP7": "Basukinath Nagar Panchayat",
+    "DNP3": "Dumka Nagar Parishad",
+    "AMC": "Adityapur Municipal Corporation",
+    "CNP6": "Chakulia Nagar Panchayat",
+    "JNC": "Jamshedpur NAC",
+    "MMC2": "Mango Municipal Corporation",
+    "GNP1": "Garhwa Nagar Parishad",
+    "MNP4": "Manjhiaon Nagar Panchayat",
+    "NUNP": "Nagar Uttari Nagar Panchayat",
+    "BNP4": "Badaki Saraiya Nagar Panchayat",
+    "DNP2": "Dhanvar Nagar Panchayat",
+    "GMC": "Giridih Municipal Corporation",
+    "GNP3": "Godda Nagar Parishad",
+    "GNP2": "Gumla Nagar Parishad",
+    "HMC": "Hazaribagh Municipal Corporation",
+    "JNP3": "Jamtara Nagar Panchayat",
+    "MNP1": "Mihijam Nagar Parishad",
+    "KNP2": "Khunti Nagar Panchayat",
+    "DNP1": "Domchanch Nagar Panchayat",
+    "JNP2": "Jhumritilaiya Nagar Parishad",
+    "KNP3": "Koderma Nagar Panchayat",
+    "LNP2": "Latehar Nagar Panchayat",
+    "LNP": "Lohardaga Nagar Parishad",
+    "PNP2": "Pakur Nagar Parishad",
+    "BNP5": "Bishrampur Nagar Parishad",
+    "CNP1": "Chhatarpur Nagar Panchayat",
+    "HNP2": "Hussainabad Nagar Panchayat",
+    "MMC": "Medininagar Municipal Corporation",
+    "RNP": "Ramgarh Nagar Parishad",
+    "BNP6": "Bundu Nagar Panchayat",
+    "RMC": "Ranchi Municipal Corporation",
+    "BNP2": "Barharwa Nagar Panchayat",
+    "RNP2": "Rajmahal Nagar Panchayat",
+    "SNP2": "Sahibganj Nagar Parishad",
+    "KNP": "Kapali Nagar Parishad",
+    "SNP3": "Saraikela Nagar Panchayat",
+    "SNP": "Simdega Nagar Parishad",
+    "CNP2": "Chaibasa Nagar Parishad",
+    "CNP5": "Chakradharpur Nagar Parishad",
+    "UDHD": "Urban Development & Housing Dept.",
+    "DMA": "Directorate of Muncipal Administration",
+    "SUDA": "State Urban Development Agency",
+    "JSHB": "Jharkhand State Housing Board",
+    "JUIDCO": "JUIDCO",
+    "JUTCOL": "JUTCOL",
+    "RSCCL": "Ranchi Smart City Corporation Limited",
+    "MADA": "MADA",
+    "RRDA": "RRDA",
+}
+
+#grievance issue types
+ISSUE_TYPES = {
+    "TD": "Test Demo",
+    "TC": "TEST CASE",
+    "ELHP": "Electricity connection in LHP",
+    "FNR": "Fund not received",
+    "PMAY": "PMAY (LHP) Handover",
+    "HYDT": "HYDT REPARING",
+    "MR": "Motor Repairing",
+    "NBRI": "New Boring Related Issue (HYDT/MINI HYDT)",
+    "WBI": "Water Bill Related Issue",
+    "HPR": "Hand Pump Repairing",
+    "WLL": "Water Line Leakage",
+    "ST": "SEPTIC TANK",
+    "RNB": "R & B Related Issues",
+    "NHTL": "New Holding and Trade licence",
+    "NTLR": "New Trade licence and renewal",
+    "TRI": "Tax increase related issue",
+    "HTNG": "Applied but holding or trade number not generated",
+    "BPR": "Bill Paid online but receipt not generated",
+    "WNE": "Wrong Name In Bill/Error in Spelling/Address Change/Phone number change",
+    "TEST": "test",
+    "TRI2": "Tax related information",
+    "TR": "Tax Reduction",
+    "PVC": "Property Vacant/Closed",
+    "PTU": "Property Tax-Application done but not resolved",
+    "NOT": "Name/Occupier Transfer",
+    "MR2": "Measurement Related",
+    "DR": "Discount Related",
+    "BNR": "Bill Not Received",
+    "COT": "Change of Owner/Tenant",
+    "CIP": "Change In Purpose (Residential/commercial)",
+    "DIC": "Drain Is Fully Clogged",
+    "IDG": "Issue of Dump garbage",
+    "NWT": "Need Water Tanker",
+    "SNR": "Sweeping not done on road",
+    "DTV": "Door-To-Door Vehicle Not Comming",
+    "DC": "Drain Cleaning",
+    "CPT": "Cleaning Of Public Toilets",
+    "GC": "Grass Cutting",
+    "RC": "Road Cleaning",
+    "DA": "Dead Animal",
+    "GC2": "Garbage Collection",
+    "CI": "Cleaning Issue",
+    "HMLR": "High Mast Light repairing",
+    "NSLI": "New Street Light Installation",
+    "SLR": "Street Light Repairing",
+    "CWDB": "To Capture The Wandering Dogs And biting dog",
+    "TSD": "Treatment of ill / sick Dogs",
+    "CRD": "To Capture rabies dogs",
+    "CSV": "Capture stray dogs for Sterilization And Vaccination",
+    "MI": "Mosquito Infestation",
+    "RFP": "Regarding Fogging Perfomance",
+    "CRT": "Clear the road by cutting fallen trees",
+    "TCT": "Trimming / Cutting the trees branches on road side",
+    "DW": "Drain work",
+    "RW": "Road work",
+    "DMCM": "Drainage- Manhole Cover Missing",
+    "RWL": "Road-Waterlogged Due To Rain",
+    "RO": "Road-Other",
+    "MHR": "Manhole Repairing",
+    "MCR": "Manhole Cover Repairing",
+    "FR": "Footpath Renovation",
+    "IA": "Illegal Activity",
+    "PRB": "Public Road Blocked",
+    "IS": "Illegal Store",
+    "IC": "Illegal Construction",
+    "IVP": "Illegal Vehicle Parking",
+    "IPF": "ILLEGAL PIG FARMING",
+    "ICW": "Illegal connection of water from RMC water tank",
+    "ODI": "Open Defecation issue",
+    "OUI": "Open urination issue",
+    "IL": "Issue of litring",
+    "ICC": "Illegal Construction of cow shed",
+    "WBM": "Waste Building Materials on public road",
+    "IDGR": "Issue of Dump garbage on road",
+    "IBG": "Issue of burning garbage",
+    "IDGP": "Issue of Dump garbage in pond",
+    "SUP": "Single use plastic issue",
+    "NDB": "No Dustbin in business places",
+    "BPB": "Banned plastic bag issue",
+    "CMR": "Construction material is on the roadside",
+    "VCTA": "violation of Cigarettes and Other Tobacco Products Act",
+    "EF": "Encroachment free",
+    "SUP2": "Single Use Plastic",
+    "SUH": "Shelters for Urban Homeless",
+    "SUV": "Support to Urban strret Vendors",
+    "ANW": "Application is not Working",
+    "CMI": "When my certificate will issue",
+    "DN": "Documents needed",
+    "WCL": "Why certificate is late",
+    "BDR": "Regarding Birth/Death Registration",
+}
+
+department_names = {
+    "dummy": "Dummy Department",
+    "agriculture": "Department of Agriculture, Animal Husbandry & Co-operative",
+    "building_construction": "Department of Building Construction",
+    "cabinet_election": "Department of Cabinet Election",
+    "cabinet_secretariat": "Department of Cabinet Secretariat and Vigilance",
+    "commercial_taxes": "Department of Commercial Taxes",
+    "drinking_water": "Department of Drinking Water and Sanitation",
+    "energy": "Department of Energy",
+    "excise": "Department of Excise and Prohibition",
+    "finance": "Department of Finance",
+    "food_supply": "Department of Food, Public Distribution & Consumer Affairs",
+    "forest": "Department of Forest, Environment & Climate Change",
+    "health": "Department of Health, Medical Education & Family Welfare",
+    "home": "Department of Home, Jail & Disaster Management",
+    "industries": "Department of Industries",
+    "ipr": "Department of Information & Public Relations",
+    "it": "Department of Information Technology & e-Governance",
+    "law": "Department of Law",
+    "mines": "Department of Mines & Geology",
+    "panchayati_raj": "Department of Panchayati Raj",
+    "personnel": "Department of Personnel, Administrative Reforms & Rajbhasha",
+    "revenue": "Department of Revenue, Registration & Land Reforms",
+    "road_construction": "Department of Road Construction",
+    "rural_development": "Department of Rural Development",
+    "welfare": "Department of Scheduled Tribe, Scheduled Caste, Minority and Backward Class Welfare",
+    "school_edu": "Department of School Education & Literacy",
+    "tourism": "Department of Tourism, Arts, Culture, Sports & Youth Affairs",
+    "transport": "Department of Transport",
+    "urban_dev": "Department of Urban Development & Housing",
+    "water_resources": "Department of Water Resources",
+    "women_child": "Department of Women, Child Development & Social Security"
+}
@@ -0,0 +1,142 @@
+"""
+Event-driven waits for the portal flow.
+
+Each wait resolves as soon as the portal reacts (the submit request is
+answered or the captcha DOM changes) and is capped by the fixed sleep it
+replaces. Neither the submit endpoint nor the verdict selector is known for
+the live portal, which may reject a captcha without changing the page at all,
+so when the verdict wait runs out the page is judged the way the old code
+judged it after its 3 s sleep: the same captcha still on screen is a rejection.
+"""
+import logging
+import os
+
+from playwright.sync_api import Error as PlaywrightError, TimeoutError as PlaywrightTimeoutError
+from playwright.async_api import Error as AsyncPlaywrightError, TimeoutError as AsyncPlaywrightTimeoutError
+
+from warm_pool import PORTAL_SUBMIT_PATH
+
+logger = logging.getLogger(__name__)
+
+# Caps (ms) for each wait; defaults match the old fixed sleeps. An unchanged
+# page at the verdict cap counts as a rejected captcha
+CAPTCHA_VERDICT_TIMEOUT_MS = int(os.getenv("CAPTCHA_VERDICT_TIMEOUT_MS", "3000"))
+CAPTCHA_RELOAD_TIMEOUT_MS = int(os.getenv("CAPTCHA_RELOAD_TIMEOUT_MS", "1500"))
+FINAL_IDLE_TIMEOUT_MS = int(os.getenv("FINAL_IDLE_TIMEOUT_MS", "5000"))
+# After the submit response lands, how long the page gets to render the verdict
+CAPTCHA_SETTLE_TIMEOUT_MS = int(os.getenv("CAPTCHA_SETTLE_TIMEOUT_MS", "500"))
+
+# Elements the portal shows with its verdict (success dialog, "Invalid captcha" message)
+CAPTCHA_VERDICT_SELECTOR = os.getenv(
+    "CAPTCHA_VERDICT_SELECTOR", "#captcha-error, [role='alert'], .alert, .swal2-popup, .modal.show"
+)
+
+# What the verdict wait compares against: captcha src, submit responses, visible verdict elements
+_VERDICT_STATE_JS = """([submitPath, verdictSelector]) => {
+    const img = document.querySelector("img[alt='captcha']");
+    const submits = performance.getEntriesByType("resource")
+        .filter(e => new URL(e.name, location.href).pathname === submitPath).length;
+    const verdicts = [...document.querySelectorAll(verdictSelector)].filter(e => e.offsetParent !== null).length;
+    return {src: img ? img.getAttribute("src") : null, submits, verdicts};
+}"""
+
+# "dom" once the captcha is gone/replaced or a verdict element appeared,
+# "response" once the submit request was answered (whichever comes first)
+_VERDICT_JS = """([before, submitPath, verdictSelector]) => {
+    const img = document.querySelector("img[alt='captcha']");
+    if (!img || img.offsetParent === null || img.getAttribute("src") !== before.src) return "dom";
+    const verdicts = [...document.querySelectorAll(verdictSelector)].filter(e => e.offsetParent !== null).length;
+    if (verdicts > before.verdicts) return "dom";
+    const submits = performance.getEntriesByType("resource")
+        .filter(e => new URL(e.name, location.href).pathname === submitPath).length;
+    return submits > before.submits ? "response" : false;
+}"""
+
+# Truthy once the captcha is gone/hidden or replaced
+_CAPTCHA_CHANGED_JS = """prevSrc => {
+    const img = document.querySelector("img[alt='captcha']");
+    return !img || img.offsetParent === null || img.getAttribute("src") !== prevSrc;
+}"""
+
+
+class CaptchaVerdictTimeout(Exception):
+    """Submit was clicked and the page could not be read afterwards: the portal may or may not have the grievance."""
+
+
+def submit_and_wait_for_verdict(page, submit_button):
+    """
+    Click Submit, then return as soon as the page shows a verdict (captcha
+    hidden or replaced, a verdict element appears) or the submit request is
+    answered. If none happens within CAPTCHA_VERDICT_TIMEOUT_MS the page is
+    left for the caller to judge (the same captcha still shown: rejected);
+    raises CaptchaVerdictTimeout only if the page can no longer be read.
+    """
+    before = page.evaluate(_VERDICT_STATE_JS, [PORTAL_SUBMIT_PATH, CAPTCHA_VERDICT_SELECTOR])
+    submit_button.click()
+    arg = [before, PORTAL_SUBMIT_PATH, CAPTCHA_VERDICT_SELECTOR]
+    try:
+        verdict = page.wait_for_function(_VERDICT_JS, arg=arg, timeout=CAPTCHA_VERDICT_TIMEOUT_MS).json_value()
+    except PlaywrightTimeoutError:
+        # Last look, as after the old fixed sleep; nothing changed means the captcha was rejected
+        try:
+            verdict = page.evaluate(_VERDICT_JS, arg)
+        except PlaywrightError as e:
+            raise CaptchaVerdictTimeout(f"page unreadable {CAPTCHA_VERDICT_TIMEOUT_MS} ms after submit: {e}") from e
+        if not verdict:
+            logger.info(f"⏱️ No captcha verdict within {CAPTCHA_VERDICT_TIMEOUT_MS} ms, same captcha shown")
+    if verdict == "response":
+        try:
+            page.wait_for_function(_CAPTCHA_CHANGED_JS, arg=before["src"], timeout=CAPTCHA_SETTLE_TIMEOUT_MS)
+        except PlaywrightTimeoutError:
+            pass  # answered, captcha still shown: rejected
+
+
+def wait_for_captcha_reload(page, prev_src: str):
+    """After clicking the captcha image: return once a new captcha is shown."""
+    try:
+        page.wait_for_function(_CAPTCHA_CHANGED_JS, arg=prev_src, timeout=CAPTCHA_RELOAD_TIMEOUT_MS)
+    except PlaywrightTimeoutError:
+        logger.warning(f"⏱️ Captcha did not reload within {CAPTCHA_RELOAD_TIMEOUT_MS} ms")
+
+
+def wait_for_idle(page):
+    """Before closing: let in-flight submission requests finish."""
+    try:
+        page.wait_for_load_state("networkidle", timeout=FINAL_IDLE_TIMEOUT_MS)
+    except PlaywrightTimeoutError:
+        logger.warning(f"⏱️ Page not idle after {FINAL_IDLE_TIMEOUT_MS} ms, closing anyway")
+
+
+async def async_submit_and_wait_for_verdict(page, submit_button):
+    before = await page.evaluate(_VERDICT_STATE_JS, [PORTAL_SUBMIT_PATH, CAPTCHA_VERDICT_SELECTOR])
+    await submit_button.click()
+    arg = [before, PORTAL_SUBMIT_PATH, CAPTCHA_VERDICT_SELECTOR]
+    try:
+        handle = await page.wait_for_function(_VERDICT_JS, arg=arg, timeout=CAPTCHA_VERDICT_TIMEOUT_MS)
+        verdict = await handle.json_value()
+    except AsyncPlaywrightTimeoutError:
+        try:
+            verdict = await page.evaluate(_VERDICT_JS, arg)
+        except AsyncPlaywrightError as e:
+            raise CaptchaVerdictTimeout(f"page unreadable {CAPTCHA_VERDICT_TIMEOUT_MS} ms after submit: {e}") from e
+        if not verdict:
+            logger.info(f"⏱️ No captcha verdict within {CAPTCHA_VERDICT_TIMEOUT_MS} ms, same captcha shown")
+    if verdict == "response":
+        try:
+            await page.wait_for_function(_CAPTCHA_CHANGED_JS, arg=before["src"], timeout=CAPTCHA_SETTLE_TIMEOUT_MS)
+        except AsyncPlaywrightTimeoutError:
+            pass  # answered, captcha still shown: rejected
+
+
+async def async_wait_for_captcha_reload(page, prev_src: str):
+    try:
+        await page.wait_for_function(_CAPTCHA_CHANGED_JS, arg=prev_src, timeout=CAPTCHA_RELOAD_TIMEOUT_MS)
+    except AsyncPlaywrightTimeoutError:
+        logger.warning(f"⏱️ Captcha did not reload within {CAPTCHA_RELOAD_TIMEOUT_MS} ms")
+
+
+async def async_wait_for_idle(page):
+    try:
+        await page.wait_for_load_state("networkidle", timeout=FINAL_IDLE_TIMEOUT_MS)
+    except AsyncPlaywrightTimeoutError:
+        logger.warning(f"⏱️ Page not idle after {FINAL_IDLE_TIMEOUT_MS} ms, closing anyway")
@@ -0,0 +1,29 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+
+logger = logging.getLogger(__name__)
+
+# How long a store write keeps retrying "database is locked" (other API / worker processes)
+DB_RETRY_SECONDS = float(os.getenv("DB_RETRY_SECONDS", "60"))
+DB_RETRY_MAX_DELAY = 10.0
+
+
+async def retry_db(fn, *args, what: str, deadline: float = DB_RETRY_SECONDS):
+    """
+    Run a blocking store call in a thread, retrying with backoff while SQLite
+    reports the database busy / locked; re-raises once `deadline` seconds are up.
+    """
+    delay = 0.5
+    give_up = time.monotonic() + deadline
+    while True:
+        try:
+            return await asyncio.to_thread(fn, *args)
+        except sqlite3.OperationalError as e:
+            if time.monotonic() + delay > give_up:
+                raise
+            logger.warning(f"⚠️ {what} failed ({e}), retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, DB_RETRY_MAX_DELAY)
@@ -0,0 +1,96 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from asset_cache import ASSET_CACHE_FRESH_SECONDS, AssetCache, fresh_seconds, install_routes  # noqa: E402
+
+URL = "https://portal.example/grievance/static/app.js"
+
+
+@pytest.mark.parametrize("cache_control, expected", [
+    ("no-cache", 0),
+    ("public, max-age=0", 0),
+    ("max-age=300, no-cache", 0),
+    ("public, max-age=300", 300),
+    ('max-age="60"', 60),
+    ("max-age=soon", 0),
+    ("public", ASSET_CACHE_FRESH_SECONDS),
+    (None, ASSET_CACHE_FRESH_SECONDS),
+])
+def test_fresh_seconds(cache_control, expected):
+    headers = {"cache-control": cache_control} if cache_control else {}
+    assert fresh_seconds(headers) == expected
+
+
+class FakeResponse:
+    def __init__(self, status, headers, body=b""):
+        self.status, self.headers, self._body = status, headers, body
+
+    def body(self):
+        return self._body
+
+
+class FakeRoute:
+    def __init__(self, portal):
+        self.portal = portal
+        self.request = type("Request", (), {"url": URL, "method": "GET", "resource_type": "script", "headers": {}})()
+        self.fulfilled = None
+
+    def fetch(self, headers=None):
+        return self.portal(headers or {})
+
+    def fulfill(self, status=None, headers=None, body=None, response=None):
+        self.fulfilled = body
+
+
+def run(tmp_path, cache_control, requests=2):
+    """Request the asset `requests` times; returns the headers of each portal fetch."""
+    fetches = []
+
+    def portal(headers):
+        fetches.append(headers)
+        if headers.get("if-none-match") == '"v1"':
+            return FakeResponse(304, {"etag": '"v1"', "cache-control": cache_control})
+        return FakeResponse(200, {"etag": '"v1"', "cache-control": cache_control}, b"console.log(1)")
+
+    handlers = []
+    context = type("Context", (), {"route": lambda self, pattern, handler: handlers.append(handler)})()
+    stats = install_routes(context, AssetCache(str(tmp_path)))
+    for _ in range(requests):
+        route = FakeRoute(portal)
+        handlers[0](route)
+        assert route.fulfilled == b"console.log(1)"
+    return fetches, stats
+
+
+def test_no_cache_asset_is_revalidated(tmp_path):
+    fetches, stats = run(tmp_path, "no-cache", requests=3)
+    assert len(fetches) == 3
+    assert all(f.get("if-none-match") == '"v1"' for f in fetches[1:])
+    assert stats.cache_hits == 2
+
+
+def test_max_age_asset_is_served_fresh(tmp_path):
+    fetches, stats = run(tmp_path, "max-age=600", requests=3)
+    assert len(fetches) == 1 and stats.cache_hits == 2
+
+
+class FakeRequest:
+    def __init__(self, resource_type, url=URL, method="GET"):
+        self.resource_type, self.url, self.method = resource_type, url, method
+
+
+@pytest.mark.parametrize("blocked, resource_type, expected", [
+    (frozenset(("image", "media", "font")), "image", "block"),  # default: blocking wins
+    (frozenset(("image", "media", "font")), "script", "cache"),
+    (frozenset(("media",)), "image", "cache"),                 # unblocked images are cached
+    (frozenset(("media",)), "font", "cache"),
+    (frozenset(("media",)), "xhr", "pass"),
+])
+def test_blocking_takes_precedence_over_caching(monkeypatch, blocked, resource_type, expected):
+    import asset_cache
+    monkeypatch.setattr(asset_cache, "BLOCKED_RESOURCE_TYPES", blocked)
+    assert asset_cache._classify(FakeRequest(resource_type)) == expected
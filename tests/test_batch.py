@@ -0,0 +1,192 @@
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# main opens its stores at import time
+_scratch = tempfile.mkdtemp(prefix="test_batch_")
+os.environ.setdefault("JOB_DB_PATH", os.path.join(_scratch, "jobs.db"))
+os.environ.setdefault("OUTBOX_DB_PATH", os.path.join(_scratch, "outbox.db"))
+os.environ.setdefault("GRIEVANCE_QUEUE_WORKERS", "0")
+os.environ.setdefault("DIRECTORY_REFRESH_SECONDS", "0")
+os.environ.setdefault("QUEUE_POLL_SECONDS", "0.05")
+
+import main  # noqa: E402
+
+ROW = {
+    "issue_text": "Streetlight not working", "ulb": "Chas Municipal Corporation", "department": "Urban Development",
+    "user_name": "A", "user_mobile": "9999999999", "user_email": "a@example.com",
+}
+HEADER = "issue_text,ulb,department,user_name,user_mobile,user_email\n"
+
+
+def csv_row(**fields):
+    return ",".join({**ROW, **fields}.values()) + "\n"
+
+
+def fake_process(seen):
+    async def process_grievance(**payload):
+        seen.append(payload["issue_text"])
+        await main.queue_email("dept@example.com", "New Grievance", payload["issue_text"],
+                               dedupe_key=f"{payload['job_id']}:department", batch_id=payload.get("batch_id"))
+        return {"status": "success"}
+    return process_grievance
+
+
+async def drain_jobs():
+    """Stand-in for the queue workers: run every queued job through main.run_job."""
+    while True:
+        job = await asyncio.to_thread(main.job_store.claim_next, main.GRIEVANCE_JOB)
+        if job is None:
+            await asyncio.sleep(0.02)
+            continue
+        await main.run_job(0, job)
+
+
+def post(body, **kwargs):
+    async def go():
+        worker = asyncio.create_task(drain_jobs())
+        try:
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                response = await client.post("/submit-grievances/batch", content=body, **kwargs)
+                return [json.loads(line) for line in response.text.splitlines()]
+        finally:
+            worker.cancel()
+    return asyncio.run(go())
+
+
+def multipart(csv: str):
+    request = httpx.Request("POST", "http://test", files={"file": ("rows.csv", csv.encode(), "text/csv")})
+    return request.read(), {"Content-Type": request.headers["Content-Type"]}
+
+
+def by_row(lines):
+    rows = {}
+    for line in lines[:-1]:
+        rows.setdefault(line["row"], []).append(line)
+    return rows
+
+
+def test_rows_become_jobs_and_digest_emails(monkeypatch):
+    seen = []
+    monkeypatch.setattr(main, "process_grievance", fake_process(seen))
+    body, headers = multipart(HEADER + csv_row(issue_text="one") + ",,,,,\n" + csv_row(issue_text="two", user_mobile="8888888888"))
+    lines = post(body, headers=headers)
+
+    rows = by_row(lines)
+    assert sorted(seen) == ["one", "two"]
+    assert [line["status"] for line in rows[1]] == ["queued", "succeeded"]
+    assert rows[1][0]["job_id"] == rows[1][1]["job_id"]
+    assert rows[2] == [{"row": 2, "status": "error", "message": "missing field(s): issue_text, ulb, department, user_name, user_mobile, user_email"}]
+    summary = lines[-1]["summary"]
+    assert (summary["succeeded"], summary["failed"], summary["rejected"]) == (2, 0, 1)
+    assert summary["emails_queued"] == 1  # both rows' department emails in one digest
+
+    digest = main.outbox._conn.execute(
+        "SELECT subject, body FROM outbox WHERE dedupe_key LIKE ?", (f"batch:{summary['batch_id']}:%",)
+    ).fetchall()
+    assert len(digest) == 1 and "[2/2]" in digest[0]["body"]
+
+
+def test_resent_upload_attaches_to_the_same_jobs(monkeypatch):
+    seen = []
+    monkeypatch.setattr(main, "process_grievance", fake_process(seen))
+    body, headers = multipart(HEADER + csv_row(issue_text="idempotent row"))
+    first = post(body, headers={**headers, "Idempotency-Key": "upload-1"})
+    second = post(body, headers={**headers, "Idempotency-Key": "upload-1"})
+    assert seen == ["idempotent row"]
+    assert second[0]["duplicate"] and second[0]["job_id"] == first[0]["job_id"]
+
+
+def test_rows_are_queued_while_the_body_is_still_arriving(monkeypatch):
+    seen = []
+    monkeypatch.setattr(main, "process_grievance", fake_process(seen))
+
+    async def body():
+        yield (json.dumps({**ROW, "issue_text": "first"}) + "\n").encode()
+        # A spooling endpoint would never run row 1 before the body ends
+        for _ in range(250):
+            if seen:
+                break
+            await asyncio.sleep(0.02)
+        assert seen == ["first"]
+        yield (json.dumps({**ROW, "issue_text": "second", "user_mobile": "7777777777"}) + "\n").encode()
+
+    lines = post(body(), headers={"Content-Type": "application/x-ndjson"})
+    assert seen == ["first", "second"]
+    assert lines[-1]["summary"]["succeeded"] == 2
+
+
+def test_multipart_without_file_field(monkeypatch):
+    monkeypatch.setattr(main, "process_grievance", fake_process([]))
+    request = httpx.Request("POST", "http://test", data={"other": "x"}, files={"not_file": ("a.csv", b"x", "text/csv")})
+    lines = post(request.read(), headers={"Content-Type": request.headers["Content-Type"]})
+    assert lines[0]["row"] is None and "file" in lines[0]["message"]
+
+
+def test_concurrent_identical_submissions_queue_one_job():
+    async def go():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            form = {**ROW, "issue_text": "submitted twice at once"}
+            return await asyncio.gather(*(client.post("/submit-grievance/", data=form) for _ in range(2)))
+    responses = asyncio.run(go())
+    bodies = [r.json() for r in responses]
+    assert len({body["job_id"] for body in bodies}) == 1
+    assert sorted(r.status_code for r in responses) == [200, 202]
+
+
+def test_email_that_cannot_be_queued_does_not_fail_a_filed_grievance(monkeypatch):
+    async def run_automation(*args):
+        return {"status": "success"}
+
+    def locked(*args):
+        raise RuntimeError("outbox unavailable")
+
+    monkeypatch.setattr(main, "run_automation", run_automation)
+    monkeypatch.setattr(main.outbox, "enqueue", locked)
+    result = asyncio.run(main.process_grievance(**{**ROW, "extra_info": False, "grievance_location": None,
+                                                   "grievance_type": None}, job_id="j1"))
+    assert result["status"] == "success"
+    assert "user-confirmation" in result["emails_not_queued"]
+    assert result["confirmation_sent_to_user"] is False
+
+
+
+def test_idempotency_key_expiring_during_lookup_still_attaches(monkeypatch):
+    payload = {**ROW, "issue_text": "expires mid-lookup", "grievance_type": None}
+    first = asyncio.run(main.enqueue_grievance(payload, "key-expiring"))
+    real_get = main.job_store.get
+
+    def get_after_expiry(job_id):
+        main.recent_submissions.discard("idem:key-expiring")  # TTL ran out while the store was busy
+        return real_get(job_id)
+
+    monkeypatch.setattr(main.job_store, "get", get_after_expiry)
+    again = asyncio.run(main.enqueue_grievance(payload, "key-expiring"))
+    assert again["duplicate"] and again["job_id"] == first["job_id"]
+
+
+def test_locked_store_does_not_stop_following_the_batch(monkeypatch):
+    seen, calls = [], []
+    monkeypatch.setattr(main, "process_grievance", fake_process(seen))
+    real_get_many = main.job_store.get_many
+
+    def locked_once(job_ids):
+        calls.append(job_ids)
+        if len(calls) == 1:
+            raise sqlite3.OperationalError("database is locked")
+        return real_get_many(job_ids)
+
+    monkeypatch.setattr(main.job_store, "get_many", locked_once)
+    body, headers = multipart(HEADER + csv_row(issue_text="followed through a lock"))
+    lines = post(body, headers=headers)
+    assert [line["status"] for line in by_row(lines)[1]] == ["queued", "succeeded"]
+    assert lines[-1]["summary"]["succeeded"] == 1
@@ -0,0 +1,46 @@
+import os
+import socket
+import subprocess
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from glyph_ocr import GLYPH_SIZE, GlyphBank  # noqa: E402
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Start the mock the way a default bench run does, then feed it an "accepted" captcha
+BENCH_RUN = """
+import os, sys
+import bench_portal
+bench_portal.prepare(bench_portal.parse_args(["--port", sys.argv[1], "--latency-ms", "0"]))
+import captcha
+from bench_ocr import synthetic_captcha
+for text in ("abcde", "fghij", "klmno"):
+    captcha.record_captcha_result(synthetic_captcha(text), text, True)
+print(captcha.get_template_recognizer().bank.path)
+"""
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def test_mock_bench_run_leaves_real_glyph_bank_untouched(tmp_path):
+    real = tmp_path / "glyph_bank.npz"
+    GlyphBank(str(real)).add(np.ones((1, GLYPH_SIZE * GLYPH_SIZE), np.float32), "z")
+    before = real.read_bytes()
+
+    env = {k: v for k, v in os.environ.items() if k not in ("GLYPH_BANK_PATH", "CAPTCHA_CORPUS_DIR")}
+    env["PYTHONPATH"] = REPO
+    run = subprocess.run([sys.executable, "-c", BENCH_RUN, str(_free_port())], cwd=tmp_path, env=env,
+                         capture_output=True, text=True, timeout=120)
+    assert run.returncode == 0, run.stderr
+
+    bank_path = run.stdout.strip().splitlines()[-1]
+    assert os.path.basename(os.path.dirname(bank_path)).startswith("bench_portal_")
+    assert real.read_bytes() == before
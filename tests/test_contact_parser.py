@@ -0,0 +1,37 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from contact_parser import available_parsers, extract_contact, get_parser  # noqa: E402
+
+BODY_AND_FOOTER = """<html><body>
+<div class="main"><p>Phone No: 0651-2233445</p><p>Email: jhagri[at]gmail.com</p></div>
+<footer>Email: webmaster[at]jharkhand.gov.in</footer>
+</body></html>"""
+
+BLOCK_PHONE_ONLY = """<html><body>
+<div id="Contact-Us"><p>Phone: 0651-1, 0651-2</p></div>
+<p>Email: secy[at]law.gov.in</p>
+<footer>Email: webmaster[at]jharkhand.gov.in</footer>
+</body></html>"""
+
+
+@pytest.mark.parametrize("name", available_parsers())
+def test_site_footer_does_not_beat_page_contacts(name):
+    assert extract_contact(BODY_AND_FOOTER, get_parser(name)) == {
+        "phone": ["0651-2233445"], "email": "jhagri@gmail.com",
+    }
+
+
+@pytest.mark.parametrize("name", available_parsers())
+def test_each_pattern_falls_back_to_the_page(name):
+    assert extract_contact(BLOCK_PHONE_ONLY, get_parser(name)) == {
+        "phone": ["0651-1", "0651-2"], "email": "secy@law.gov.in",
+    }
+
+
+def test_unlabelled_page_is_not_parsed():
+    assert extract_contact("<p>No contacts here</p>") == {"phone": None, "email": None}
@@ -0,0 +1,20 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import dedupe  # noqa: E402
+from dedupe import TTLCache  # noqa: E402
+
+
+def test_ttl_cache_read_does_not_hide_expired_entries_from_the_sweep(monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr(dedupe.time, "monotonic", lambda: clock[0])
+    cache = TTLCache(ttl=10)
+    cache.put("old", 1)
+    clock[0] = 5
+    cache.put("newer", 2)
+    cache.get("old")  # a read must not move "old" behind "newer"
+    clock[0] = 12
+    cache.put("newest", 3)
+    assert len(cache) == 2 and cache.get("old") is None
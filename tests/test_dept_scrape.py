@@ -0,0 +1,60 @@
+import asyncio
+import os
+import sys
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import dept_scrape  # noqa: E402
+from dept_scrape import DIR_URL, crawl_departments  # noqa: E402
+
+DIRECTORY = '<a href="/dept/a">Department of A</a> <a href="/dept/b">Department of B</a>'
+PAGE = "<p>Phone: 0651-2400000 Email: {}@jharkhand.gov.in</p>"
+
+
+def portal(requests, pages=None):
+    pages = pages or {}
+
+    def handler(request):
+        requests.append(request)
+        if request.headers.get("if-none-match"):
+            return httpx.Response(304)
+        if str(request.url) == DIR_URL:
+            return httpx.Response(200, text=DIRECTORY, headers={"etag": '"dir"'})
+        name = request.url.path.rsplit("/", 1)[-1]
+        return httpx.Response(200, text=pages.get(name, PAGE.format(name)), headers={"etag": f'"{name}"'})
+    return httpx.MockTransport(handler)
+
+
+def crawl(cache_path, transport):
+    return asyncio.run(crawl_departments(cache_path=str(cache_path), transport=transport))
+
+
+def test_unchanged_pages_reuse_results_until_the_parser_changes(tmp_path, monkeypatch):
+    cache = tmp_path / "cache.json"
+    crawl(cache, portal([]))
+
+    requests = []
+    contacts, stats = crawl(cache, portal(requests))
+    assert stats["not_modified"] == 3 and stats["fetched"] == 0
+    assert contacts["Department of A"]["email"] == "a@jharkhand.gov.in"
+
+    monkeypatch.setattr(dept_scrape, "PARSE_VERSION", dept_scrape.PARSE_VERSION + 1)
+    requests = []
+    contacts, stats = crawl(cache, portal(requests))
+    assert stats["fetched"] == 3 and stats["not_modified"] == 0
+    assert not any(r.headers.get("if-none-match") for r in requests)
+    assert contacts["Department of B"]["email"] == "b@jharkhand.gov.in"
+
+
+def test_page_that_crashes_the_parser_counts_as_failed(tmp_path, monkeypatch):
+    def parse_contact(html):
+        if "b@" in html:
+            raise RuntimeError("parser bug")
+        return dept_scrape.extract_contact(html)
+
+    monkeypatch.setattr(dept_scrape, "parse_contact", parse_contact)
+    contacts, stats = crawl(tmp_path / "cache.json", portal([]))
+    assert stats["failed"] == 1
+    assert list(contacts) == ["Department of A"]
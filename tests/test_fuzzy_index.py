@@ -0,0 +1,60 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from directory import ContactDirectory  # noqa: E402
+from fuzzy_index import TrigramIndex  # noqa: E402
+from portal_data import ULB_OPTIONS, department_names  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def directory():
+    return ContactDirectory(
+        department_names, ULB_OPTIONS,
+        departments_path=os.path.join(ROOT, "departments.json"),
+        ulbs_path=os.path.join(ROOT, "ulb_info.json"),
+    )
+
+
+@pytest.mark.parametrize("query, expected", [
+    # The shared suffix used to decide these (Garhwa, Chatra, Pakur)
+    ("Giridih Nagar Parishad", "Giridih Municipal Corporation"),
+    ("Jamtara Nagar Parishad", "Jamtara Nagar Panchayat"),
+    ("Latehar Nagar Parishad", "Latehar Nagar Panchayat"),
+    ("Mihijam", "Mihijam Nagar Parishad"),
+    ("ranchi nagar nigam", "Ranchi Municipal Corporation"),
+    ("Sahebganj Nagar Parishad", "Sahibganj Nagar Parishad"),
+])
+def test_ulb_resolves_on_place_name(directory, query, expected):
+    assert directory.resolve_ulb(query)[0] == expected
+
+
+@pytest.mark.parametrize("query", ["Department of Roads", "Department of Lw"])
+def test_department_without_a_matching_subject_is_not_guessed(directory, query):
+    display, contact = directory.resolve_department(query)
+    assert display == query
+    assert contact is None
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("Road Construction", "Department of Road Construction"),
+    ("Department of Energi", "Department of Energy"),
+    ("Law", "Department of Law"),
+])
+def test_department_resolves_on_subject(directory, query, expected):
+    assert directory.resolve_department(query)[0] == expected
+
+
+def test_generic_words_alone_never_match():
+    index = TrigramIndex([("Chatra Nagar Parishad", "Chatra"), ("Garhwa Nagar Parishad", "Garhwa")])
+    assert index.best("Jamtara Nagar Parishad", 0.6)[0] is None
+
+
+def test_ambiguous_match_needs_a_margin():
+    index = TrigramIndex([("Ranchi Municipal Corporation", "RMC"), ("Ranchi Nagar Parishad", "RNP")])
+    target, _ = index.best("Ranchi", 0.6, min_margin=0.1)
+    assert target is None
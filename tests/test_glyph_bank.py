@@ -0,0 +1,84 @@
+import multiprocessing
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from glyph_ocr import GLYPH_SIZE, GlyphBank  # noqa: E402
+
+
+def _add_glyphs(path, char, count):
+    bank = GlyphBank(path)
+    for _ in range(count):
+        bank.add(np.ones((1, GLYPH_SIZE * GLYPH_SIZE), np.float32), char)
+
+
+def test_concurrent_processes_keep_each_others_glyphs(tmp_path):
+    path = str(tmp_path / "bank.npz")
+    spawn = multiprocessing.get_context("spawn")
+    workers = [spawn.Process(target=_add_glyphs, args=(path, char, 15)) for char in "abcd"]
+    for p in workers:
+        p.start()
+    for p in workers:
+        p.join()
+        assert p.exitcode == 0
+
+    labels = list(GlyphBank(path)._data[1])
+    assert sorted(set(labels)) == list("abcd")
+    assert all(labels.count(char) == 15 for char in "abcd")
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp.npz")]
+
+
+def test_stale_instance_merges_into_saved_bank(tmp_path):
+    path = str(tmp_path / "bank.npz")
+    first, second = GlyphBank(path), GlyphBank(path)
+    first.add(np.ones((2, GLYPH_SIZE * GLYPH_SIZE), np.float32), "ab")
+    second.add(np.ones((1, GLYPH_SIZE * GLYPH_SIZE), np.float32), "c")
+    assert sorted(GlyphBank(path)._data[1]) == ["a", "b", "c"]
+
+
+def _unit(*values):
+    vector = np.zeros(GLYPH_SIZE * GLYPH_SIZE, np.float32)
+    vector[:len(values)] = values
+    return vector / np.linalg.norm(vector)
+
+
+def test_classify_reports_margin_over_other_characters(tmp_path):
+    bank = GlyphBank(str(tmp_path / "bank.npz"))
+    bank.add(np.stack([_unit(1, 0), _unit(1, 0.1), _unit(0, 1)]), "aab")
+    labels, sims, margins = bank.classify(np.stack([_unit(1, 0), _unit(1, 1)]))
+    assert list(labels) == ["a", "a"]
+    assert sims[0] > 0.99 and margins[0] > 0.99  # nothing like "b"
+    assert margins[1] < 0.1                      # halfway between "a" and "b"
+
+
+def test_ambiguous_template_match_does_not_skip_tesseract(monkeypatch):
+    import captcha
+    monkeypatch.setattr(captcha, "CAPTCHA_LENGTH", 2)
+    clear = captcha.score_candidate([("a", 97.0, 40.0), ("b", 95.0, 30.0)], "template")
+    ambiguous = captcha.score_candidate([("a", 97.0, 40.0), ("b", 95.0, 1.0)], "template")
+    weak_char = captcha.score_candidate([("a", 99.0, 40.0), ("b", 88.0, 30.0)], "template")
+    assert captcha.is_confident(clear)
+    assert not captcha.is_confident(ambiguous)
+    assert not captcha.is_confident(weak_char)  # mean 93.5 would pass, the weakest glyph does not
+
+
+def test_unconfident_template_guess_ranks_after_tesseract(monkeypatch):
+    import captcha
+    from bench_ocr import synthetic_captcha
+
+    class StubRecognizer:
+        def recognize(self, binary):
+            return [(ch, 91.0, 2.0) for ch in "aBcDe"]  # high similarity, ambiguous
+
+    class StubBackend:
+        def recognize(self, img, cfg):
+            return [(ch, 88.0) for ch in "xYz12"]
+
+    monkeypatch.setattr(captcha, "get_template_recognizer", lambda: StubRecognizer())
+    text, candidates = captcha.read_captcha(synthetic_captcha("xYz12"), backend=StubBackend(), parallel=False,
+                                            recognizer="template")
+    assert text == "xYz12"
+    assert [c.source for c in candidates] == [captcha.OCR_CONFIGS[0].args, "template"]
@@ -0,0 +1,83 @@
+import asyncio
+import base64
+import os
+import sys
+
+import httpx
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import http_engine  # noqa: E402
+from http_engine import HttpGrievanceEngine, PORTAL_CAPTCHA_PATH, PORTAL_SUBMIT_PATH  # noqa: E402
+
+PNG = "data:image/png;base64," + base64.b64encode(b"\x89PNG\r\n\x1a\nfake").decode()
+
+
+def submit(monkeypatch, submit_statuses, captcha_response=None, ocr_error=None):
+    """Run one grievance against a fake portal; returns (result, number of POSTs)."""
+    async def read_async(captcha_bytes):
+        if ocr_error:
+            raise ocr_error
+        return "abcd", []
+
+    monkeypatch.setattr(http_engine.ocr_pool, "read_async", read_async)
+    monkeypatch.setattr(http_engine, "record_captcha_result", lambda *args: None)
+    statuses = iter(submit_statuses)
+    posts = []
+
+    def handler(request):
+        if request.url.path == PORTAL_CAPTCHA_PATH:
+            return captcha_response or httpx.Response(200, json={"id": "c1", "image": PNG})
+        if request.url.path == PORTAL_SUBMIT_PATH:
+            posts.append(request)
+            return httpx.Response(next(statuses), json={"grievanceId": "G1"})
+        return httpx.Response(200, text="<html></html>")
+
+    engine = HttpGrievanceEngine(transport=httpx.MockTransport(handler))
+    ulb = next(iter(http_engine.ULB_CODES))
+    result = asyncio.run(engine.automate_grievance("Streetlight", False, None, None, ulb, "U", "9999999999", "u@example.com"))
+    return result, len(posts)
+
+
+def test_accepted_after_wrong_captcha(monkeypatch):
+    result, posts = submit(monkeypatch, [400, 201])
+    assert result["status"] == "success" and result["portal_reference"] == "G1"
+    assert posts == 2
+
+
+@pytest.mark.parametrize("status", [500, 502, 302, 409])
+def test_unexpected_submit_answer_is_not_retried_elsewhere(monkeypatch, status):
+    result, posts = submit(monkeypatch, [status])
+    assert result["status"] == "error"
+    assert "fallback" not in result  # the portal may already have the grievance
+    assert posts == 1
+
+
+@pytest.mark.parametrize("status", [404, 405])
+def test_missing_submit_endpoint_falls_back(monkeypatch, status):
+    result, posts = submit(monkeypatch, [status])
+    assert result.get("fallback")  # nothing was filed: the path is wrong
+    assert posts == 1
+
+
+def test_captcha_endpoint_failure_falls_back(monkeypatch):
+    monkeypatch.setattr(http_engine, "PORTAL_CAPTCHA_PATH", "/missing")
+    result, posts = submit(monkeypatch, [])
+    assert result.get("fallback") and posts == 0
+
+
+@pytest.mark.parametrize("captcha_response", [
+    httpx.Response(200, json=["c1", PNG]),
+    httpx.Response(200, json=None),
+    httpx.Response(200, text="<html>maintenance</html>"),
+])
+def test_malformed_captcha_response_falls_back(monkeypatch, captcha_response):
+    result, posts = submit(monkeypatch, [], captcha_response)
+    assert result.get("fallback") and posts == 0
+
+
+def test_ocr_backend_failure_is_a_clean_error(monkeypatch):
+    result, posts = submit(monkeypatch, [], ocr_error=OSError("tesseract is not installed"))
+    assert result["status"] == "error" and "tesseract" in result["message"]
+    assert "fallback" not in result and posts == 0
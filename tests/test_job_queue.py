@@ -0,0 +1,81 @@
+import asyncio
+import os
+import sqlite3
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import job_queue  # noqa: E402
+from job_queue import FAILED, QUEUED, RUNNING, SUCCEEDED, JobStore  # noqa: E402
+from sqlite_retry import retry_db  # noqa: E402
+
+
+@pytest.fixture
+def db(tmp_path):
+    return str(tmp_path / "jobs.db")
+
+
+def test_expired_lease_is_reclaimed_and_fenced(db):
+    a = JobStore(db, owner="a", lease_seconds=0.1)
+    b = JobStore(db, owner="b", lease_seconds=0.1)
+    job_id = a.enqueue("g", {})
+    assert a.claim_next("g")["id"] == job_id
+    assert b.claim_next("g") is None  # leased to a
+
+    time.sleep(0.15)
+    reclaimed = b.claim_next("g")
+    assert reclaimed["id"] == job_id and reclaimed["attempts"] == 2
+    assert not a.heartbeat(job_id)
+    assert not a.finish(job_id, SUCCEEDED, {"by": "a"})
+    assert b.finish(job_id, SUCCEEDED, {"by": "b"})
+    assert a.get(job_id)["result"] == {"by": "b"}
+
+
+def test_heartbeat_keeps_the_lease(db):
+    a = JobStore(db, owner="a", lease_seconds=0.2)
+    b = JobStore(db, owner="b", lease_seconds=0.2)
+    a.enqueue("g", {})
+    job = a.claim_next("g")
+    for _ in range(3):
+        time.sleep(0.1)
+        assert a.heartbeat(job["id"])
+        assert b.claim_next("g") is None
+
+
+def test_job_fails_after_max_attempts(db, monkeypatch):
+    monkeypatch.setattr(job_queue, "JOB_MAX_ATTEMPTS", 2)
+    store = JobStore(db, owner="a", lease_seconds=0.05)
+    job_id = store.enqueue("g", {})
+    for _ in range(2):
+        assert store.claim_next("g")["id"] == job_id
+        time.sleep(0.08)
+    assert store.claim_next("g") is None
+    assert store.get(job_id)["status"] == FAILED
+
+
+def test_release_keeps_started_jobs(db):
+    store = JobStore(db, owner="a")
+    started, unstarted = store.enqueue("g", {}), store.enqueue("g", {})
+    store.claim_next("g")
+    store.claim_next("g")
+    assert store.release(keep={started}) == 1
+    assert store.get(started)["status"] == RUNNING
+    assert store.get(unstarted)["status"] == QUEUED
+
+
+def test_locked_database_is_retried(db):
+    store = JobStore(db, owner="a", busy_timeout=0.05)
+    store.enqueue("g", {})
+    other = sqlite3.connect(db, isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")
+    with pytest.raises(sqlite3.OperationalError):
+        store.claim_next("g")
+
+    async def claim_while_locked():
+        asyncio.get_running_loop().call_later(0.3, other.execute, "COMMIT")
+        return await retry_db(store.claim_next, "g", what="claim", deadline=5)
+
+    assert asyncio.run(claim_while_locked())["status"] == RUNNING
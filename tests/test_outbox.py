@@ -0,0 +1,39 @@
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import outbox as outbox_module  # noqa: E402
+from outbox import EmailOutbox  # noqa: E402
+
+
+def test_failed_dead_letter_rolls_back(tmp_path, monkeypatch):
+    monkeypatch.setattr(outbox_module, "OUTBOX_MAX_ATTEMPTS", 1)
+    box = EmailOutbox(str(tmp_path / "outbox.db"))
+    box.enqueue("a@example.com", "s", "b")
+    message = box._claim_due(10)[0]
+
+    box._conn.execute("DROP TABLE dead_letters")
+    with pytest.raises(sqlite3.OperationalError):
+        box._mark_failed(message, "smtp down")
+
+    # No transaction left open: the connection (and the database lock) are usable again
+    assert not box._conn.in_transaction
+    assert box._claim_due(10) == []
+    assert box._conn.execute("SELECT status FROM outbox").fetchone()["status"] == "sending"
+
+
+def test_restart_leaves_other_senders_messages_alone(tmp_path):
+    path = str(tmp_path / "outbox.db")
+    busy, restarted = EmailOutbox(path), EmailOutbox(path)
+    busy.enqueue("a@example.com", "s", "b")
+    busy._claim_due(10)
+
+    assert restarted.requeue_sending() == 0  # still being delivered by the other process
+    assert restarted._claim_due(10) == []
+    assert restarted.requeue_sending(claim_timeout=-1) == 1  # its claim timed out: the sender is gone
+    assert len(restarted._claim_due(10)) == 1
+    assert restarted._conn.execute("SELECT claimed_by FROM outbox").fetchone()[0] == restarted.owner
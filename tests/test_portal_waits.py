@@ -0,0 +1,44 @@
+import os
+import sys
+
+import pytest
+from playwright.sync_api import Error as PlaywrightError, TimeoutError as PlaywrightTimeoutError
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from portal_waits import CaptchaVerdictTimeout, submit_and_wait_for_verdict  # noqa: E402
+
+
+class SilentPortal:
+    """Live-portal-like page: a rejected captcha changes nothing the waits can see."""
+
+    def __init__(self, unreadable=False):
+        self.unreadable = unreadable
+        self.evaluations = 0
+
+    def evaluate(self, script, arg):
+        self.evaluations += 1
+        if self.evaluations == 1:
+            return {"src": "data:image/png;base64,AAA", "submits": 0, "verdicts": 0}
+        if self.unreadable:
+            raise PlaywrightError("Execution context was destroyed")
+        return False
+
+    def wait_for_function(self, *args, **kwargs):
+        raise PlaywrightTimeoutError("Timeout exceeded")
+
+
+class Button:
+    def click(self):
+        pass
+
+
+def test_unchanged_captcha_after_timeout_is_left_as_a_rejection():
+    page = SilentPortal()
+    submit_and_wait_for_verdict(page, Button())  # no exception: the caller sees the captcha and retries
+    assert page.evaluations == 2
+
+
+def test_unreadable_page_after_timeout_is_uncertain():
+    with pytest.raises(CaptchaVerdictTimeout):
+        submit_and_wait_for_verdict(SilentPortal(unreadable=True), Button())
@@ -0,0 +1,31 @@
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ulb_scrape import merge_entries, parse_rows  # noqa: E402
+
+
+def row(name, email, phone="0651-2400000"):
+    return ["1", "Ranchi", name, "Main Road", email, phone]
+
+
+def test_duplicate_ulb_rows_keep_the_first_and_are_logged(caplog):
+    with caplog.at_level(logging.INFO, logger="ulb_scrape"):
+        entries = parse_rows([
+            row("Ranchi Municipal Corporation", "rmc@example.com"),
+            row("ranchi municipal corporation", "other@example.com"),
+            row("Ranchi Municipal Corporation", "rmc@example.com"),
+        ])
+    assert [e["email"] for e in entries] == ["rmc@example.com"]
+    assert "different ulb_name, email" in caplog.text
+    assert "twice" in caplog.text
+
+
+def test_merge_matches_rows_by_the_same_key():
+    existing = parse_rows([row("Ranchi Municipal Corporation", "old@example.com")])
+    merged, report = merge_entries(existing, parse_rows([row("Ranchi Municipal Corporation", "new@example.com")]))
+    assert [e["email"] for e in merged] == ["new@example.com"]
+    assert report["changed"] == [{"ulb_name": "Ranchi Municipal Corporation", "fields": ["email"]}]
+    assert not report["added"] and not report["removed"]
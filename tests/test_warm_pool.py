@@ -0,0 +1,69 @@
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import warm_pool  # noqa: E402
+from warm_pool import AsyncWarmPool, PortalSession, WarmPagePool  # noqa: E402
+
+
+class FakePage:
+    def is_closed(self):
+        return False
+
+
+class FakeContext:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class AsyncFakeContext(FakeContext):
+    async def close(self):
+        self.closed = True
+
+
+def test_idle_sync_pool_lets_stock_expire_until_the_next_take(monkeypatch):
+    opened = []
+    monkeypatch.setattr(warm_pool, "get_browser", lambda: None)
+    monkeypatch.setattr(warm_pool, "open_form_entry",
+                        lambda browser: opened.append(1) or PortalSession(FakeContext(), FakePage(), None))
+    pool = WarmPagePool(size=1)
+    assert pool.top_up() and len(opened) == 1
+
+    # Nothing taken for a whole context lifetime: the stale page goes, nothing replaces it
+    stale = pool._parked()[0][1].context
+    monkeypatch.setattr(warm_pool, "WARM_CONTEXT_MAX_AGE_SECONDS", 0)
+    assert not pool.top_up()
+    assert stale.closed and len(opened) == 1 and not pool._parked()
+
+    monkeypatch.setattr(warm_pool, "WARM_CONTEXT_MAX_AGE_SECONDS", 240)
+    assert pool.take() is None
+    assert pool.top_up() and len(opened) == 2
+
+
+def test_idle_async_pool_does_not_rewarm(monkeypatch):
+    monkeypatch.setattr(warm_pool, "WARM_CHECK_SECONDS", 0.01)
+    opened = []
+
+    async def open_entry():
+        opened.append(1)
+        return PortalSession(AsyncFakeContext(), FakePage(), None)
+
+    async def go():
+        pool = AsyncWarmPool(open_entry, size=1)
+        pool._last_taken = time.monotonic() - warm_pool.WARM_CONTEXT_MAX_AGE_SECONDS - 1
+        pool.start()
+        await asyncio.sleep(0.05)
+        idle_opens = len(opened)
+        assert await pool.take() is None
+        await asyncio.sleep(0.05)
+        await pool.stop()
+        return idle_opens
+
+    assert asyncio.run(go()) == 0
+    assert len(opened) == 1
@@ -1,70 +1,134 @@
 import json
+import logging
+
 from playwright.sync_api import sync_playwright
 
+from directory import write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+ULB_INFO_URL = "https://udhd.jharkhand.gov.in/other/ULBInformation.aspx"
+FIELDS = ("district", "ulb_name", "address", "email", "phone")
+EMPTY_VALUES = frozenset({"n/a", "na", "-", "--"})
+
+# Whole table as [[cell text, ...], ...] in one round trip (header row skipped)
+TABLE_ROWS_JS = """
+rows => rows.slice(1).map(row => Array.from(row.querySelectorAll("td"), td => td.innerText.trim()))
+"""
+
 
 def clean_entry(entry: dict) -> dict:
     """Clean individual entry: strip, remove N/A, fix empty values."""
     cleaned = {}
     for k, v in entry.items():
         val = v.strip() if isinstance(v, str) else v
-        if not val or val.lower() in {"n/a", "na", "-", "--"}:
+        if not val or val.lower() in EMPTY_VALUES:
             val = ""
         cleaned[k] = val
     return cleaned
 
 
-def scrape_ulb_info(output_file="ulb_info.json"):
-    url = "https://udhd.jharkhand.gov.in/other/ULBInformation.aspx"
-    data = []
-
+def ulb_key(item: dict) -> tuple:
+    """
+    Identity of a ULB, within one scrape and across scrapes: its address,
+    email and phone may change.
+    """
+    return item["district"].lower(), item["ulb_name"].lower()
+
+
+def extract_rows(page) -> list:
+    page.wait_for_selector("table")
+    return page.eval_on_selector_all("table tr", TABLE_ROWS_JS)
+
+
+def parse_rows(rows: list) -> list:
+    """
+    Table cells -> cleaned entries, one per ULB (ulb_key). When the table
+    lists a ULB twice the first row wins and the other is logged.
+    """
+    data = {}
+    for cols in rows:
+        if len(cols) < 6:
+            continue
+        entry = clean_entry(dict(zip(FIELDS, cols[1:6])))
+
+        # Skip if no useful data
+        if not entry["ulb_name"] and not entry["email"]:
+            continue
+        key = ulb_key(entry)
+        first = data.setdefault(key, entry)
+        if first is not entry:
+            if first == entry:
+                logger.info(f"ULB table lists {entry['ulb_name']} ({entry['district']}) twice")
+            else:
+                fields = [f for f in FIELDS if first[f] != entry[f]]
+                logger.warning(f"⚠️ Duplicate ULB row for {entry['ulb_name']} ({entry['district']}) "
+                               f"with different {', '.join(fields)}; keeping the first: {first}, dropping: {entry}")
+    return list(data.values())
+
+
+def merge_entries(existing: list, scraped: list):
+    """
+    Apply a scrape to the current entries: changed ULBs are updated in place,
+    new ones appended, ULBs no longer listed dropped. Returns (entries, report).
+    """
+    incoming = {}
+    for item in scraped:
+        incoming.setdefault(ulb_key(item), item)
+
+    merged = []
+    report = {"added": [], "changed": [], "removed": [], "unchanged": 0}
+    for item in existing:
+        new = incoming.pop(ulb_key(item), None)
+        if new is None:
+            report["removed"].append(item["ulb_name"])
+        elif new == item:
+            merged.append(item)
+            report["unchanged"] += 1
+        else:
+            merged.append(new)
+            fields = [f for f in FIELDS if item.get(f) != new.get(f)]
+            report["changed"].append({"ulb_name": new["ulb_name"], "fields": fields})
+    for item in incoming.values():
+        merged.append(item)
+        report["added"].append(item["ulb_name"])
+    return merged, report
+
+
+def fetch_ulb_entries(url=ULB_INFO_URL) -> list:
+    """Scrape the UDHD ULB table into cleaned entries; nothing is written."""
     with sync_playwright() as p:
         browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
-        page.goto(url, timeout=60000)
-
-        # Wait for table
-        page.wait_for_selector("table")
-
-        # Get all table rows (skip header row)
-        rows = page.query_selector_all("table tr")[1:]
-
-        for row in rows:
-            cols = [c.inner_text().strip() for c in row.query_selector_all("td")]
-            if len(cols) < 6:
-                continue
-
-            entry = {
-                "district": cols[1],
-                "ulb_name": cols[2],
-                "address": cols[3],
-                "email": cols[4],
-                "phone": cols[5],
-            }
-
-            entry = clean_entry(entry)
-
-            # Skip if no useful data
-            if not entry["ulb_name"] and not entry["email"]:
-                continue
-
-            data.append(entry)
-
-        browser.close()
-
-    # Deduplicate (based on ulb_name + district + email)
-    seen = set()
-    cleaned_data = []
-    for item in data:
-        key = (item["district"].lower(), item["ulb_name"].lower(), item["email"].lower())
-        if key not in seen:
-            seen.add(key)
-            cleaned_data.append(item)
-
-    # Save JSON
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(cleaned_data, f, indent=2, ensure_ascii=False)
-
-    print(f"✅ Scraped {len(cleaned_data)} cleaned ULB records and saved to {output_file}")
+        try:
+            page = browser.new_page()
+            page.goto(url, timeout=60000, wait_until="domcontentloaded")
+            return parse_rows(extract_rows(page))
+        finally:
+            browser.close()
+
+
+def scrape_ulb_info(output_file="ulb_info.json") -> dict:
+    scraped = fetch_ulb_entries()
+    try:
+        with open(output_file, "r", encoding="utf-8") as f:
+            existing = json.load(f)
+    except FileNotFoundError:
+        existing = []
+
+    merged, report = merge_entries(existing, scraped)
+    if report["added"] or report["changed"] or report["removed"]:
+        write_json_atomic(output_file, merged, indent=2)
+
+    print(f"✅ Scraped {len(scraped)} cleaned ULB records into {output_file}: "
+          f"{len(report['added'])} added, {len(report['changed'])} changed, "
+          f"{len(report['removed'])} removed, {report['unchanged']} unchanged")
+    for change in report["changed"]:
+        print(f"   ~ {change['ulb_name']}: {', '.join(change['fields'])}")
+    for name in report["added"]:
+        print(f"   + {name}")
+    for name in report["removed"]:
+        print(f"   - {name}")
+    return report
 
 
 if __name__ == "__main__":
@@ -0,0 +1,216 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import NamedTuple
+
+from asset_cache import NetworkStats, install_routes, async_install_routes, shared_cache
+from browser_pool import get_browser
+from metrics import WARM_CONTEXTS_TAKEN
+
+logger = logging.getLogger(__name__)
+
+# Grievance portal entry page (point at mock_portal.py for offline runs/benchmarks)
+PORTAL_URL = os.getenv("PORTAL_URL", "https://jharkhandegovernance.com/grievance/main")
+# Endpoint the form POSTs to (its response is the captcha verdict)
+PORTAL_SUBMIT_PATH = os.getenv("PORTAL_SUBMIT_PATH", "/grievance/api/grievances")
+
+# Contexts parked at the ULB selector, per browser worker (sync) or for the async engine
+WARM_CONTEXTS = max(0, int(os.getenv("WARM_CONTEXTS", "1")))
+# Parked contexts older than this are thrown away (the portal session may expire).
+# A pool nothing was taken from for this long stops re-warming until the next take
+WARM_CONTEXT_MAX_AGE_SECONDS = float(os.getenv("WARM_CONTEXT_MAX_AGE_SECONDS", "240"))
+# How often an idle pool re-checks its stock (and waits after a failed warm-up)
+WARM_CHECK_SECONDS = float(os.getenv("WARM_CHECK_SECONDS", "15"))
+
+#hardcoded location, we can make it dynamic by fetching user's location
+CONTEXT_OPTIONS = dict(
+    permissions=["geolocation"],
+    geolocation={"latitude": 23.36, "longitude": 85.33},
+    locale="en-US"
+)
+
+
+class PortalSession(NamedTuple):
+    context: object
+    page: object
+    network: NetworkStats
+
+
+def open_form_entry(browser) -> PortalSession:
+    """New context + page, navigated past the acknowledgement to the ULB selector."""
+    context = browser.new_context(**CONTEXT_OPTIONS)
+    try:
+        network = install_routes(context, shared_cache())
+        page = context.new_page()
+        logger.info("Navigating to grievance portal...")
+        page.goto(PORTAL_URL, timeout=60000)
+
+        logger.info("Clicking 'Register Grievance Now'")
+        page.get_by_role("button", name="Register Grievance Now").click()
+
+        logger.info("Acknowledging form")
+        page.get_by_role("checkbox").click()
+        page.wait_for_selector("button:has-text('Continue'):not([disabled])")
+        page.get_by_role("button", name="Continue").click()
+        page.wait_for_selector("select[name='ulb']")
+    except Exception:
+        context.close()
+        raise
+    return PortalSession(context, page, network)
+
+
+async def async_open_form_entry(browser) -> PortalSession:
+    """Async twin of open_form_entry."""
+    context = await browser.new_context(**CONTEXT_OPTIONS)
+    try:
+        network = await async_install_routes(context, await asyncio.to_thread(shared_cache))
+        page = await context.new_page()
+        logger.info("Navigating to grievance portal...")
+        await page.goto(PORTAL_URL, timeout=60000)
+
+        logger.info("Clicking 'Register Grievance Now'")
+        await page.get_by_role("button", name="Register Grievance Now").click()
+
+        logger.info("Acknowledging form")
+        await page.get_by_role("checkbox").click()
+        await page.wait_for_selector("button:has-text('Continue'):not([disabled])")
+        await page.get_by_role("button", name="Continue").click()
+        await page.wait_for_selector("select[name='ulb']")
+    except Exception:
+        await context.close()
+        raise
+    return PortalSession(context, page, network)
+
+
+def _fresh(created_at: float, session: PortalSession) -> bool:
+    return time.monotonic() - created_at < WARM_CONTEXT_MAX_AGE_SECONDS and not session.page.is_closed()
+
+
+def _idle(last_taken: float) -> bool:
+    """No grievance for a whole context lifetime: re-warming would only feed the bin."""
+    return time.monotonic() - last_taken > WARM_CONTEXT_MAX_AGE_SECONDS
+
+
+class WarmPagePool:
+    """
+    Sync-API stock of parked pages. Playwright objects are thread-bound, so
+    every browser worker keeps its own stock and refills it from the worker
+    pool's idle hook (top_up), never while a grievance is running.
+    Without traffic, stock is only dropped as it goes stale, not replaced;
+    the first take() after that is a miss and restarts the warming.
+    """
+
+    def __init__(self, size: int = WARM_CONTEXTS):
+        self.size = size
+        self._local = threading.local()
+        # Any worker's take() counts as traffic for all of them
+        self._last_taken = time.monotonic()
+
+    def _parked(self) -> deque:
+        if not hasattr(self._local, "parked"):
+            self._local.parked = deque()
+        return self._local.parked
+
+    @staticmethod
+    def _discard(context):
+        try:
+            context.close()
+        except Exception:
+            logger.debug("Error closing stale warm context", exc_info=True)
+
+    def take(self):
+        """PortalSession parked at the ULB selector, or None if the stock is empty."""
+        self._last_taken = time.monotonic()
+        parked = self._parked()
+        while parked:
+            created_at, session = parked.popleft()
+            if _fresh(created_at, session):
+                WARM_CONTEXTS_TAKEN.labels(result="hit").inc()
+                return session
+            self._discard(session.context)
+        WARM_CONTEXTS_TAKEN.labels(result="miss").inc()
+        return None
+
+    def top_up(self) -> bool:
+        """Drop stale pages and park one more if below size; True if one was added."""
+        parked = self._parked()
+        for entry in [e for e in parked if not _fresh(*e)]:
+            parked.remove(entry)
+            self._discard(entry[1].context)
+        if len(parked) >= self.size or _idle(self._last_taken):
+            return False
+        parked.append((time.monotonic(), open_form_entry(get_browser())))
+        logger.info(f"♨️ Warm context parked in {threading.current_thread().name} ({len(parked)}/{self.size})")
+        return True
+
+
+class AsyncWarmPool:
+    """
+    Async-API stock of parked pages, refilled by a background task whenever
+    one is taken or goes stale (unless nothing was taken for a whole context
+    lifetime, as in WarmPagePool). open_entry() must return a new PortalSession.
+    """
+
+    def __init__(self, open_entry, size: int = WARM_CONTEXTS):
+        self.size = size
+        self._open_entry = open_entry
+        self._parked = deque()
+        self._wanted = asyncio.Event()
+        self._task = None
+        self._last_taken = time.monotonic()
+
+    def start(self):
+        if self.size and self._task is None:
+            self._task = asyncio.create_task(self._replenish())
+
+    @staticmethod
+    async def _discard(context):
+        try:
+            await context.close()
+        except Exception:
+            logger.debug("Error closing stale warm context", exc_info=True)
+
+    async def _replenish(self):
+        while True:
+            for entry in [e for e in self._parked if not _fresh(*e)]:
+                self._parked.remove(entry)
+                await self._discard(entry[1].context)
+            if len(self._parked) < self.size and not _idle(self._last_taken):
+                try:
+                    session = await self._open_entry()
+                except Exception:
+                    logger.exception("❌ Could not pre-warm a browser context")
+                    await asyncio.sleep(WARM_CHECK_SECONDS)
+                    continue
+                self._parked.append((time.monotonic(), session))
+                logger.info(f"♨️ Warm context parked ({len(self._parked)}/{self.size})")
+                continue
+            self._wanted.clear()
+            try:
+                await asyncio.wait_for(self._wanted.wait(), timeout=WARM_CHECK_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    async def take(self):
+        """PortalSession parked at the ULB selector, or None if the stock is empty."""
+        self._last_taken = time.monotonic()
+        self._wanted.set()
+        while self._parked:
+            created_at, session = self._parked.popleft()
+            if _fresh(created_at, session):
+                WARM_CONTEXTS_TAKEN.labels(result="hit").inc()
+                return session
+            await self._discard(session.context)
+        WARM_CONTEXTS_TAKEN.labels(result="miss").inc()
+        return None
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        while self._parked:
+            await self._discard(self._parked.popleft()[1].context)
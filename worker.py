@@ -0,0 +1,73 @@
+"""
+Standalone grievance worker: runs queued grievance jobs outside the API.
+
+Workers and the API share the SQLite job store (JOB_DB_PATH), so they must all
+run on a single host against a local disk: SQLite's WAL mode relies on shared
+memory and file locks that network volumes (NFS, SMB, EFS) do not provide
+reliably. Containers are fine as long as they mount the same host directory.
+Each job is leased to one worker and kept alive with heartbeats;
+if a worker dies, its jobs are reclaimed by another once the lease
+(JOB_LEASE_SECONDS) runs out. Run the API with GRIEVANCE_QUEUE_WORKERS=0 to
+keep browsers out of the web tier entirely.
+
+    GRIEVANCE_QUEUE_WORKERS=0 uvicorn main:app          # API: accept + enqueue only
+    python worker.py --workers 2 --engine sync          # browser tier, one per container
+
+Each worker serves its Prometheus metrics on METRICS_PORT (0 disables it); give
+every worker process on the host its own port.
+"""
+import argparse
+import asyncio
+import os
+import signal
+
+from prometheus_client import start_http_server
+
+# Port for this worker's /metrics endpoint; 0 turns it off
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9100"))
+
+
+async def run(main, workers: int, send_email: bool, metrics_port: int = METRICS_PORT):
+    if metrics_port:
+        start_http_server(metrics_port)
+        main.logger.info(f"📈 Worker metrics on :{metrics_port}/metrics")
+    main.start_grievance_workers(workers)
+    if send_email:
+        main.worker_tasks.append(asyncio.create_task(main.outbox.serve()))
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:  # Windows: Ctrl+C still raises KeyboardInterrupt
+            pass
+    try:
+        await stop.wait()
+    finally:
+        main.logger.info("🛑 Stopping grievance worker...")
+        await main.stop_grievance_workers()
+        await main.smtp_pool.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run grievance jobs from the shared job store")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="concurrent jobs (default: GRIEVANCE_QUEUE_WORKERS, else the engine's capacity)")
+    parser.add_argument("--engine", choices=("sync", "async", "http"), default=None,
+                        help="automation engine (default: AUTOMATION_ENGINE)")
+    parser.add_argument("--send-email", action="store_true",
+                        help="also deliver the email outbox (only if no API process does)")
+    parser.add_argument("--metrics-port", type=int, default=METRICS_PORT,
+                        help="port for the Prometheus metrics endpoint, 0 to disable (default: METRICS_PORT)")
+    args = parser.parse_args()
+
+    # Must be set before main is imported
+    if args.engine:
+        os.environ["AUTOMATION_ENGINE"] = args.engine
+    # Workers never refresh the contact directory; they pick up the API's files on change
+    os.environ["DIRECTORY_REFRESH_SECONDS"] = "0"
+
+    import main
+    asyncio.run(run(main, args.workers or main.GRIEVANCE_QUEUE_WORKERS or 1, args.send_email,
+                    args.metrics_port))